@@ -0,0 +1,151 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import json
+
+from Analysis import Analysis
+
+
+class AnalysisCache:
+    """
+    Reuses the analysis of content that has already been analyzed by an identically
+    configured analyzer. Analyses are kept in memory and, optionally, in a DiskCache so
+    that they are shared by parallel builds and successive runs.
+    """
+
+    def __init__(self, disk_cache=None):
+        """
+        Arguments:
+        disk_cache -- An optional DiskCache in which analyses are stored.
+        """
+        self._disk_cache = disk_cache
+        self._analyses = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        """
+        The number of analyses that were reused instead of running the analyzer.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of times an analyzer had to be run.
+        """
+        return self._misses
+
+    @staticmethod
+    def _key(analyzer, resource):
+        """
+        The key of the analysis of the resource by the analyzer, or None if the resource
+        has no content.
+        """
+        content_hash = resource.content_hash
+        if content_hash is None:
+            return None
+        parts = [analyzer.fingerprint, content_hash]
+        if analyzer.results_depend_on_path:
+            parts.append(resource.path_to_file)
+        return hashlib.sha1('\n'.join(parts)).hexdigest()
+
+    def analyze(self, analyzer, resource):
+        """
+        Get the analysis of the resource by the analyzer, reusing a previous analysis of
+        the same content if there is one.
+        Arguments:
+        analyzer -- The Analyzer to be run.
+        resource -- The Resource to be analyzed.
+        Remarks:
+        Only good analyses are stored. An analysis that failed, whether because of the
+        content or because the analyzer could not be run, is repeated by the next build.
+        """
+        return self.analyze_batch(analyzer, [resource])[0]
+
+    def analyze_batch(self, analyzer, resources):
+        """
+        Get the analyses of the resources by the analyzer, in the same order, reusing
+        previous analyses of the same content. The resources that have not been analyzed
+        before are passed to the analyzer's analyze_batch together.
+        Arguments:
+        analyzer -- The Analyzer to be run.
+        resources -- A list of the Resources to be analyzed.
+        """
+        analyses = [None] * len(resources)
+        keys = [AnalysisCache._key(analyzer, resource) for resource in resources]
+        for position, key in enumerate(keys):
+            if key is None:
+                continue
+            analysis = self._analyses.get(key)
+            if analysis is None and self._disk_cache is not None:
+                analysis = self._load(key)
+            if analysis is not None:
+                self._hits += 1
+                self._analyses[key] = analysis
+                analyses[position] = analysis
+
+        positions = [position for position, analysis in enumerate(analyses) if analysis is None]
+        if len(positions) == 0:
+            return analyses
+
+        for position, analysis in zip(positions, analyzer.analyze_batch([resources[p] for p in positions])):
+            analyses[position] = analysis
+            key = keys[position]
+            if key is None:
+                continue
+            self._misses += 1
+            if analysis.good:
+                self._analyses[key] = analysis
+                if self._disk_cache is not None:
+                    self._store(key, analysis)
+        return analyses
+
+    def _load(self, key):
+        """
+        Read an analysis from the disk cache, or return None if it is missing or unreadable.
+        """
+        value = self._disk_cache.get(key)
+        if value is None:
+            return None
+        try:
+            return Analysis.from_dict(json.loads(value))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _store(self, key, analysis):
+        """
+        Write an analysis to the disk cache. Analyses with text that cannot be stored as
+        JSON are only kept in memory.
+        """
+        try:
+            value = json.dumps(analysis.to_dict())
+        except (ValueError, TypeError, UnicodeDecodeError):
+            return
+        try:
+            self._disk_cache.set(key, value)
+        except (IOError, OSError):
+            pass  # The cache is an optimization, so a read-only or full disk is not an error
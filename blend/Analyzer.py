@@ -24,10 +24,15 @@
 
 from Resource import Resource
 from Analysis import Analysis
+from helpers import fingerprint
 
 
 class Analyzer():
 
+    # Whether or not the analysis of a resource depends on its path as well as its
+    # content. Cached analyses of such analyzers are not shared by identical files.
+    results_depend_on_path = False
+
     def __init__(self, options=None):
         pass  # The base class has no initialization to do
 
@@ -35,3 +40,29 @@ class Analyzer():
         if resource is not None and not isinstance(resource, Resource):
             raise Exception('analyze must be called with a Resource instance')
         return Analysis()
+
+    def analyze_batch(self, resources):
+        """
+        Analyze several resources and return a list of their Analyses in the same order.
+        Analyzers that can run several analyses at the same time override this to analyze
+        the resources concurrently.
+        Arguments:
+        resources -- A list of Resource instances.
+        """
+        return [self.analyze(resource) for resource in resources]
+
+    @property
+    def fingerprint(self):
+        """
+        A string that changes whenever the analysis of unchanged content could change: the
+        class, its options and the versions of the external tools it runs.
+        """
+        if getattr(self, '_fingerprint', None) is None:
+            self._fingerprint = fingerprint(self.__class__, getattr(self, '_options', None), self._tool_versions())
+        return self._fingerprint
+
+    def _tool_versions(self):
+        """
+        A list of strings identifying the versions of the external tools used by analyze.
+        """
+        return []
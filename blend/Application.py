@@ -22,16 +22,89 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+import multiprocessing
 import optparse
 import os
+import StringIO
 import sys
+import threading
 import traceback
 from Paths import Paths
 from Resource import Resource
+from ResourceIndex import ResourceIndex
+from MetadataIndex import MetadataIndex
+from BuildManifest import BuildManifest
+from AnalysisCache import AnalysisCache
+from MinificationCache import MinificationCache
+from Minification import Minification
+from DiskCache import DiskCache
 from Configuration import Configuration
 from JSLintAnalyzer import JSLintAnalyzer
 from YUICompressorMinifier import YUICompressorMinifier
-from blend.Requirement import RequirementNotSatisfiedException
+from DependencyGraph import DependencyGraph
+from MemoryReport import MemoryReport
+from Metrics import Metrics
+from Profiler import Profiler
+from Watcher import Watcher
+from blend.Requirement import RequirementNotSatisfiedException, CircularRequirementException
+
+
+# The application, dependency graph and bundles of the parallel build in progress.
+# Worker processes are forked after it is set, so they inherit it rather than having
+# it pickled and sent to them.
+_parallel_build = None
+
+
+def _build_in_worker(position):
+    """
+    Build one bundle of the parallel build in progress in a worker process. Returns a
+    tuple of the result of Application._build, the output it printed, the traceback of
+    any exception it raised, whether or not the bundle was rebuilt, the build manifest
+    entry recorded for the bundle, a list holding the manifest entry to record once it
+    has been minified if the merged bundle is left for the main process to minify, the
+    profiling spans recorded while building the bundle, a dictionary of the metrics
+    counted while building it and a dictionary of the merged size of the bundle by path
+    if memory is being reported.
+    Arguments:
+    position -- The position of the bundle in the list of bundles.
+    """
+    application, graph, bundles = _parallel_build
+    bundle = bundles[position]
+    output = StringIO.StringIO()
+    stdout = sys.stdout
+    sys.stdout = output
+    error = None
+    pending_minifications = []
+    # Spans are recorded in a profiler of this process and returned with the output
+    if Profiler.active is not None:
+        Profiler.active = Profiler(Profiler.active.start_time)
+    # Likewise for the metrics, including the use of the caches of this process
+    Metrics.active = Metrics()
+    # Memory is sampled by the main process, and only the sizes of the bundles merged here
+    # are recorded and returned
+    if MemoryReport.active is not None:
+        MemoryReport.active = MemoryReport()
+    cache_counters = application._cache_counters()
+    # The main process moves the files into place once every earlier bundle has succeeded
+    application._stage_outputs = True
+    try:
+        try:
+            result = application._build(bundle, graph, pending_minifications)
+        except Exception:
+            result = -1
+            error = traceback.format_exc()
+    finally:
+        sys.stdout = stdout
+    rebuilt = bundle in application.rebuilt_bundles
+    manifest_entry = None
+    if application.manifest is not None:
+        manifest_entry = application.manifest.entry(bundle.path_to_file)
+    pending_manifest_entries = [pending[3] for pending in pending_minifications]
+    events = Profiler.active.events if Profiler.active is not None else []
+    Metrics.active.add_differences(cache_counters, application._cache_counters())
+    bundle_sizes = MemoryReport.active.bundle_sizes if MemoryReport.active is not None else {}
+    return (result, output.getvalue(), error, rebuilt, manifest_entry, pending_manifest_entries, events,
+        Metrics.active.as_dict(), bundle_sizes)
 
 
 class Application():
@@ -40,18 +113,80 @@ class Application():
     DEFAULT_INCLUDE_CWD = True
     DEFAULT_FILE_LIST = []
     DEFAULT_CONFIG_FILE_PATH = os.path.join(os.getcwd(), '.blend', 'config.json')
+    DEFAULT_METADATA_INDEX_PATH = os.path.join(os.getcwd(), '.blend', 'metadata.json')
+    DEFAULT_IGNORE_FILE_PATH = os.path.join(os.getcwd(), '.blend', 'ignore')
+    DEFAULT_MANIFEST_PATH = os.path.join(os.getcwd(), '.blend', 'manifest.json')
+    DEFAULT_ANALYSIS_CACHE_PATH = os.path.join(os.getcwd(), '.blend', 'cache', 'analysis')
+    DEFAULT_MINIFICATION_CACHE_PATH = os.path.join(os.getcwd(), '.blend', 'cache', 'minification')
+    DEFAULT_MINIFICATION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    # The number of the slowest resources and tool runs printed after a profiled run
+    PROFILE_SUMMARY_COUNT = 10
+    # Appended to the paths of the files written by the workers of a parallel build
+    STAGED_OUTPUT_SUFFIX = '.partial'
 
     def __init__(self, path_list=DEFAULT_PATH_LIST, include_cwd=DEFAULT_INCLUDE_CWD,
-                 file_list=DEFAULT_FILE_LIST, output_dir=DEFAULT_OUTPUT_DIR, config_file_path=DEFAULT_CONFIG_FILE_PATH):
-        self.paths = Paths(*path_list, include_cwd=include_cwd)
+                 file_list=DEFAULT_FILE_LIST, output_dir=DEFAULT_OUTPUT_DIR, config_file_path=DEFAULT_CONFIG_FILE_PATH,
+                 metadata_index_path=DEFAULT_METADATA_INDEX_PATH, mmap_threshold=None,
+                 ignore_file_path=DEFAULT_IGNORE_FILE_PATH, cache_max_bytes=None, manifest_path=None, jobs=1,
+                 analysis_cache_path=DEFAULT_ANALYSIS_CACHE_PATH,
+                 minification_cache_path=DEFAULT_MINIFICATION_CACHE_PATH,
+                 minification_cache_max_bytes=DEFAULT_MINIFICATION_CACHE_MAX_BYTES, write_unminified=True,
+                 minify_chunks=False, requirement_scan=Resource.FULL_SCAN, profile_path=None, metrics_path=None,
+                 metrics_format=Metrics.JSON, memory_report=False):
+        self.paths = Paths(*path_list, include_cwd=include_cwd, output_path=output_dir)
         self.include_cwd = include_cwd
         self.file_list = file_list
         self.output_dir = output_dir
+        self._check_output_dir()
+        if metadata_index_path:
+            self.metadata_index = MetadataIndex(metadata_index_path)
+        else:
+            self.metadata_index = None
+        # Bundles are only skipped when they are up to date according to a build manifest
+        if manifest_path:
+            self.manifest = BuildManifest(manifest_path)
+        else:
+            self.manifest = None
+        self.rebuilt_bundles = []
+        self.unchanged_bundles = []
+        self.jobs = jobs
+        # Without the unminified output, bundles are minified from memory as they are merged
+        self.write_unminified = write_unminified
+        # Minify the pieces of each bundle separately so that they can be reused
+        self.minify_chunks = minify_chunks
+        # Each run is profiled if a path for the Chrome trace is specified
+        self.profile_path = profile_path
+        # The metrics of the last run, which are also written to a file if a path is specified
+        self.metrics = Metrics()
+        self.metrics_path = metrics_path
+        self.metrics_format = metrics_format
+        # The memory used by each run is reported if requested, and the last report is kept
+        self.report_memory = memory_report
+        self.memory_report = None
+        # Whether output files are written next to their final paths, for a worker process
+        self._stage_outputs = False
+        # Analyses are always reused within a run, and between runs if they are stored
+        if analysis_cache_path:
+            self.analysis_cache = AnalysisCache(DiskCache(analysis_cache_path))
+        else:
+            self.analysis_cache = AnalysisCache()
+        # Minified content is only reused between runs, since a bundle is minified once per run
+        if minification_cache_path:
+            self.minification_cache = MinificationCache(
+                DiskCache(minification_cache_path, minification_cache_max_bytes))
+        else:
+            self.minification_cache = MinificationCache()
+        # Memory mapping is a property of how every Resource loads its content
+        Resource.mmap_threshold = mmap_threshold
+        Resource.cache.max_bytes = cache_max_bytes
+        Resource.requirement_scan = requirement_scan
         if os.path.exists(config_file_path):
             print config_file_path
             self.config = Configuration(config_file_path)
         else:
             self.config = self._create_default_configuration()
+        if ignore_file_path and os.path.exists(ignore_file_path):
+            self.config.load_ignore_file(ignore_file_path)
 
     def _create_default_configuration(self):
         config = Configuration()
@@ -66,69 +201,591 @@ class Application():
         return config
 
     def run(self):
+        if self.profile_path:
+            Profiler.active = Profiler()
+        self.metrics = Metrics.active = Metrics()
+        cache_counters = self._cache_counters()
+        if self.report_memory:
+            self.memory_report = MemoryReport.active = MemoryReport()
+            self.memory_report.start()
         try:
             if not os.path.exists(self.output_dir):
                 os.makedirs(self.output_dir)
+            self.rebuilt_bundles = []
+            self.unchanged_bundles = []
+
+            # The index is built with a single walk of the search paths and shared by
+            # every resource processed during this run.
+            index = None
+            with Profiler.span('discovery', Profiler.PHASE), MemoryReport.phase('discovery'):
+                if len(self.file_list) == 0:
+                    index = self._create_index()
+                    resources = index.resources
+                else:
+                    resources = []
+                    for file_path in self.file_list:
+                        resources.append(Resource(file_path))
 
-            if len(self.file_list) == 0:
-                resources = Resource.find_all_in_paths(self.paths)
+            with Profiler.span('requirements', Profiler.PHASE), MemoryReport.phase('requirements'):
+                resources_with_requirements = [resource for resource in resources
+                    if resource.requirements is not None]
+            if len(resources_with_requirements) == 0:
+                return 0
+
+            with Profiler.span('resolution', Profiler.PHASE), MemoryReport.phase('resolution'):
+                graph = self._create_graph(index or self._create_index(), resources_with_requirements)
+            if graph is None:
+                return -1
+
+            if self._can_build_in_parallel(resources_with_requirements):
+                if self._build_in_parallel(resources_with_requirements, graph) != 0:
+                    return -1
             else:
-                resources = []
-                for file_path in self.file_list:
-                    resources.append(Resource(file_path))
-            if resources is not None:
-                for resource in resources:
-                    if resource.requirements is not None:
-                        directory, file_name = os.path.split(resource.path_to_file)
-
-                        try:
-                            chunks = resource.get_chunks_by_merging_requirements_from_paths(self.paths, previously_merged=[])
-                        except RequirementNotSatisfiedException, rnse:
-                            print "A requirement could not be satisfied for %s\n\n%s\n" % (resource.path_to_file, rnse)
+                # Minification is deferred so that each minifier runs once for all of
+                # the bundles. After a failure the bundles merged before it are still
+                # minified, as they would have been when each bundle was minified as
+                # soon as it was merged.
+                pending_minifications = []
+                with Profiler.span('build', Profiler.PHASE), MemoryReport.phase('build'):
+                    for resource in resources_with_requirements:
+                        if self._build(resource, graph, pending_minifications) != 0:
+                            self._minify(pending_minifications)
                             return -1
+                if self._minify(pending_minifications) != 0:
+                    return -1
 
-                        for chunk in chunks:
-                            analyzers = self.config.get_analyzers_for_resource(chunk.resource)
-                            if analyzers:
-                                for analyzer in analyzers:
-                                    print 'Analysis:%s:%s' % (analyzer.__class__, chunk.resource.path_to_file)
-                                    analysis = analyzer.analyze(chunk.resource)
-                                    print analysis
-                                    if not analysis.good:
-                                        return -1
-
-                        merged_content = ''.join([chunk.content for chunk in chunks])
-
-                        output_file_name = os.path.join(self.output_dir, file_name)
-                        f = open(output_file_name, 'w')
-                        try:
-                            f.write(merged_content)
-                        finally:
-                            f.flush()
-                            f.close()
-
-                        print "Created %s" % output_file_name
-
-                        # TODO: Process chunks to prevent reminification
-                        output_resource = Resource(output_file_name)
-                        minifier = self.config.get_minifier_for_file_type(output_resource.file_type)
-                        if minifier and not output_resource.minified:
-                            minification = minifier.minify(output_resource)
-                            if not minification.good:
-                                print minification
-                                return -1
-                            minified_output_file_path = os.path.join(self.output_dir, output_resource.minified_file_name)
-                            f = open(minified_output_file_path, 'w')
-                            try:
-                                f.write(minification.content)
-                            finally:
-                                f.flush()
-                                f.close()
+            if self.manifest is not None:
+                print "Rebuilt %d of %d bundles" % (len(self.rebuilt_bundles),
+                    len(self.rebuilt_bundles) + len(self.unchanged_bundles))
 
         except Exception:
             traceback.print_exc(file=sys.stderr)
             return -1
+        finally:
+            self._save_metadata_index()
+            self._save_manifest()
+            self._save_profile()
+            self._save_metrics(cache_counters)
+            self._save_memory_report()
+
+        return 0
+
+    def _check_output_dir(self):
+        """
+        Warn if the output directory is a search path or contains one. The output
+        directory is only skipped when it is inside a search path, so such search paths
+        are still searched and previous outputs in them may be found as resources.
+        """
+        output_path = os.path.normcase(os.path.abspath(self.output_dir))
+        for search_path in self.paths.search_paths:
+            absolute_search_path = os.path.normcase(os.path.abspath(search_path))
+            if absolute_search_path == output_path or absolute_search_path.startswith(output_path + os.sep):
+                print "Warning: the output directory %s contains the search path %s, so outputs written " \
+                    "there may be found as resources" % (self.output_dir, search_path)
+
+    def _cache_counters(self):
+        """
+        The current values of the counters kept by the caches used by a run, by the names
+        of the corresponding metrics.
+        """
+        counters = {
+            'resource_cache_hits': Resource.cache.hits,
+            'resource_cache_misses': Resource.cache.misses,
+            'analysis_cache_hits': self.analysis_cache.hits,
+            'analysis_cache_misses': self.analysis_cache.misses,
+            'minification_cache_hits': self.minification_cache.hits,
+            'minification_cache_misses': self.minification_cache.misses
+        }
+        if self.metadata_index is not None:
+            counters['metadata_index_hits'] = self.metadata_index.hits
+            counters['metadata_index_misses'] = self.metadata_index.misses
+        return counters
+
+    def _save_metrics(self, cache_counters):
+        """
+        Finish counting the metrics of the run and write them, if a path was specified.
+        Arguments:
+        cache_counters -- The values returned by _cache_counters at the start of the run.
+        """
+        Metrics.active = None
+        self.metrics.add_differences(cache_counters, self._cache_counters())
+        if self.metrics_path:
+            try:
+                self.metrics.write(self.metrics_path, self.metrics_format)
+            except (IOError, OSError), e:
+                print "The metrics could not be saved to %s: %s" % (self.metrics_path, e)
+
+    def _save_memory_report(self):
+        """
+        Stop measuring the memory used by the run, if it was being measured, and print
+        the peak usage of each phase, the largest bundles and what Resource.cache holds.
+        """
+        report = MemoryReport.active
+        if report is None:
+            return
+        MemoryReport.active = None
+        report.stop(Resource.cache)
+        print report.summary()
+
+    def _save_metadata_index(self):
+        """
+        Save the metadata index, if one is being used, so that unchanged files do not
+        need to be read by the next run.
+        """
+        if self.metadata_index is not None:
+            try:
+                self.metadata_index.save()
+            except (IOError, OSError), e:
+                print "The metadata index could not be saved to %s: %s" % (self.metadata_index.index_file_path, e)
 
+    def _save_profile(self):
+        """
+        Write the spans recorded during the run, if it was profiled, as a Chrome trace and
+        print a summary of the slowest phases, resources and tools.
+        """
+        profiler = Profiler.active
+        if profiler is None or not self.profile_path:
+            return
+        Profiler.active = None
+        print profiler.summary(Application.PROFILE_SUMMARY_COUNT)
+        try:
+            profiler.write(self.profile_path)
+            print "Wrote the profile to %s" % self.profile_path
+        except (IOError, OSError), e:
+            print "The profile could not be saved to %s: %s" % (self.profile_path, e)
+
+    def _save_manifest(self):
+        """
+        Save the build manifest, if one is being used, so that the next run can skip the
+        bundles built by this run.
+        """
+        if self.manifest is not None:
+            try:
+                self.manifest.save()
+            except (IOError, OSError), e:
+                print "The build manifest could not be saved to %s: %s" % (self.manifest.manifest_file_path, e)
+
+    def _create_index(self):
+        """
+        Walk the search paths, skipping the output directory and anything matching the
+        configured ignore patterns, and return a ResourceIndex of the resources found.
+        """
+        index = ResourceIndex(self.paths, self.metadata_index, ignore_patterns=self.config.ignore_patterns)
+        Metrics.increment('files_walked', len(index.resources))
+        return index
+
+    def _create_graph(self, index, resources):
+        """
+        Resolve the requirements of all the specified resources into a single
+        DependencyGraph. Returns None if a requirement cannot be satisfied or the
+        requirements are circular.
+        Arguments:
+        index -- The ResourceIndex used to locate required resources.
+        resources -- The resources that will be built.
+        """
+        graph = DependencyGraph(index)
+        for resource in resources:
+            try:
+                graph.add(resource)
+            except RequirementNotSatisfiedException, rnse:
+                print "A requirement could not be satisfied for %s\n\n%s\n" % (resource.path_to_file, rnse)
+                return None
+        try:
+            graph.check_for_cycles()
+        except CircularRequirementException, cre:
+            print "A circular requirement was found\n\n%s\n" % cre
+            return None
+        return graph
+
+    def _can_build_in_parallel(self, bundles):
+        """
+        Whether or not the bundles should be built by a pool of worker processes. The
+        workers rely on inheriting the state of the application, so they are only used
+        on platforms that fork processes.
+        """
+        return self.jobs > 1 and len(bundles) > 1 and hasattr(os, 'fork')
+
+    def _build_in_parallel(self, bundles, graph):
+        """
+        Build the bundles in a pool of worker processes. The output of each bundle is
+        printed in the same order, and the result is the same, as when the bundles are
+        built one after another. Returns 0 on success and -1 on failure.
+        Arguments:
+        bundles -- The resources to be built.
+        graph -- A DependencyGraph containing the resources.
+        Remarks:
+        The bundles with the most content are handed out first so that a large bundle
+        is not left building on its own at the end. After the first failure, in bundle
+        order, no more output is printed and the remaining workers are stopped. The
+        workers only analyze and merge, and the merged bundles are minified together
+        by this process, as in a serial build. The workers write staged files that are
+        moved into place in bundle order, and the staged files of the bundles after the
+        first failure are removed, so the output directory is left as a serial build
+        would leave it.
+        """
+        global _parallel_build
+        sizes = [sum(resource.size for resource in graph.topological_order([bundle])) for bundle in bundles]
+        positions_by_size = sorted(range(len(bundles)), key=lambda position: -sizes[position])
+
+        _parallel_build = (self, graph, bundles)
+        # Output buffered before the fork would otherwise be written again by the workers
+        sys.stdout.flush()
+        pool = multiprocessing.Pool(min(self.jobs, len(bundles)))
+        pending_minifications = []
+        committed_count = 0
+        with Profiler.span('build', Profiler.PHASE), MemoryReport.phase('build'):
+            try:
+                results = {}
+                for position in positions_by_size:
+                    results[position] = pool.apply_async(_build_in_worker, (position,))
+                pool.close()
+
+                for position, bundle in enumerate(bundles):
+                    result, output, error, rebuilt, manifest_entry, pending_manifest_entries, events, metrics, \
+                        bundle_sizes = results[position].get()
+                    self._commit_staged_outputs(bundle)
+                    committed_count += 1
+                    if Profiler.active is not None:
+                        Profiler.active.add_events(events)
+                    self.metrics.merge(metrics)
+                    for bundle_path, size in bundle_sizes.iteritems():
+                        MemoryReport.bundle_merged(bundle_path, size)
+                    sys.stdout.write(output)
+                    if error is not None:
+                        sys.stderr.write(error)
+                    if rebuilt:
+                        self.rebuilt_bundles.append(bundle)
+                        if self.manifest is not None:
+                            if manifest_entry is None:
+                                self.manifest.remove(bundle.path_to_file)
+                            else:
+                                self.manifest.record(bundle.path_to_file, manifest_entry)
+                    else:
+                        self.unchanged_bundles.append(bundle)
+                    for pending_manifest_entry in pending_manifest_entries:
+                        output_resource = Resource(os.path.join(self.output_dir, os.path.basename(bundle.path_to_file)))
+                        minifier = self.config.get_minifier_for_file_type(output_resource.file_type)
+                        pending_minifications.append((bundle, output_resource, minifier, pending_manifest_entry))
+                    if result != 0:
+                        break
+            finally:
+                pool.terminate()
+                pool.join()
+                _parallel_build = None
+                for bundle in bundles[committed_count:]:
+                    self._discard_staged_outputs(bundle)
+
+        if self._minify(pending_minifications) != 0 or result != 0:
+            return -1
+        return 0
+
+    def _output_file_paths(self, bundle):
+        """
+        Get a list of the paths of the files that may be written for a bundle.
+        """
+        output_file_name = os.path.join(self.output_dir, os.path.basename(bundle.path_to_file))
+        return [output_file_name, os.path.join(self.output_dir, Resource(output_file_name).minified_file_name)]
+
+    def _open_output_file(self, path_to_file):
+        """
+        Open an output file for writing, or its staged file in a worker process.
+        """
+        if self._stage_outputs:
+            path_to_file += Application.STAGED_OUTPUT_SUFFIX
+        return open(path_to_file, 'w')
+
+    def _commit_staged_outputs(self, bundle):
+        """
+        Move the staged files written for a bundle by a worker process into place.
+        """
+        for path_to_file in self._output_file_paths(bundle):
+            staged_path = path_to_file + Application.STAGED_OUTPUT_SUFFIX
+            if os.path.exists(staged_path):
+                os.rename(staged_path, path_to_file)
+
+    def _discard_staged_outputs(self, bundle):
+        """
+        Remove the staged files written for a bundle by a worker process.
+        """
+        for path_to_file in self._output_file_paths(bundle):
+            staged_path = path_to_file + Application.STAGED_OUTPUT_SUFFIX
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+    def _create_manifest_entry(self, inputs, minifier, outputs):
+        """
+        Describe the build of a bundle for the build manifest.
+        Arguments:
+        inputs -- The resources merged into the bundle, in the order given by
+        DependencyGraph.topological_order.
+        minifier -- The Minifier applied to the bundle, or None.
+        outputs -- A list of the paths of the files written for the bundle.
+        Remarks:
+        The entry is made from the requirements and content hashes of the inputs, which
+        are restored from the metadata index for unchanged files, so no file is read.
+        """
+        analyzers = dict((input_resource, self.config.get_analyzers_for_resource(input_resource))
+            for input_resource in inputs)
+        return BuildManifest.create_entry(inputs, analyzers, minifier, outputs, self.minify_chunks)
+
+    def _build(self, resource, graph, pending_minifications=None):
+        """
+        Analyze, merge and minify a single resource that has requirements. Returns 0
+        on success and -1 on failure.
+        Arguments:
+        resource -- The Resource to be built.
+        graph -- A DependencyGraph containing the resource.
+        pending_minifications -- If specified, a list to which the minification of the
+        merged resource is appended rather than being done immediately. The caller must
+        pass the list to _minify.
+        """
+        with Profiler.span(resource.path_to_file, Profiler.BUNDLE):
+            return self._build_bundle(resource, graph, pending_minifications)
+
+    def _build_bundle(self, resource, graph, pending_minifications):
+        """
+        Build a single resource as described by _build.
+        """
+        directory, file_name = os.path.split(resource.path_to_file)
+        output_file_name = os.path.join(self.output_dir, file_name)
+        output_resource = Resource(output_file_name)
+        minifier = self.config.get_minifier_for_file_type(output_resource.file_type)
+        if output_resource.minified:
+            minifier = None
+        write_unminified = self.write_unminified or minifier is None
+        minified_output_file_name = os.path.join(self.output_dir, output_resource.minified_file_name)
+
+        if self.manifest is not None:
+            outputs = []
+            if write_unminified:
+                outputs.append(output_file_name)
+            if minifier:
+                outputs.append(minified_output_file_name)
+            # Checked before chunking so that an unchanged bundle is skipped without reading its files
+            manifest_entry = self._create_manifest_entry(graph.topological_order([resource]), minifier, outputs)
+            reasons = self.manifest.reasons_to_rebuild(resource.path_to_file, manifest_entry)
+            if len(reasons) == 0:
+                print "Unchanged %s" % output_file_name
+                self.unchanged_bundles.append(resource)
+                return 0
+            print "Rebuilding %s because %s" % (output_file_name, '; '.join(reasons))
+            # A failed build must not leave the previous entry behind
+            self.manifest.remove(resource.path_to_file)
+        self.rebuilt_bundles.append(resource)
+
+        chunks = resource.get_chunks_by_merging_requirements_from_paths(self.paths,
+            previously_merged=[], graph=graph)
+        MemoryReport.bundle_merged(resource.path_to_file, sum(len(chunk.view) for chunk in chunks))
+
+        # A resource split into several chunks around its requirements is analyzed once
+        analyzed_resources = set()
+        analyzers_by_resource = []
+        for chunk in chunks:
+            if chunk.resource in analyzed_resources:
+                continue
+            analyzed_resources.add(chunk.resource)
+            analyzers_by_resource.append((chunk.resource, self.config.get_analyzers_for_resource(chunk.resource) or []))
+        analyses = self._analyze(analyzers_by_resource)
+        for analyzed_resource, analyzers in analyzers_by_resource:
+            for analyzer in analyzers:
+                print 'Analysis:%s:%s' % (analyzer.__class__, analyzed_resource.path_to_file)
+                analysis = analyses[(analyzer, analyzed_resource)]
+                print analysis
+                if not analysis.good:
+                    return -1
+
+        if write_unminified:
+            with Profiler.span(output_file_name, Profiler.WRITE):
+                f = self._open_output_file(output_file_name)
+                size = 0
+                try:
+                    # Writing a view of each chunk avoids copying the content of the required
+                    # resources into a single merged string.
+                    for chunk in chunks:
+                        view = chunk.view
+                        f.write(view)
+                        size += len(view)
+                finally:
+                    f.flush()
+                    f.close()
+                Metrics.output_written(resource.path_to_file, output_file_name, size)
+
+            print "Created %s" % output_file_name
+
+        if self.manifest is None:
+            manifest_entry = None
+        if minifier:
+            pending = (resource, output_resource, minifier, manifest_entry)
+            if self.minify_chunks:
+                with Profiler.span(minified_output_file_name, Profiler.RESOURCE, minifier=minifier.__class__.__name__):
+                    minification = self._minify_chunks(chunks, minifier)
+                if self._write_minification(pending, minification) != 0:
+                    return -1
+                if not write_unminified:
+                    print "Created %s" % minified_output_file_name
+                return 0
+            if not write_unminified:
+                # The merged content goes straight to the minifier instead of being
+                # written to the output file and read back.
+                content = ''.join(chunk.content for chunk in chunks)
+                with Profiler.span(minified_output_file_name, Profiler.RESOURCE, minifier=minifier.__class__.__name__):
+                    minification = self.minification_cache.minify_content(minifier, content,
+                        output_resource.file_type)
+                if self._write_minification(pending, minification) != 0:
+                    return -1
+                print "Created %s" % minified_output_file_name
+                return 0
+            if pending_minifications is not None:
+                pending_minifications.append(pending)
+                return 0
+            return self._minify([pending])
+
+        if self.manifest is not None:
+            self.manifest.record(resource.path_to_file, manifest_entry)
+        return 0
+
+    def _analyze(self, analyzers_by_resource):
+        """
+        Analyze the resources of a bundle, giving each analyzer all of its resources at
+        once so that an analyzer running several processes can keep them busy. Returns a
+        dictionary of the Analysis of each resource by each analyzer, keyed by a tuple of
+        the Analyzer and the Resource.
+        Arguments:
+        analyzers_by_resource -- A list of tuples of a Resource and the list of Analyzers
+        that are run on it.
+        """
+        analyzers = []
+        for resource, resource_analyzers in analyzers_by_resource:
+            for analyzer in resource_analyzers:
+                if analyzer not in analyzers:
+                    analyzers.append(analyzer)
+        analyses = {}
+        for analyzer in analyzers:
+            resources = [resource for resource, resource_analyzers in analyzers_by_resource
+                if analyzer in resource_analyzers]
+            with Profiler.span('analyze %d files' % len(resources), Profiler.RESOURCE,
+                    analyzer=analyzer.__class__.__name__, files=[resource.path_to_file for resource in resources]):
+                analyses.update(((analyzer, resource), analysis)
+                    for resource, analysis in zip(resources, self.analysis_cache.analyze_batch(analyzer, resources)))
+        return analyses
+
+    def _minify_chunks(self, chunks, minifier):
+        """
+        Minify a bundle by minifying each of its chunks separately and joining the
+        results. Returns a Minification of the bundle.
+        Arguments:
+        chunks -- The chunks merged into the bundle.
+        minifier -- The Minifier applied to the bundle.
+        Remarks:
+        The chunks of resources that are already minified are used as they are. The
+        others are minified together and cached by their content, so a library included
+        in many bundles is minified once and changing one file only minifies that file
+        again.
+        """
+        pieces = []
+        for chunk in chunks:
+            content = chunk.content
+            if content is not None and content.strip():
+                pieces.append((chunk.resource, content))
+        file_type = chunks[0].resource.file_type
+        contents = [content for resource, content in pieces if not resource.minified]
+        minifications = iter(self.minification_cache.minify_content_batch(minifier, contents, file_type))
+
+        bundle_minification = Minification()
+        parts = []
+        for resource, content in pieces:
+            if resource.minified:
+                parts.append(content.rstrip())
+                continue
+            minification = minifications.next()
+            if not minification.good:
+                bundle_minification.mark_as_bad()
+                bundle_minification.add_error('%s could not be minified' % resource.path_to_file)
+                bundle_minification.add_messages(minification.messages)
+                for warning in minification.warnings or []:
+                    bundle_minification.add_warning(warning)
+                for error in minification.errors or []:
+                    bundle_minification.add_error(error)
+                return bundle_minification
+            parts.append(minification.content.rstrip())
+        # Each piece starts on a new line so that the end of one cannot change the meaning
+        # of the start of the next
+        bundle_minification.set_content('\n'.join(parts))
+        bundle_minification.mark_as_good()
+        return bundle_minification
+
+    def _minify(self, pending_minifications):
+        """
+        Minify merged resources, write the minified files and record the bundles in the
+        build manifest. Each minifier is given all of its resources at once, or split
+        between as many threads as there are jobs. Returns 0 if every minification
+        succeeded and -1 otherwise. The list is emptied.
+        Arguments:
+        pending_minifications -- A list of tuples of the bundle, the merged Resource, the
+        Minifier and the build manifest entry of the bundle, in the order the bundles
+        were merged.
+        """
+        pending = list(pending_minifications)
+        del pending_minifications[:]
+        minifiers = []
+        for bundle, output_resource, minifier, manifest_entry in pending:
+            if minifier not in minifiers:
+                minifiers.append(minifier)
+        minifications = {}
+
+        def minify_batch(minifier, output_resources):
+            with Profiler.span('minify %d files' % len(output_resources), Profiler.RESOURCE,
+                    minifier=minifier.__class__.__name__,
+                    files=[output_resource.path_to_file for output_resource in output_resources]):
+                minifications.update(zip(output_resources,
+                    self.minification_cache.minify_batch(minifier, output_resources)))
+
+        threads = []
+        for minifier in minifiers:
+            output_resources = [item[1] for item in pending if item[2] is minifier]
+            batch_count = max(1, min(self.jobs, len(output_resources)))
+            for i in range(batch_count):
+                threads.append(threading.Thread(target=minify_batch,
+                    args=(minifier, output_resources[i::batch_count])))
+        with Profiler.span('minification', Profiler.PHASE), MemoryReport.phase('minification'):
+            if len(threads) == 1:
+                threads[0].run()
+            else:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        result = 0
+        for item in pending:
+            if self._write_minification(item, minifications[item[1]]) != 0:
+                result = -1
+        return result
+
+    def _write_minification(self, pending_minification, minification):
+        """
+        Write the minified file of a bundle and record the bundle in the build manifest.
+        Returns 0 on success and -1, after printing the minification, if it failed.
+        Arguments:
+        pending_minification -- A tuple of the bundle, the merged Resource, the Minifier
+        and the build manifest entry of the bundle.
+        minification -- The Minification of the merged resource.
+        """
+        bundle, output_resource, minifier, manifest_entry = pending_minification
+        if not minification.good:
+            print minification
+            return -1
+        minified_output_file_path = os.path.join(self.output_dir, output_resource.minified_file_name)
+        with Profiler.span(minified_output_file_path, Profiler.WRITE):
+            f = self._open_output_file(minified_output_file_path)
+            try:
+                f.write(minification.content)
+            finally:
+                f.flush()
+                f.close()
+            Metrics.output_written(bundle.path_to_file, minified_output_file_path, len(minification.content))
+        if self.manifest is not None:
+            self.manifest.record(bundle.path_to_file, manifest_entry)
         return 0
 
     @staticmethod
@@ -170,11 +827,128 @@ current working directory and all outputs are written to that directory.""")
             metavar='CONFIG',
             help='the JSON format config file from which to load application settings')
 
+        parser.add_option("--no-cache",
+            default=False,
+            dest='no_cache',
+            action='store_true',
+            help='do not read or write the file metadata, analysis results and minified files cached in the .blend directory')
+
+        parser.add_option("-j", "--jobs",
+            default=1,
+            dest='jobs',
+            metavar='N',
+            type='int',
+            help='build up to N files at the same time in separate processes')
+
+        parser.add_option("--watch",
+            default=False,
+            dest='watch',
+            action='store_true',
+            help='build, then keep watching the search paths and rebuild the files affected by each change')
+
+        parser.add_option("--incremental",
+            default=False,
+            dest='incremental',
+            action='store_true',
+            help='only build files whose inputs, analyzers or minifier changed since the last incremental build')
+
+        parser.add_option("--minified-only",
+            default=False,
+            dest='minified_only',
+            action='store_true',
+            help='only write the minified output of files that are minified, minifying the merged content in memory')
+
+        parser.add_option("--minify-chunks",
+            default=False,
+            dest='minify_chunks',
+            action='store_true',
+            help='minify each file merged into an output separately, reusing minified files and the minification of unchanged files')
+
+        parser.add_option("--profile",
+            default=None,
+            dest='profile_path',
+            metavar='FILE',
+            help='write how long each phase, file and tool run took to FILE as a Chrome trace, and print the slowest')
+
+        parser.add_option("--metrics",
+            default=None,
+            dest='metrics_path',
+            metavar='FILE',
+            help='write counts of the files read and written, processes started and cache hits to FILE')
+
+        parser.add_option("--memory-report",
+            default=False,
+            dest='memory_report',
+            action='store_true',
+            help='print the peak memory used by each phase, the largest bundles and the file content held in memory')
+
+        parser.add_option("--metrics-format",
+            default=Metrics.JSON,
+            dest='metrics_format',
+            metavar='FORMAT',
+            type='choice',
+            choices=Metrics.FORMATS,
+            help='the format of the --metrics file: json (the default) or prometheus')
+
+        parser.add_option("--mmap-threshold",
+            default=None,
+            dest='mmap_threshold',
+            metavar='BYTES',
+            type='int',
+            help='memory map files of at least BYTES bytes instead of reading them into memory')
+
+        parser.add_option("--requirement-scan",
+            default=Resource.FULL_SCAN,
+            dest='requirement_scan',
+            metavar='MODE',
+            type='choice',
+            choices=Resource.REQUIREMENT_SCANS,
+            help='search whole files for requirements (full), or only the comments and directives at the top of each file (header)')
+
+        parser.add_option("--cache-budget",
+            default=None,
+            dest='cache_max_bytes',
+            metavar='BYTES',
+            type='int',
+            help='limit the file content held in memory to about BYTES bytes, rereading files as needed')
+
+        parser.add_option("--minification-cache-size",
+            default=Application.DEFAULT_MINIFICATION_CACHE_MAX_BYTES,
+            dest='minification_cache_max_bytes',
+            metavar='BYTES',
+            type='int',
+            help='keep at most about BYTES bytes of minified files in .blend/cache/minification')
+
         options, arguments = parser.parse_args()
+        if options.jobs < 1:
+            parser.error('--jobs must be at least 1')
 
         file_list = arguments or []
 
-        app = Application(options.path, not options.skip_cwd, file_list, options.output_dir, options.config_file_path)
+        if options.no_cache:
+            metadata_index_path = None
+            analysis_cache_path = None
+            minification_cache_path = None
+        else:
+            metadata_index_path = Application.DEFAULT_METADATA_INDEX_PATH
+            analysis_cache_path = Application.DEFAULT_ANALYSIS_CACHE_PATH
+            minification_cache_path = Application.DEFAULT_MINIFICATION_CACHE_PATH
+
+        if options.incremental:
+            manifest_path = Application.DEFAULT_MANIFEST_PATH
+        else:
+            manifest_path = None
+
+        app = Application(options.path, not options.skip_cwd, file_list, options.output_dir, options.config_file_path,
+            metadata_index_path, options.mmap_threshold, cache_max_bytes=options.cache_max_bytes, manifest_path=manifest_path, jobs=options.jobs,
+            analysis_cache_path=analysis_cache_path, minification_cache_path=minification_cache_path,
+            minification_cache_max_bytes=options.minification_cache_max_bytes,
+            write_unminified=not options.minified_only, minify_chunks=options.minify_chunks,
+            requirement_scan=options.requirement_scan, profile_path=options.profile_path,
+            metrics_path=options.metrics_path, metrics_format=options.metrics_format,
+            memory_report=options.memory_report)
+        if options.watch:
+            sys.exit(Watcher(app).run())
         sys.exit(app.run())
 
 if __name__ == '__main__':
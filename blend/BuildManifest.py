@@ -0,0 +1,179 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import json
+
+from helpers import write_json_file_atomically
+
+
+class BuildManifest:
+    """
+    A persistent record of the inputs and configuration from which each bundle was last
+    built. A bundle whose inputs, analyzers and minifier are unchanged and whose outputs
+    still exist would be built identically, so it does not need to be built again.
+    """
+
+    # Incremented whenever the format of the stored entries changes so that manifests
+    # written by older versions are ignored.
+    VERSION = 2
+
+    def __init__(self, manifest_file_path):
+        """
+        Arguments:
+        manifest_file_path -- The path of the JSON file in which the manifest is stored.
+        The file does not need to exist.
+        """
+        self._manifest_file_path = manifest_file_path
+        self._entries = {}
+        self._dirty = False
+        self._read()
+
+    def _read(self):
+        """
+        Load the entries from the manifest file. A missing, unreadable or outdated file
+        results in an empty manifest.
+        """
+        if not os.path.exists(self._manifest_file_path):
+            return
+        try:
+            f = open(self._manifest_file_path, 'r')
+            try:
+                manifest_dict = json.load(f)
+            finally:
+                f.close()
+        except (IOError, ValueError):
+            return
+        if isinstance(manifest_dict, dict) and manifest_dict.get('version') == BuildManifest.VERSION:
+            self._entries = manifest_dict.get('entries', {})
+
+    @property
+    def manifest_file_path(self):
+        """
+        The path of the JSON file in which the manifest is stored.
+        """
+        return self._manifest_file_path
+
+    @staticmethod
+    def create_entry(inputs, analyzers, minifier, outputs, minify_chunks=False):
+        """
+        Return a manifest entry describing a build of a bundle.
+        Arguments:
+        inputs -- The resources merged into the bundle, in order.
+        analyzers -- A dictionary of the analyzers run on each input, keyed by the input.
+        minifier -- The Minifier applied to the bundle, or None.
+        outputs -- A list of the paths of the files written for the bundle.
+        minify_chunks -- Whether or not the minifier is applied to each chunk of the bundle
+        separately, which produces different minified output.
+        """
+        minifier_fingerprint = None
+        if minifier is not None:
+            minifier_fingerprint = minifier.fingerprint
+            if minify_chunks:
+                minifier_fingerprint += ' chunks'
+        return {
+            'inputs': [[os.path.abspath(resource.path_to_file), resource.content_hash] for resource in inputs],
+            'analyzers': dict((os.path.abspath(resource.path_to_file),
+                [analyzer.fingerprint for analyzer in resource_analyzers])
+                for resource, resource_analyzers in analyzers.iteritems() if resource_analyzers),
+            'minifier': minifier_fingerprint,
+            'outputs': [os.path.abspath(output) for output in outputs]
+        }
+
+    def reasons_to_rebuild(self, bundle_path, entry):
+        """
+        Get a list of the reasons why a bundle must be built again. The list is empty if
+        the bundle is up to date.
+        Arguments:
+        bundle_path -- The path of the resource from which the bundle is built.
+        entry -- A dictionary returned by create_entry describing the build that would be done.
+        """
+        previous = self._entries.get(os.path.abspath(bundle_path))
+        if previous is None:
+            return ['it has not been built before']
+
+        reasons = []
+        for output in entry['outputs']:
+            if not os.path.exists(output):
+                reasons.append('%s is missing' % output)
+
+        previous_hashes = dict(previous['inputs'])
+        current_hashes = dict(entry['inputs'])
+        for path, content_hash in entry['inputs']:
+            if path not in previous_hashes:
+                reasons.append('%s is a new input' % path)
+            elif previous_hashes[path] != content_hash:
+                reasons.append('%s changed' % path)
+        for path, content_hash in previous['inputs']:
+            if path not in current_hashes:
+                reasons.append('%s is no longer an input' % path)
+        if len(reasons) == 0 and [path for path, content_hash in previous['inputs']] != \
+                [path for path, content_hash in entry['inputs']]:
+            reasons.append('the order of the inputs changed')
+
+        for path in sorted(set(previous['analyzers']) | set(entry['analyzers'])):
+            if previous['analyzers'].get(path) != entry['analyzers'].get(path):
+                reasons.append('the analyzers of %s changed' % path)
+        if previous['minifier'] != entry['minifier']:
+            reasons.append('the minifier changed')
+        return reasons
+
+    def entry(self, bundle_path):
+        """
+        Get the recorded entry for a bundle, or None if it has not been built.
+        Arguments:
+        bundle_path -- The path of the resource from which the bundle is built.
+        """
+        return self._entries.get(os.path.abspath(bundle_path))
+
+    def record(self, bundle_path, entry):
+        """
+        Record that a bundle was built successfully as described by entry.
+        Arguments:
+        bundle_path -- The path of the resource from which the bundle is built.
+        entry -- A dictionary returned by create_entry.
+        """
+        self._entries[os.path.abspath(bundle_path)] = entry
+        self._dirty = True
+
+    def remove(self, bundle_path):
+        """
+        Forget any previous build of a bundle so that it is built by the next run.
+        Arguments:
+        bundle_path -- The path of the resource from which the bundle is built.
+        """
+        key = os.path.abspath(bundle_path)
+        if key in self._entries:
+            del self._entries[key]
+            self._dirty = True
+
+    def save(self):
+        """
+        Write the manifest file if any entries have been recorded or removed.
+        """
+        if not self._dirty:
+            return
+        write_json_file_atomically(self._manifest_file_path,
+            {'version': BuildManifest.VERSION, 'entries': self._entries})
+        self._dirty = False
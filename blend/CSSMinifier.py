@@ -0,0 +1,275 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+
+from Minifier import Minifier
+from Minification import Minification
+
+
+# Placeholders for the parts of a stylesheet that must not be changed while it is minified
+COMMENT_PLACEHOLDER = '___YUICSSMIN_PRESERVE_CANDIDATE_COMMENT_%d___'
+TOKEN_PLACEHOLDER = '___YUICSSMIN_PRESERVED_TOKEN_%d___'
+PSEUDO_CLASS_COLON_PLACEHOLDER = '___YUICSSMIN_PSEUDOCLASSCOLON___'
+
+STRING_RE = re.compile(r'("([^\\"]|\\.|\\)*")|(\'([^\\\']|\\.|\\)*\')')
+ALPHA_OPACITY_RE = re.compile(r'progid:DXImageTransform.Microsoft.Alpha\(Opacity=', re.IGNORECASE)
+SELECTOR_WITH_COLON_RE = re.compile(r'(^|\})(([^\{:])+:)+([^\{]*\{)')
+SPACE_BEFORE_RE = re.compile(r'\s+([!{};:>+\(\)\],])')
+SPACE_AFTER_RE = re.compile(r'([!{}:;>+\(\[,])\s+')
+ZERO_UNITS_RE = re.compile(r'([\s:])(0)(px|em|%|in|cm|mm|pc|pt|ex)')
+ZERO_POSITION_RE = re.compile(r'(background-position|transform-origin|webkit-transform-origin|moz-transform-origin|'
+    r'o-transform-origin|ms-transform-origin):0(;|})', re.IGNORECASE)
+RGB_RE = re.compile(r'rgb\s*\(\s*([0-9,\s]+)\s*\)')
+HEX_COLOR_RE = re.compile(r'([^"\'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])')
+NONE_RE = re.compile(r'(border|border-top|border-right|border-bottom|border-right|outline|background):none(;|})',
+    re.IGNORECASE)
+EMPTY_RULE_RE = re.compile(r'[^\}\{/;]+\{\}')
+
+
+class CSSMinifier(Minifier):
+    """
+    Minifies stylesheets in the Python process, without starting a JVM. The rules are
+    those of the YUI Compressor: comments and whitespace are removed, units are dropped
+    from zeros and colors are shortened. Adjacent rules that share a selector or a set of
+    declarations are also merged.
+    """
+
+    def __init__(self, options=None):
+        """
+        Arguments:
+        options -- An optional dictionary of options. If merge_rules is False, adjacent
+        rules are not merged and the output matches the YUI Compressor.
+        """
+        self._options = options or {}
+
+    def minify(self, resource):
+        minification = Minifier.minify(self, resource)
+        if resource.minified:
+            minification.set_content(resource.content)
+            minification.mark_as_good()
+            minification.add_message('The resource %s is already minified.' % resource.path_to_file)
+            return minification
+        return self.minify_content(resource.content or '', resource.file_type)
+
+    def minify_content(self, content, file_type):
+        minification = Minification()
+        if file_type != 'css':
+            minification.mark_as_bad()
+            minification.add_error('The CSSMinifier cannot minify content of type %r.' % file_type)
+            return minification
+        minification.set_content(self.compress(content))
+        minification.mark_as_good()
+        return minification
+
+    def compress(self, css):
+        """
+        Return a minified copy of a stylesheet.
+        Arguments:
+        css -- The stylesheet as a string.
+        """
+        preserved_tokens = []
+        css = CSSMinifier._extract_comments(css, preserved_tokens)
+
+        css = re.sub(r'\s+', ' ', css)
+
+        # Remove the spaces before the things that should not have spaces before them,
+        # without turning "p :link {...}" into "p:link{...}".
+        css = SELECTOR_WITH_COLON_RE.sub(lambda m: m.group(0).replace(':', PSEUDO_CLASS_COLON_PLACEHOLDER), css)
+        css = SPACE_BEFORE_RE.sub(r'\1', css)
+        css = css.replace(PSEUDO_CLASS_COLON_PLACEHOLDER, ':')
+
+        # Retain the space for special IE6 cases
+        css = re.sub(r':first\-(line|letter)(\{|,)', r':first-\1 \2', css)
+
+        # No space after the end of a preserved comment
+        css = css.replace('*/ ', '*/')
+
+        # Only one @charset is allowed, and it must come first
+        css = re.sub(r'^(.*)(@charset "[^"]*";)', r'\2\1', css)
+        css = re.sub(r'^(\s*@charset [^;]+;\s*)+', r'\1', css)
+
+        # Put the space back for media queries such as "screen and (max-width:100px)"
+        css = re.sub(r'\band\(', 'and (', css)
+
+        css = SPACE_AFTER_RE.sub(r'\1', css)
+        css = re.sub(r';+}', '}', css)
+
+        # Zero values
+        css = ZERO_UNITS_RE.sub(r'\1\2', css)
+        css = re.sub(r':0 0 0 0(;|})', r':0\1', css)
+        css = re.sub(r':0 0 0(;|})', r':0\1', css)
+        css = re.sub(r':0 0(;|})', r':0\1', css)
+        css = ZERO_POSITION_RE.sub(lambda m: m.group(1).lower() + ':0 0' + m.group(2), css)
+        css = re.sub(r'(:|\s)0+\.(\d+)', r'\1.\2', css)
+
+        # Colors
+        css = RGB_RE.sub(CSSMinifier._rgb_to_hex, css)
+        css = HEX_COLOR_RE.sub(CSSMinifier._shorten_hex_color, css)
+
+        css = NONE_RE.sub(lambda m: m.group(1).lower() + ':0' + m.group(2), css)
+        css = ALPHA_OPACITY_RE.sub('alpha(opacity=', css)
+        css = EMPTY_RULE_RE.sub('', css)
+        if self._options.get('merge_rules', True):
+            css = CSSMinifier._merge_adjacent_rules(css)
+        css = re.sub(r';;+', ';', css)
+
+        for i, token in enumerate(preserved_tokens):
+            css = css.replace(TOKEN_PLACEHOLDER % i, token)
+        return css.strip()
+
+    @staticmethod
+    def _extract_comments(css, preserved_tokens):
+        """
+        Replace strings with placeholders and remove comments, except those that start
+        with ! and those used as browser hacks, which are also replaced with placeholders.
+        The content of each placeholder is appended to preserved_tokens.
+        """
+        comments = []
+        start = 0
+        while True:
+            start = css.find('/*', start)
+            if start < 0:
+                break
+            end = css.find('*/', start + 2)
+            if end < 0:
+                end = len(css)
+            comments.append(css[start + 2:end])
+            css = css[:start + 2] + (COMMENT_PLACEHOLDER % (len(comments) - 1)) + css[end:]
+            start += 2
+
+        def preserve_string(m):
+            token = m.group(0)
+            quote = token[0]
+            token = token[1:-1]
+            # The string may contain something that looked like a comment
+            if COMMENT_PLACEHOLDER[:-5] in token:
+                for i, comment in enumerate(comments):
+                    token = token.replace(COMMENT_PLACEHOLDER % i, comment)
+            token = ALPHA_OPACITY_RE.sub('alpha(opacity=', token)
+            preserved_tokens.append(token)
+            return quote + (TOKEN_PLACEHOLDER % (len(preserved_tokens) - 1)) + quote
+        css = STRING_RE.sub(preserve_string, css)
+
+        i = 0
+        while i < len(comments):
+            comment = comments[i]
+            placeholder = COMMENT_PLACEHOLDER % i
+            if comment.startswith('!'):
+                preserved_tokens.append(comment)
+                css = css.replace(placeholder, TOKEN_PLACEHOLDER % (len(preserved_tokens) - 1))
+            elif comment.endswith('\\'):
+                # The Mac IE5 hack is shortened to /*\*/ and the comment after it to /**/
+                preserved_tokens.append('\\')
+                css = css.replace(placeholder, TOKEN_PLACEHOLDER % (len(preserved_tokens) - 1))
+                i += 1
+                preserved_tokens.append('')
+                css = css.replace(COMMENT_PLACEHOLDER % i, TOKEN_PLACEHOLDER % (len(preserved_tokens) - 1))
+            else:
+                # Keep empty comments after child selectors, an IE7 hack: html >/**/ body
+                if len(comment) == 0:
+                    position = css.find(placeholder)
+                    if position > 2 and css[position - 3] == '>':
+                        preserved_tokens.append('')
+                        css = css.replace(placeholder, TOKEN_PLACEHOLDER % (len(preserved_tokens) - 1))
+                css = css.replace('/*' + placeholder + '*/', '')
+            i += 1
+        return css
+
+    @staticmethod
+    def _rgb_to_hex(m):
+        hex_color = '#'
+        for value in m.group(1).split(','):
+            hex_color += '%02x' % int(value)
+        return hex_color
+
+    @staticmethod
+    def _shorten_hex_color(m):
+        groups = m.groups()
+        if (groups[2].lower() == groups[3].lower() and groups[4].lower() == groups[5].lower() and
+                groups[6].lower() == groups[7].lower()):
+            return (groups[0] + groups[1] + '#' + groups[2] + groups[4] + groups[6]).lower()
+        return m.group(0)
+
+    @staticmethod
+    def _merge_adjacent_rules(css):
+        """
+        Merge adjacent rules with the same selector, and adjacent rules with the same
+        declarations, in minified css. Rules inside @media blocks are merged with each
+        other.
+        Remarks:
+        Only adjacent rules are merged, so the order in which declarations apply does not
+        change. Rules are not merged by their declarations if either selector contains
+        a colon, because a browser drops a whole rule when it does not recognise one of
+        its pseudo-classes. At-rules such as @font-face are never merged.
+        """
+        items = []
+        position = 0
+        while position < len(css):
+            open_brace = css.find('{', position)
+            if open_brace < 0:
+                items.append(css[position:])
+                break
+            semicolon = css.find(';', position, open_brace)
+            if semicolon >= 0:
+                # A statement such as @import
+                items.append(css[position:semicolon + 1])
+                position = semicolon + 1
+                continue
+            depth = 0
+            close_brace = None
+            for i in xrange(open_brace, len(css)):
+                if css[i] == '{':
+                    depth += 1
+                elif css[i] == '}':
+                    depth -= 1
+                    if depth == 0:
+                        close_brace = i
+                        break
+            if close_brace is None:
+                items.append(css[position:])
+                break
+            selector = css[position:open_brace]
+            body = css[open_brace + 1:close_brace]
+            if '{' in body:
+                if selector.startswith('@media'):
+                    body = CSSMinifier._merge_adjacent_rules(body)
+                items.append('%s{%s}' % (selector, body))
+            else:
+                items.append((selector, body))
+            position = close_brace + 1
+
+        merged = []
+        for item in items:
+            previous = merged[-1] if merged else None
+            if isinstance(item, tuple) and isinstance(previous, tuple) and not item[0].startswith('@') \
+                    and not previous[0].startswith('@'):
+                if item[0] == previous[0]:
+                    merged[-1] = (previous[0], previous[1] + ';' + item[1])
+                    continue
+                if item[1] == previous[1] and ':' not in item[0] and ':' not in previous[0]:
+                    merged[-1] = (previous[0] + ',' + item[0], item[1])
+                    continue
+            merged.append(item)
+        return ''.join(item if not isinstance(item, tuple) else '%s{%s}' % item for item in merged)
@@ -33,10 +33,14 @@ from Minifier import Minifier
 
 class Configuration():
 
+    # Version control directories never contain resources and are always ignored
+    DEFAULT_IGNORE_PATTERNS = ['.git', '.hg', '.svn']
+
     def __init__(self, config_file_path=None):
         self.analyzers = None
         self.analyzer_skip_lists = None
         self.minifiers = None
+        self.ignore_patterns = list(Configuration.DEFAULT_IGNORE_PATTERNS)
         if config_file_path is not None:
             if not os.path.exists(config_file_path):
                 raise Exception('Config file "%s" does not exist or is not accessible.' % config_file_path)
@@ -63,7 +67,15 @@ class Configuration():
                 for file_type in minifiers_dict.iterkeys():
                     minifier_dict = minifiers_dict[file_type]
                     minifier_class = self._get_class(minifier_dict['name'])
-                    self.set_minifier_for_file_type(minifier_class(), file_type)
+                    minifier_options = minifier_dict.get('options', None)
+                    self.set_minifier_for_file_type(minifier_class(minifier_options), file_type)
+
+            if 'ignore' in configuration_dict:
+                ignore_list = configuration_dict['ignore']
+                if isinstance(ignore_list, types.StringTypes):
+                    raise Exception('The ignore setting must be a list of patterns')
+                for pattern in ignore_list:
+                    self.add_ignore_pattern(pattern)
 
     def _get_class(self, kls):
         parts = kls.split('.')
@@ -73,6 +85,34 @@ class Configuration():
             m = getattr(m, comp)
         return m
 
+    def add_ignore_pattern(self, pattern):
+        """
+        Add a glob pattern matching files and directories that will not be searched for
+        resources. A pattern matches if it matches the name of a file or directory or its
+        path relative to the search path. Absolute patterns are matched against absolute
+        paths.
+        """
+        if not isinstance(pattern, types.StringTypes):
+            raise Exception('You must pass a string pattern')
+        if pattern not in self.ignore_patterns:
+            self.ignore_patterns.append(pattern)
+
+    def load_ignore_file(self, ignore_file_path):
+        """
+        Add the ignore patterns listed in a file, one per line. Blank lines and lines
+        starting with '#' are skipped.
+        """
+        if not os.path.exists(ignore_file_path):
+            raise Exception('Ignore file "%s" does not exist or is not accessible.' % ignore_file_path)
+        f = open(ignore_file_path, 'r')
+        try:
+            for line in f:
+                pattern = line.strip()
+                if pattern and not pattern.startswith('#'):
+                    self.add_ignore_pattern(pattern)
+        finally:
+            f.close()
+
     def add_analyzer_for_file_type(self, analyzer, file_type, skip_list=None):
         if not isinstance(analyzer, Analyzer):
             raise Exception('You must pass and Analyzer instance')
@@ -0,0 +1,215 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+
+from Metrics import Metrics
+from Requirement import RequirementNotSatisfiedException, CircularRequirementException
+
+
+class DependencyGraph:
+    """
+    The resolved requirements of a set of resources. Each requirement is resolved to
+    a resource exactly once, no matter how many resources depend on it.
+    """
+
+    def __init__(self, index, resources=None):
+        """
+        Arguments:
+        index -- A ResourceIndex used to locate the resources that satisfy requirements.
+        resources -- An optional list of resources to add to the graph. If specified, the
+        graph is checked for cycles after the resources are added.
+        """
+        self._index = index
+        self._resources = []
+        self._required_resources = {}
+        self._resolved_requirements = {}
+        # Built on demand by dependents and discarded whenever a resource is added
+        self._dependents = None
+        if resources is not None:
+            for resource in resources:
+                self.add(resource)
+            self.check_for_cycles()
+
+    @property
+    def index(self):
+        """
+        The ResourceIndex used to locate the resources that satisfy requirements.
+        """
+        return self._index
+
+    @property
+    def resources(self):
+        """
+        A list of every resource in the graph in the order in which they were added.
+        """
+        return self._resources
+
+    def __contains__(self, resource):
+        return resource in self._resolved_requirements
+
+    def add(self, resource):
+        """
+        Add a resource to the graph along with every resource that it requires,
+        directly or indirectly.
+        Arguments:
+        resource -- The Resource to be added.
+        Remarks:
+        Raises a RequirementNotSatisfiedException if a requirement cannot be resolved.
+        Cycles are not detected until check_for_cycles is called.
+        """
+        self._dependents = None
+        pending = [resource]
+        while pending:
+            current = pending.pop()
+            if current in self._resolved_requirements:
+                continue
+
+            resolved_requirements = {}
+            required_resources = []
+            for requirement in current.requirements or []:
+                if requirement.standard_name not in resolved_requirements:
+                    required_resource = self._resolve(current, requirement)
+                    resolved_requirements[requirement.standard_name] = required_resource
+                    if required_resource not in required_resources:
+                        required_resources.append(required_resource)
+
+            self._resolved_requirements[current] = resolved_requirements
+            Metrics.increment('requirements_resolved', len(resolved_requirements))
+            self._required_resources[current] = required_resources
+            self._resources.append(current)
+
+            # Pushed in reverse so that requirements are resolved in the order they appear
+            for required_resource in reversed(required_resources):
+                if required_resource not in self._resolved_requirements:
+                    pending.append(required_resource)
+
+    def _resolve(self, resource, requirement):
+        """
+        Find the resource nearest to the requiring resource that satisfies the requirement.
+        Arguments:
+        resource -- The Resource that declares the requirement.
+        requirement -- The Requirement to be resolved.
+        """
+        directory = os.path.dirname(os.path.abspath(resource.path_to_file))
+        required_resource = self._index.find_nearest(resource.file_type, requirement.standard_name, directory)
+        if required_resource is None:
+            raise RequirementNotSatisfiedException(requirement, self._index.paths)
+        return required_resource
+
+    def required_resource(self, resource, requirement):
+        """
+        The resource that satisfies the requirement of the specified resource.
+        Arguments:
+        resource -- A Resource that has been added to the graph.
+        requirement -- One of the requirements of the resource.
+        """
+        return self._resolved_requirements[resource][requirement.standard_name]
+
+    def required_resources(self, resource):
+        """
+        A list of the resources directly required by the specified resource, in the
+        order in which they are first required.
+        Arguments:
+        resource -- A Resource that has been added to the graph.
+        """
+        return self._required_resources[resource]
+
+    def dependents(self, resource):
+        """
+        A list of the resources in the graph that directly require the specified resource,
+        in the order in which they were added to the graph.
+        Arguments:
+        resource -- A Resource that has been added to the graph.
+        """
+        if self._dependents is None:
+            self._dependents = {}
+            for dependent in self._resources:
+                for required_resource in self._required_resources[dependent]:
+                    self._dependents.setdefault(required_resource, []).append(dependent)
+        return self._dependents.get(resource, [])
+
+    def check_for_cycles(self):
+        """
+        Raise a CircularRequirementException describing the first cycle found in the graph.
+        """
+        # 0 = not visited, 1 = on the current path, 2 = finished
+        states = {}
+        for start in self._resources:
+            if states.get(start, 0) != 0:
+                continue
+            states[start] = 1
+            path = [start]
+            stack = [iter(self._required_resources[start])]
+            while stack:
+                advanced = False
+                for required_resource in stack[-1]:
+                    state = states.get(required_resource, 0)
+                    if state == 1:
+                        cycle = path[path.index(required_resource):] + [required_resource]
+                        raise CircularRequirementException(cycle)
+                    if state == 0:
+                        states[required_resource] = 1
+                        path.append(required_resource)
+                        stack.append(iter(self._required_resources[required_resource]))
+                        advanced = True
+                        break
+                if not advanced:
+                    states[path.pop()] = 2
+                    stack.pop()
+
+    def topological_order(self, resources=None):
+        """
+        Get a list of resources in which every resource appears after all of the
+        resources that it requires.
+        Arguments:
+        resources -- An optional list of resources in the graph. If specified, only those
+        resources and the resources they require are included. Otherwise the whole graph is
+        ordered.
+        Remarks:
+        check_for_cycles should be called before the graph is ordered.
+        """
+        if resources is None:
+            resources = self._resources
+        ordered = []
+        visited = set()
+        for start in resources:
+            if start in visited:
+                continue
+            visited.add(start)
+            path = [start]
+            stack = [iter(self._required_resources[start])]
+            while stack:
+                advanced = False
+                for required_resource in stack[-1]:
+                    if required_resource not in visited:
+                        visited.add(required_resource)
+                        path.append(required_resource)
+                        stack.append(iter(self._required_resources[required_resource]))
+                        advanced = True
+                        break
+                if not advanced:
+                    ordered.append(path.pop())
+                    stack.pop()
+        return ordered
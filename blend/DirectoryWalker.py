@@ -0,0 +1,262 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import threading
+from fnmatch import fnmatch
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # The scandir package is a backport for versions of Python before 3.5
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+class DirectoryWalker:
+    """
+    Lists the files below a directory, reading the directories at each level of the
+    tree concurrently with several threads.
+    """
+
+    # Without scandir every entry is stat to tell directories from files, and reading
+    # directories with several threads is no faster than reading them one at a time
+    DEFAULT_THREAD_COUNT = 8 if scandir is not None else 1
+
+    def __init__(self, extensions=None, thread_count=DEFAULT_THREAD_COUNT, ignore_patterns=None, ignore_paths=None):
+        """
+        Arguments:
+        extensions -- An optional list of lower case file name extensions, without the
+        '.' character. If specified, only files with one of the extensions are listed.
+        thread_count -- The number of directories that are read at the same time.
+        ignore_patterns -- An optional list of glob patterns. Files and directories that
+        match any of the patterns are skipped, and ignored directories are never read.
+        A pattern matches if it matches the name of the file or directory or its path
+        relative to the directory being walked. Absolute patterns are matched against the
+        absolute path of the file or directory.
+        ignore_paths -- An optional list of directories below the directory being walked
+        that are never read. The directory being walked is always read.
+        """
+        if extensions is None:
+            self._extensions = None
+        else:
+            self._extensions = frozenset(extensions)
+        self._thread_count = thread_count
+        self._ignore_patterns = list(ignore_patterns or [])
+        self._ignore_paths = frozenset([os.path.normcase(os.path.abspath(ignore_path))
+            for ignore_path in ignore_paths or []])
+
+    def walk(self, path, include_empty_directories=False):
+        """
+        Get a list of (directory_path, file_names) tuples for the specified directory
+        and all of its sub-directories.
+        Arguments:
+        path -- The base directory to be recursively searched for files.
+        include_empty_directories -- Whether or not to include directories that do not
+        contain any matching files. They are excluded by default.
+        Remarks:
+        The order of the results does not depend on the file system or the number of
+        threads. A directory is listed before its sub-directories, sub-directories are
+        listed depth first in order by name and file names are sorted. As with os.walk,
+        symbolic links to directories are not followed and directories that cannot be
+        read are skipped.
+        """
+        listings = self._read_tree(path)
+
+        results = []
+        pending = [path]
+        while pending:
+            directory_path = pending.pop()
+            file_names, directory_names = listings[directory_path]
+            if file_names or include_empty_directories:
+                results.append((directory_path, file_names))
+            for directory_name in reversed(directory_names):
+                pending.append(os.path.join(directory_path, directory_name))
+        return results
+
+    def _read_tree(self, path):
+        """
+        Read every directory below path, one level of the tree at a time, and return a
+        dictionary mapping each directory path to a (file_names, directory_names) tuple.
+        Arguments:
+        path -- The base directory to be recursively searched for files.
+        """
+        listings = {}
+        level = [path]
+        while level:
+            next_level = []
+            for directory_path, listing in zip(level, self._list_directories(path, level)):
+                listings[directory_path] = listing
+                for directory_name in listing[1]:
+                    next_level.append(os.path.join(directory_path, directory_name))
+            level = next_level
+        return listings
+
+    def _list_directories(self, root, directory_paths):
+        """
+        Call _list_directory for each of the directory paths using up to thread_count
+        threads and return the results in the same order as the directory paths.
+        Arguments:
+        root -- The base directory being walked.
+        directory_paths -- A list of directories to be read.
+        """
+        thread_count = min(self._thread_count, len(directory_paths))
+        if thread_count < 2:
+            return [self._list_directory(root, directory_path) for directory_path in directory_paths]
+
+        listings = [None] * len(directory_paths)
+        errors = []
+        pending = iter(enumerate(directory_paths))
+        lock = threading.Lock()
+
+        def list_pending_directories():
+            while True:
+                with lock:
+                    try:
+                        position, directory_path = pending.next()
+                    except StopIteration:
+                        return
+                try:
+                    listings[position] = self._list_directory(root, directory_path)
+                except Exception, e:
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=list_pending_directories) for i in range(thread_count)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return listings
+
+    def _list_directory(self, root, directory_path):
+        """
+        Return a tuple of the sorted names of the matching files and the sorted names of
+        the sub-directories to descend into for the specified directory.
+        Arguments:
+        root -- The base directory being walked.
+        directory_path -- The directory to be read.
+        """
+        file_names = []
+        directory_names = []
+        try:
+            if scandir is not None:
+                for entry in scandir(directory_path):
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            directory_names.append(entry.name)
+                    elif self._matches(entry.name):
+                        file_names.append(entry.name)
+            else:
+                for name in os.listdir(directory_path):
+                    entry_path = os.path.join(directory_path, name)
+                    if os.path.isdir(entry_path):
+                        if not os.path.islink(entry_path):
+                            directory_names.append(name)
+                    elif self._matches(name):
+                        file_names.append(name)
+        except OSError:
+            return [], []
+        if self._ignore_patterns or self._ignore_paths:
+            file_names = self._remove_ignored(root, directory_path, file_names, False)
+            directory_names = self._remove_ignored(root, directory_path, directory_names, True)
+        file_names.sort()
+        directory_names.sort()
+        return file_names, directory_names
+
+    def _remove_ignored(self, root, directory_path, names, are_directories):
+        """
+        Return a list of the names of the entries in a directory that are not ignored.
+        Arguments:
+        root -- The base directory being walked.
+        directory_path -- The directory containing the entries.
+        names -- The names of the entries.
+        are_directories -- Whether or not the entries are directories.
+        """
+        absolute_directory_path = os.path.abspath(directory_path)
+        relative_directory_path = os.path.relpath(directory_path, root)
+        if relative_directory_path == os.curdir:
+            relative_directory_path = ''
+
+        return [name for name in names if not self._is_ignored_entry(os.path.join(absolute_directory_path, name),
+            os.path.join(relative_directory_path, name), are_directories)]
+
+    def is_ignored(self, root, path, is_directory):
+        """
+        Whether or not a file or directory below a directory being walked is skipped
+        because it, or a directory containing it, is ignored.
+        Arguments:
+        root -- The base directory being walked.
+        path -- The path of the file or directory.
+        is_directory -- Whether or not the path is a directory.
+        """
+        absolute_root = os.path.abspath(root)
+        relative_path = os.path.relpath(os.path.abspath(path), absolute_root)
+        if relative_path == os.curdir:
+            return False
+        if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+            return False
+        names = relative_path.split(os.sep)
+        for position in range(len(names)):
+            entry_relative_path = os.path.join(*names[:position + 1])
+            entry_is_directory = is_directory or position < len(names) - 1
+            if self._is_ignored_entry(os.path.join(absolute_root, entry_relative_path), entry_relative_path,
+                    entry_is_directory):
+                return True
+        return False
+
+    def _is_ignored_entry(self, absolute_path, relative_path, is_directory):
+        """
+        Whether or not a single file or directory is ignored, regardless of the
+        directories that contain it.
+        Arguments:
+        absolute_path -- The absolute path of the file or directory.
+        relative_path -- The path relative to the directory being walked.
+        is_directory -- Whether or not the path is a directory.
+        """
+        if is_directory and os.path.normcase(absolute_path) in self._ignore_paths:
+            return True
+        name = os.path.basename(relative_path)
+        for pattern in self._ignore_patterns:
+            if os.path.isabs(pattern):
+                if fnmatch(absolute_path, pattern):
+                    return True
+            elif fnmatch(name, pattern) or fnmatch(relative_path, pattern):
+                return True
+        return False
+
+    def _matches(self, file_name):
+        """
+        Whether or not the file name has one of the extensions being listed.
+        Arguments:
+        file_name -- The name of a file.
+        """
+        if self._extensions is None:
+            return True
+        return os.path.splitext(file_name)[1].lower()[1:] in self._extensions
@@ -0,0 +1,184 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import tempfile
+
+
+class DiskCache:
+    """
+    A directory of cached values, one file per key, that can be shared by concurrent
+    processes and by successive runs. The total size of the values can be limited, in
+    which case the least recently used values are removed to make room for new ones.
+    """
+
+    TEMP_FILE_SUFFIX = '.tmp'
+
+    def __init__(self, directory, max_bytes=None):
+        """
+        Arguments:
+        directory -- The directory in which the values are stored. It is created when the
+        first value is stored.
+        max_bytes -- The most bytes of values to keep, or None for no limit.
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        # The size of the stored values is measured when the first value is stored and
+        # then kept up to date by this instance. Values stored by other processes are
+        # counted the next time the directory is measured.
+        self._stored_bytes = None
+        self._evictions = 0
+
+    @property
+    def directory(self):
+        """
+        The directory in which the values are stored.
+        """
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        """
+        The most bytes of values to keep, or None for no limit.
+        """
+        return self._max_bytes
+
+    @property
+    def evictions(self):
+        """
+        The number of values this instance has removed to stay within max_bytes.
+        """
+        return self._evictions
+
+    def _path(self, key):
+        """
+        The path of the file in which the value for the key is stored. Files are spread
+        over sub-directories named by the first two characters of the key.
+        """
+        return os.path.join(self._directory, key[:2], key)
+
+    def get(self, key):
+        """
+        Get the string stored for the key, or None if there is none.
+        Arguments:
+        key -- A hex digest identifying the value.
+        Remarks:
+        When the size of the cache is limited, the modification time of the file is
+        updated so that the value counts as recently used.
+        """
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            value = f.read()
+        finally:
+            f.close()
+        if self._max_bytes is not None:
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass  # Another process evicted the value after it was read
+        return value
+
+    def set(self, key, value):
+        """
+        Store a string for the key.
+        Arguments:
+        key -- A hex digest identifying the value.
+        value -- The string to be stored.
+        Remarks:
+        The value is written to a temporary file that is then renamed, so other processes
+        never read a partially written value. Processes that store the same key at the
+        same time store the same value, so whichever rename happens last is kept.
+        """
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created it first
+                if not os.path.isdir(directory):
+                    raise
+        fd, temp_file_path = tempfile.mkstemp(dir=directory, suffix=DiskCache.TEMP_FILE_SUFFIX)
+        f = os.fdopen(fd, 'wb')
+        try:
+            f.write(value)
+        finally:
+            f.close()
+        try:
+            os.rename(temp_file_path, path)
+        except OSError:
+            # Windows cannot rename over an existing file, which already holds the value
+            os.remove(temp_file_path)
+
+        if self._max_bytes is not None:
+            if self._stored_bytes is None:
+                self._stored_bytes = sum(size for path, size, mtime in self._entries())
+            else:
+                self._stored_bytes += len(value)
+            if self._stored_bytes > self._max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """
+        Get a list of tuples of the path, size and modification time of each stored value.
+        """
+        entries = []
+        for dir_path, dir_names, file_names in os.walk(self._directory):
+            for file_name in file_names:
+                if file_name.endswith(DiskCache.TEMP_FILE_SUFFIX):
+                    continue
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Evicted by another process
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """
+        Remove the least recently used values until the rest fit in max_bytes.
+        Remarks:
+        Several processes may evict at the same time. A value that another process has
+        already removed, or that is open and cannot be removed on Windows, is skipped.
+        A process that has read a value keeps its content, so removing a value only
+        means a later build has to create it again.
+        """
+        entries = self._entries()
+        entries.sort(key=lambda entry: entry[2])
+        stored_bytes = sum(entry[1] for entry in entries)
+        for path, size, mtime in entries:
+            if stored_bytes <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._evictions += 1
+            except OSError:
+                pass
+            stored_bytes -= size
+        self._stored_bytes = stored_bytes
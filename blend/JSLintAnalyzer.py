@@ -26,9 +26,14 @@ import os
 import re
 import platform
 import subprocess
+import threading
 import traceback
+import Queue
 from Analyzer import Analyzer
-from helpers import first_file_name_in_path_matching_regex
+from JSLintWorkerPool import JSLintWorkerPool, JSLintWorkerError
+from Metrics import Metrics
+from Profiler import Profiler
+from helpers import first_file_name_in_path_matching_regex, file_checksum
 
 
 class JsLintComplaint(object):
@@ -83,6 +88,8 @@ class JSLintAnalyzer(Analyzer):
         self._rhino_jar_file_path = first_file_name_in_path_matching_regex(self._lib_path, self._rhino_jar_regex)
         self._lib_message_list = []
         self._use_nodejs_if_available = self._options.get('use_nodejs_if_available', True)
+        self._runner_version = None
+        self._worker_pool = None
 
         if self._js_lint_proc_args is None and platform.system() == 'Windows':
             # Windows Script Host has two versions, wscript.exe which pops up
@@ -93,8 +100,12 @@ class JSLintAnalyzer(Analyzer):
         if self._js_lint_proc_args is None and self._use_nodejs_if_available:
             null_file = open(os.devnull, 'w')
             try:
-                subprocess.check_call(['node', '--help'], stdout=null_file, stderr=null_file)
+                node_proc = subprocess.Popen(['node', '--version'], stdout=subprocess.PIPE, stderr=null_file)
+                node_version = node_proc.communicate()[0]
+                if node_proc.returncode != 0:
+                    raise Exception('node --version exited with return code %d' % node_proc.returncode)
                 self._js_lint_proc_args = ["node", self._js_lint_script_file_path]
+                self._runner_version = 'node ' + node_version.strip()
                 self._lib_message_list.append("Using node.js to run JSLint")
             except Exception:
                 self._lib_message_list.append("Cannot use node.js to run JSLint because it was not found on the PATH")
@@ -108,7 +119,73 @@ class JSLintAnalyzer(Analyzer):
             else:
                 self._lib_message_list.append("Cannot use Rhino to run JSLint because js.jar could not be found in in %r" % self._lib_path)
 
+        # Long running workers load JSLint once instead of once per resource. The
+        # worker script does not support Windows Script Host.
+        worker_count = self._options.get('workers', 0)
+        if worker_count and self._js_lint_proc_args is not None and self._js_lint_proc_args[0] != 'cscript.exe':
+            worker_script_file_path = os.path.join(self._module_path, 'lib', 'blend-jslint-worker.js')
+            self._worker_pool = JSLintWorkerPool(
+                self._js_lint_proc_args[:-1] + [worker_script_file_path, self._js_lint_script_file_path],
+                worker_count)
+            self._lib_message_list.append("Using %d JSLint worker process(es)" % worker_count)
+
+    def _tool_versions(self):
+        """
+        The JSLint runner and checksums of the JSLint script and, when used, the Rhino jar.
+        """
+        if self._js_lint_proc_args is None:
+            return []
+        versions = [self._runner_version or self._js_lint_proc_args[0],
+            file_checksum(self._js_lint_script_file_path)]
+        if self._js_lint_proc_args[0] == 'java':
+            versions.append(file_checksum(self._rhino_jar_file_path))
+        return versions
+
     def analyze(self, resource):
+        return self._analyze(resource, None)
+
+    def analyze_batch(self, resources):
+        """
+        Analyze several resources and return a list of their Analyses in the same order.
+        With several JSLint workers, the resources are sent to the workers from as many
+        threads so that every worker is kept busy.
+        Arguments:
+        resources -- A list of Resource instances.
+        """
+        worker_count = self._worker_pool.worker_count if self._worker_pool is not None else 1
+        thread_count = min(worker_count, len(resources))
+        if thread_count < 2:
+            return Analyzer.analyze_batch(self, resources)
+
+        # Resources are not safe to load from several threads, so they are read here
+        contents = [resource.content for resource in resources]
+        analyses = [None] * len(resources)
+        positions = Queue.Queue()
+        for position in range(len(resources)):
+            positions.put(position)
+
+        def analyze_pending():
+            while True:
+                try:
+                    position = positions.get_nowait()
+                except Queue.Empty:
+                    return
+                analyses[position] = self._analyze(resources[position], contents[position])
+
+        threads = [threading.Thread(target=analyze_pending) for i in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return analyses
+
+    def _analyze(self, resource, content):
+        """
+        Run JSLint on a resource and return its Analysis.
+        Arguments:
+        resource -- The Resource to be analyzed.
+        content -- The content of the resource, or None to read it from the resource.
+        """
         analysis = Analyzer.analyze(self, resource)
         analysis.add_messages(self._lib_message_list)
         if self._js_lint_proc_args is None:
@@ -116,19 +193,34 @@ class JSLintAnalyzer(Analyzer):
             analysis.add_error('No suitable JSLint runner (cscript.exe, node.js or rhino) could be found.')
             return analysis
 
+        if content is None:
+            content = resource.content
         try:
-            js_lint_proc = subprocess.Popen(self._js_lint_proc_args, -1, None, subprocess.PIPE,
-                subprocess.PIPE, subprocess.PIPE)
-            js_lint_proc_outputs = js_lint_proc.communicate(resource.content)
+            if self._worker_pool is not None:
+                with Profiler.span('jslint worker %s' % resource.path_to_file, Profiler.TOOL):
+                    returncode, output = self._worker_pool.lint(content)
+                js_lint_proc_outputs = (output,)
+                proc_args = self._worker_pool.args
+            else:
+                with Profiler.span('jslint %s' % resource.path_to_file, Profiler.TOOL, args=self._js_lint_proc_args):
+                    js_lint_proc = subprocess.Popen(self._js_lint_proc_args, -1, None, subprocess.PIPE,
+                        subprocess.PIPE, subprocess.PIPE)
+                    Metrics.increment('analyzer_processes')
+                    js_lint_proc_outputs = js_lint_proc.communicate(content)
+                returncode = js_lint_proc.returncode
+                proc_args = self._js_lint_proc_args
+        except JSLintWorkerError as e:
+            analysis.add_error(str(e))
+            return analysis
         except Exception as e:
             analysis.add_error("An exception what thrown while running JsLint: %s\n%s" %
                 (str(e), traceback.format_exc()))
             return analysis
 
         # The JSLint process returns 1 if it finds lint
-        if js_lint_proc.returncode != 0 and js_lint_proc.returncode != 1:
+        if returncode != 0 and returncode != 1:
             analysis.add_error('The JSLint process exited with return code %d\nArguments: %s\n Output: %s'
-                % (js_lint_proc.returncode, self._js_lint_proc_args, js_lint_proc_outputs))
+                % (returncode, proc_args, js_lint_proc_outputs))
             return analysis
 
         analysis.mark_as_good()  # Assume that JSLint produced no complaints until parsing one from the process output
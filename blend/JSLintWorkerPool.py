@@ -0,0 +1,193 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import subprocess
+import tempfile
+import threading
+import Queue
+
+from Metrics import Metrics
+
+
+class JSLintWorkerError(Exception):
+    """
+    Raised when a JSLint worker process exits or replies with something other than
+    a framed response.
+    """
+    pass
+
+
+class _JSLintWorker:
+    """
+    A single long running process of lib/blend-jslint-worker.js.
+    """
+
+    def __init__(self, args):
+        self._stderr_file = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=self._stderr_file, close_fds=os.name != 'nt')
+        Metrics.increment('analyzer_processes')
+
+    def lint(self, content):
+        """
+        Send one source to the worker and return a tuple of the exit code jslint.js would
+        have returned for it and the output jslint.js would have printed.
+        """
+        try:
+            self._proc.stdin.write('%d\n' % len(content))
+            self._proc.stdin.write(content)
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline()
+            payload = self._proc.stdout.read(int(header))
+        except (IOError, OSError, ValueError):
+            raise JSLintWorkerError(self._describe_failure())
+        if len(payload) != int(header):
+            raise JSLintWorkerError(self._describe_failure())
+        status, _, output = payload.partition('\n')
+        try:
+            return int(status), output
+        except ValueError:
+            raise JSLintWorkerError(self._describe_failure())
+
+    def _describe_failure(self):
+        self.close()
+        self._stderr_file.seek(0)
+        stderr = self._stderr_file.read().strip()
+        return 'The JSLint worker process exited with return code %r%s' % (self._proc.returncode,
+            ('\n' + stderr) if stderr else '')
+
+    def close(self):
+        """
+        Close the worker's standard input, which makes it exit, and wait for it.
+        """
+        if self._proc.returncode is None:
+            try:
+                self._proc.stdin.close()
+            except (IOError, OSError):
+                pass
+            self._proc.wait()
+            self._proc.stdout.close()
+
+
+class JSLintWorkerPool:
+    """
+    A pool of long running JSLint processes that each load JSLint once and then lint any
+    number of resources, instead of starting a node.js or Rhino process per resource.
+    """
+
+    def __init__(self, args, worker_count=1):
+        """
+        Arguments:
+        args -- The command line that starts one worker, e.g.
+        ['node', 'lib/blend-jslint-worker.js', 'lib/jslint.js'].
+        worker_count -- The most workers that will run at the same time. Workers are
+        started as they are needed, so a pool used by one thread runs one worker.
+        """
+        if worker_count < 1:
+            raise ValueError('worker_count must be at least 1, not %r' % worker_count)
+        self._args = args
+        self._worker_count = worker_count
+        self.restarts = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._idle_workers = Queue.Queue()
+
+    @property
+    def args(self):
+        """
+        The command line that starts one worker.
+        """
+        return self._args
+
+    @property
+    def worker_count(self):
+        """
+        The most workers that will run at the same time.
+        """
+        return self._worker_count
+
+    def _acquire(self):
+        if self._pid != os.getpid():
+            # The pool was copied into a forked process, which must not share the
+            # parent's workers.
+            self._reset()
+        self._lock.acquire()
+        try:
+            if self._idle_workers.empty() and len(self._workers) < self._worker_count:
+                worker = _JSLintWorker(self._args)
+                self._workers.append(worker)
+                return worker
+        finally:
+            self._lock.release()
+        return self._idle_workers.get()
+
+    def _replace(self, worker):
+        self._lock.acquire()
+        try:
+            self._workers.remove(worker)
+            replacement = _JSLintWorker(self._args)
+            self._workers.append(replacement)
+            self.restarts += 1
+            return replacement
+        finally:
+            self._lock.release()
+
+    def lint(self, content):
+        """
+        Lint a source with the first idle worker and return a tuple of the exit code
+        jslint.js would have returned for it and the output jslint.js would have printed.
+        Arguments:
+        content -- The UTF-8 encoded source, optionally followed by " --options {...}".
+        Remarks:
+        A worker that crashes is restarted and the source is sent to the new worker. If
+        that worker crashes as well, JSLintWorkerError is raised.
+        """
+        worker = self._acquire()
+        try:
+            try:
+                return worker.lint(content)
+            except JSLintWorkerError:
+                worker = self._replace(worker)
+                return worker.lint(content)
+        finally:
+            self._idle_workers.put(worker)
+
+    def close(self):
+        """
+        Stop all of the workers. Workers are started again if the pool is used afterwards.
+        """
+        self._lock.acquire()
+        try:
+            workers = self._workers if self._pid == os.getpid() else []
+            self._workers = []
+        finally:
+            self._lock.release()
+        for worker in workers:
+            worker.close()
+        self._reset()
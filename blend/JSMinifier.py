@@ -0,0 +1,211 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+
+from Minifier import Minifier
+from Minification import Minification
+
+
+# Any run of javascript that can be copied or dropped as a unit. Code is any run without
+# whitespace, quotes or slashes. A slash is matched on its own because whether it starts a
+# regular expression depends on the token before it, and a backtick starts a template literal
+# that can contain other template literals.
+TOKEN_RE = re.compile(r'''
+    (?P<space>[ \t\f\v\r\n]+)
+  | (?P<comment>//[^\r\n]*|/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\r\n]|\\[\s\S])*"|'(?:[^'\\\r\n]|\\[\s\S])*')
+  | (?P<template>`)
+  | (?P<code>[^ \t\f\v\r\n"'`/]+)
+  | (?P<slash>/)
+  | (?P<other>[\s\S])
+''', re.VERBOSE)
+REGEX_RE = re.compile(r'/(?![*/])(?:[^/\\\[\r\n]|\\[^\r\n]|\[(?:[^\]\\\r\n]|\\[^\r\n])*\])+/[A-Za-z]*')
+LAST_WORD_RE = re.compile(r'(?:[A-Za-z0-9_$\\]|[^\x00-\x7f])+$')
+# The text of a template literal up to its end or its next ${...} substitution
+TEMPLATE_TEXT_RE = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+# Any run of a substitution in a template literal that cannot contain the brace that ends it
+SUBSTITUTION_RE = re.compile(r'''[^`'"{}/]+|"(?:[^"\\\r\n]|\\[\s\S])*"|'(?:[^'\\\r\n]|\\[\s\S])*'|'''
+    r'''//[^\r\n]*|/\*[\s\S]*?(?:\*/|\Z)|[\s\S]''')
+
+# The ASCII characters of identifiers and numbers. Every character outside ASCII is also
+# treated as part of a word.
+WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\')
+# A line break between two tokens is kept if the first ends with a word character or one of
+# NEWLINE_BEFORE_CHARS and the second starts with a word character or one of
+# NEWLINE_AFTER_CHARS, since automatic semicolon insertion could depend on it. These are
+# the rules of Douglas Crockford's JSMin, with private class fields and decorators added.
+NEWLINE_BEFORE_CHARS = frozenset(')]}"\'`+-/')
+NEWLINE_AFTER_CHARS = frozenset('([{"\'`+-!~/#@')
+# A slash after one of these words starts a regular expression rather than a division
+KEYWORDS_BEFORE_EXPRESSION = frozenset(['return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'])
+
+
+def _is_word_char(c):
+    return c in WORD_CHARS or c > '\x7f'
+
+
+class JSMinifier(Minifier):
+    """
+    Minifies javascript in the Python process, without starting a JVM. Only comments and
+    whitespace are removed; unlike the YUI Compressor, variables are not renamed.
+    Comments that start with /*! and conditional compilation comments are kept.
+    """
+
+    def minify(self, resource):
+        minification = Minifier.minify(self, resource)
+        if resource.minified:
+            minification.set_content(resource.content)
+            minification.mark_as_good()
+            minification.add_message('The resource %s is already minified.' % resource.path_to_file)
+            return minification
+        return self.minify_content(resource.content or '', resource.file_type)
+
+    def minify_content(self, content, file_type):
+        minification = Minification()
+        if file_type != 'javascript':
+            minification.mark_as_bad()
+            minification.add_error('The JSMinifier cannot minify content of type %r.' % file_type)
+            return minification
+        minification.set_content(self.compress(content))
+        minification.mark_as_good()
+        return minification
+
+    def compress(self, js):
+        """
+        Return a copy of a script without its comments and unnecessary whitespace.
+        Arguments:
+        js -- The script as a string.
+        Remarks:
+        Strings, template literals and regular expressions are copied unchanged. Line breaks
+        are kept wherever automatic semicolon insertion could depend on them.
+        """
+        output = []
+        # The last token that was written, and whether a space or line break was dropped since
+        previous = ''
+        skipped_space = False
+        skipped_newline = False
+        position = 0
+        length = len(js)
+        while position < length:
+            m = TOKEN_RE.match(js, position)
+            kind = m.lastgroup
+            token = m.group(kind)
+            end = m.end()
+            if kind == 'space':
+                skipped_space = True
+                if not skipped_newline and ('\n' in token or '\r' in token):
+                    skipped_newline = True
+                position = end
+                continue
+            if kind == 'comment':
+                if not (token.startswith('/*!') or token.startswith('/*@')):
+                    skipped_space = True
+                    if not skipped_newline and token.startswith('/*') and ('\n' in token or '\r' in token):
+                        skipped_newline = True
+                    position = end
+                    continue
+            elif kind == 'template':
+                end = JSMinifier._template_end(js, position)
+                token = js[position:end]
+            elif kind == 'slash' and JSMinifier._regex_can_follow(previous):
+                regex_match = REGEX_RE.match(js, position)
+                if regex_match is not None:
+                    end = regex_match.end()
+                    token = regex_match.group(0)
+
+            if skipped_space and previous:
+                last = previous[-1]
+                first = token[0]
+                if skipped_newline and (last in NEWLINE_BEFORE_CHARS or _is_word_char(last)) and \
+                        (first in NEWLINE_AFTER_CHARS or _is_word_char(first)):
+                    output.append('\n')
+                elif JSMinifier._space_is_needed(previous, token):
+                    output.append(' ')
+            output.append(token)
+            previous = token
+            skipped_space = skipped_newline = False
+            position = end
+        return ''.join(output)
+
+    @staticmethod
+    def _template_end(js, position):
+        """
+        The position just after the template literal that starts at position. Template
+        literals can be nested in the substitutions of other template literals.
+        """
+        length = len(js)
+        position += 1
+        while position < length:
+            position = TEMPLATE_TEXT_RE.match(js, position).end()
+            if position >= length:
+                break
+            if js[position] == '`':
+                return position + 1
+            # Skip the "${" of a substitution and everything up to its matching "}"
+            position += 2
+            depth = 0
+            while position < length:
+                if js[position] == '`':
+                    position = JSMinifier._template_end(js, position)
+                    continue
+                m = SUBSTITUTION_RE.match(js, position)
+                position = m.end()
+                token = m.group(0)
+                if token == '{':
+                    depth += 1
+                elif token == '}':
+                    if depth == 0:
+                        break
+                    depth -= 1
+        return length
+
+    @staticmethod
+    def _regex_can_follow(previous):
+        """
+        Whether a slash after the previous token starts a regular expression rather than
+        a division.
+        """
+        if not previous:
+            return True
+        last = previous[-1]
+        if _is_word_char(last):
+            return LAST_WORD_RE.search(previous).group(0) in KEYWORDS_BEFORE_EXPRESSION
+        # "i++ / 2" is a division
+        return last not in ')]"\'`' and not previous.endswith('++') and not previous.endswith('--')
+
+    @staticmethod
+    def _space_is_needed(previous, token):
+        """
+        Whether removing the space between two tokens would change the meaning of a script.
+        """
+        last = previous[-1]
+        first = token[0]
+        if _is_word_char(last):
+            # "1 .toString()" cannot become "1.toString()"
+            return _is_word_char(first) or (first == '.' and LAST_WORD_RE.search(previous).group(0).isdigit())
+        # "a + +b", "a - -b" and "a / /b/" cannot lose their spaces
+        return (last == first and last in '+-') or (last == '/' and first in '/*')
+
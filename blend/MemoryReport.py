@@ -0,0 +1,357 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class MemoryReport:
+    """
+    Measures the memory used by a run of Application and attributes the peak usage to
+    the phases of the build, and reports the largest bundles merged and the content held
+    by Resource.cache at the end of the run.
+    Remarks:
+    All sizes are resident set sizes of the process, sampled by a background thread and
+    whenever a phase starts or ends, so they include memory held by the interpreter
+    itself rather than only the memory allocated for the build. When MemoryReport.active
+    is None, outside of a run, phase does nothing.
+    """
+
+    # The report in which memory usage is recorded, or None if it is not being measured
+    active = None
+
+    # How often the resident set size is sampled
+    SAMPLE_INTERVAL_SECONDS = 0.01
+
+    # The number of bundles and resources that are listed
+    SUMMARY_COUNT = 10
+
+    def __init__(self):
+        self._phases = []
+        self._phase_stack = []
+        self._bundle_sizes = {}
+        self._start_rss = None
+        self._resource_cache = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    @staticmethod
+    def phase(name):
+        """
+        Return a context manager to be used in a with statement that attributes the memory
+        used during its block to a phase of the active report.
+        Arguments:
+        name -- The name of the phase.
+        """
+        report = MemoryReport.active
+        if report is None:
+            return _NO_PHASE
+        return _Phase(report, name)
+
+    @staticmethod
+    def bundle_merged(bundle_path, size):
+        """
+        Record the size of the merged content of a bundle in the active report, if there is one.
+        Arguments:
+        bundle_path -- The path of the bundle.
+        size -- The number of bytes merged into the bundle.
+        """
+        report = MemoryReport.active
+        if report is not None:
+            report.record_bundle(bundle_path, size)
+
+    def start(self):
+        """
+        Start measuring, sampling the resident set size in a background thread.
+        """
+        self._start_rss = current_rss()
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._sample_until_stopped)
+        self._sampler.daemon = True
+        self._sampler.start()
+
+    def stop(self, resource_cache=None):
+        """
+        Stop measuring and record what remains in memory at the end of the run.
+        Arguments:
+        resource_cache -- The ResourceCache whose content is reported, usually Resource.cache.
+        """
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+        if resource_cache is not None:
+            self._resource_cache = {
+                'resources': len(resource_cache),
+                'loaded_resources': len(resource_cache.largest_loaded()),
+                'loaded_bytes': resource_cache.loaded_bytes,
+                'max_bytes': resource_cache.max_bytes,
+                'largest': resource_cache.largest_loaded(MemoryReport.SUMMARY_COUNT)
+            }
+
+    def _sample_until_stopped(self):
+        while not self._stopped.wait(MemoryReport.SAMPLE_INTERVAL_SECONDS):
+            self.sample()
+
+    def sample(self):
+        """
+        Measure the resident set size and record it against the current phase.
+        """
+        rss = current_rss()
+        self._lock.acquire()
+        try:
+            if self._phase_stack:
+                self._phase_stack[-1].record(rss)
+        finally:
+            self._lock.release()
+
+    def enter_phase(self, name):
+        """
+        Start attributing memory to a phase, until exit_phase is called.
+        Arguments:
+        name -- The name of the phase.
+        """
+        phase = _PhaseUsage(name, current_rss())
+        self._lock.acquire()
+        try:
+            self._phases.append(phase)
+            self._phase_stack.append(phase)
+        finally:
+            self._lock.release()
+        self.sample()
+
+    def exit_phase(self):
+        """
+        Stop attributing memory to the phase started last.
+        """
+        self.sample()
+        self._lock.acquire()
+        try:
+            phase = self._phase_stack.pop()
+            phase.end_rss = current_rss()
+        finally:
+            self._lock.release()
+
+    def record_bundle(self, bundle_path, size):
+        """
+        Record the size of the merged content of a bundle.
+        Arguments:
+        bundle_path -- The path of the bundle.
+        size -- The number of bytes merged into the bundle.
+        """
+        self._lock.acquire()
+        try:
+            self._bundle_sizes[bundle_path] = size
+        finally:
+            self._lock.release()
+
+    @property
+    def phases(self):
+        """
+        A list of dictionaries describing the memory used by each phase in the order they
+        started, with the name and the resident set size at the start and end and at its
+        peak in bytes. Unknown sizes are None.
+        """
+        self._lock.acquire()
+        try:
+            return [phase.as_dict() for phase in self._phases]
+        finally:
+            self._lock.release()
+
+    @property
+    def bundle_sizes(self):
+        """
+        A dictionary of the size of the merged content of each bundle by path.
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._bundle_sizes)
+        finally:
+            self._lock.release()
+
+    def largest_bundles(self, count):
+        """
+        Return a list of the path and merged size of the largest bundles, largest first.
+        Arguments:
+        count -- The maximum number of bundles to return.
+        """
+        self._lock.acquire()
+        try:
+            return sorted(self._bundle_sizes.iteritems(), key=lambda item: (-item[1], item[0]))[:count]
+        finally:
+            self._lock.release()
+
+    @property
+    def resource_cache(self):
+        """
+        A dictionary describing the content held by the resource cache at the end of the
+        run, or None if it was not recorded.
+        """
+        return self._resource_cache
+
+    def summary(self, count=SUMMARY_COUNT):
+        """
+        A description of the peak resident set size of the run and of each phase, the
+        largest bundles and the content held by the resource cache.
+        Arguments:
+        count -- The number of bundles and resources to list.
+        """
+        lines = ['Peak memory: %s resident, %s in the largest child process' % (
+            _format_size(peak_rss()), _format_size(peak_child_rss()))]
+
+        lines.append('Peak resident memory by phase:')
+        for phase in self.phases:
+            growth = None
+            if phase['start_rss'] is not None and phase['peak_rss'] is not None:
+                growth = phase['peak_rss'] - phase['start_rss']
+            lines.append('  %-14s %s resident, %s above the start' % (phase['name'],
+                _format_size(phase['peak_rss']), _format_size(growth)))
+
+        bundles = self.largest_bundles(count)
+        if bundles:
+            lines.append('Largest bundles merged:')
+            for bundle_path, size in bundles:
+                lines.append('  %10s %s' % (_format_size(size), bundle_path))
+
+        cache = self._resource_cache
+        if cache is not None:
+            budget = ' of a %s budget' % _format_size(cache['max_bytes']) if cache['max_bytes'] is not None else ''
+            lines.append('Resource.cache holds %s%s in %d of %d resources' % (_format_size(cache['loaded_bytes']),
+                budget, cache['loaded_resources'], cache['resources']))
+            for path_to_file, size in cache['largest'][:count]:
+                lines.append('  %10s %s' % (_format_size(size), path_to_file))
+        return '\n'.join(lines)
+
+
+def current_rss():
+    """
+    The resident set size of this process in bytes, or None if it cannot be measured.
+    """
+    try:
+        f = open('/proc/self/statm')
+        try:
+            pages = int(f.read().split()[1])
+        finally:
+            f.close()
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        # Without /proc the peak is the closest measure available
+        return peak_rss()
+
+
+def peak_rss():
+    """
+    The peak resident set size of this process in bytes, or None if it cannot be measured.
+    """
+    return _max_rss(resource.RUSAGE_SELF) if resource is not None else None
+
+
+def peak_child_rss():
+    """
+    The peak resident set size in bytes of the largest child process that has finished,
+    such as an analyzer, minifier or build worker, or None if it cannot be measured.
+    """
+    return _max_rss(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+
+def _max_rss(who):
+    max_rss = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes and OS X reports bytes
+    if sys.platform == 'darwin':
+        return max_rss
+    return max_rss * 1024
+
+
+def _format_size(size):
+    if size is None:
+        return 'unknown'
+    if abs(size) >= 1024 * 1024:
+        return '%.1f MB' % (size / (1024.0 * 1024.0))
+    if abs(size) >= 1024:
+        return '%.1f KB' % (size / 1024.0)
+    return '%d B' % size
+
+
+class _PhaseUsage:
+    """
+    The memory used during a phase.
+    """
+
+    def __init__(self, name, start_rss):
+        self.name = name
+        self.start_rss = start_rss
+        self.end_rss = None
+        self.peak_rss = start_rss
+
+    def record(self, rss):
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'start_rss': self.start_rss,
+            'end_rss': self.end_rss,
+            'peak_rss': self.peak_rss
+        }
+
+
+class _Phase:
+    """
+    Attributes the memory used during a with block to a phase of a report.
+    """
+
+    def __init__(self, report, name):
+        self._report = report
+        self._name = name
+
+    def __enter__(self):
+        self._report.enter_phase(self._name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._report.exit_phase()
+        return False
+
+
+class _NoPhase:
+    """
+    A phase that records nothing, used when memory is not being measured.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NO_PHASE = _NoPhase()
@@ -0,0 +1,154 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import json
+import time
+
+from Resource import Resource
+from helpers import stat_or_none, write_json_file_atomically
+
+
+class MetadataIndex:
+    """
+    A persistent record of the metadata of previously loaded resources. Resources for
+    files whose size and modification time have not changed since they were recorded
+    are restored from the index without reading the file, as long as their requirements
+    were found with the current Resource.requirement_scan.
+    """
+
+    # Incremented whenever the format of the stored metadata changes so that indexes
+    # written by older versions are ignored.
+    VERSION = 2
+
+    # Files modified this recently are not recorded because a subsequent change within
+    # the resolution of the file system timestamps would not be detected.
+    RACY_INTERVAL_SECONDS = 2
+
+    def __init__(self, index_file_path):
+        """
+        Arguments:
+        index_file_path -- The path of the JSON file in which the index is stored. The
+        file does not need to exist.
+        """
+        self._index_file_path = index_file_path
+        self._entries = {}
+        self._resources = {}
+        self._dirty = False
+        self._hits = 0
+        self._misses = 0
+        self._read()
+
+    def _read(self):
+        """
+        Load the entries from the index file. A missing, unreadable or outdated file
+        results in an empty index.
+        """
+        if not os.path.exists(self._index_file_path):
+            return
+        try:
+            f = open(self._index_file_path, 'r')
+            try:
+                index_dict = json.load(f)
+            finally:
+                f.close()
+        except (IOError, ValueError):
+            return
+        if isinstance(index_dict, dict) and index_dict.get('version') == MetadataIndex.VERSION:
+            self._entries = index_dict.get('entries', {})
+
+    @property
+    def index_file_path(self):
+        """
+        The path of the JSON file in which the index is stored.
+        """
+        return self._index_file_path
+
+    @property
+    def hits(self):
+        """
+        The number of resources restored from the index without reading the file.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of resources that had to be read because they were new or changed.
+        """
+        return self._misses
+
+    def load(self, path_to_file, stat=None):
+        """
+        Returns a new Resource instance for the specified file, restored from the index
+        if the file has not changed since it was recorded.
+        Arguments:
+        path_to_file -- The path at which the physical file is located.
+        stat -- The result of os.stat for the file if it has already been stat, otherwise
+        None.
+        """
+        key = os.path.abspath(path_to_file)
+        if stat is None:
+            stat = stat_or_none(path_to_file)
+        if stat is None:
+            if key in self._entries:
+                del self._entries[key]
+                self._dirty = True
+            return Resource(path_to_file)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime and \
+                entry['metadata']['requirement_scan'] == Resource.requirement_scan:
+            self._hits += 1
+            return Resource(path_to_file, entry['metadata'])
+
+        self._misses += 1
+        resource = Resource(path_to_file, stat=stat)
+        if key in self._entries:
+            del self._entries[key]
+            self._dirty = True
+        if stat.st_mtime < time.time() - MetadataIndex.RACY_INTERVAL_SECONDS:
+            # The metadata is not read from the resource until the index is saved
+            self._resources[key] = (resource, stat)
+            self._dirty = True
+        return resource
+
+    def save(self):
+        """
+        Write the index file if any entries have been added, changed or removed.
+        """
+        if not self._dirty:
+            return
+
+        for key, (resource, stat) in self._resources.iteritems():
+            self._entries[key] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'metadata': resource.metadata
+            }
+        self._resources = {}
+
+        write_json_file_atomically(self._index_file_path,
+            {'version': MetadataIndex.VERSION, 'entries': self._entries})
+        self._dirty = False
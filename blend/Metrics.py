@@ -0,0 +1,216 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import threading
+
+from helpers import write_file_atomically
+
+
+class Metrics:
+    """
+    Counters of the work done by a run of Application and the sizes of the files it
+    writes, which can be written as JSON or in the Prometheus text format.
+    Remarks:
+    Counters are incremented with Metrics.increment wherever the work is done. When
+    Metrics.active is None, outside of a run, nothing is counted.
+    """
+
+    # The metrics in which counts are recorded, or None if they are not being collected
+    active = None
+
+    # The name and description of each counter
+    COUNTERS = [
+        ('files_walked', 'Processable files found by walking the search paths'),
+        ('bytes_read', 'Bytes of file content read or memory mapped'),
+        ('resource_cache_hits', 'Resources reused from Resource.cache'),
+        ('resource_cache_misses', 'Resources created because they were not in Resource.cache'),
+        ('metadata_index_hits', 'Resources restored from the metadata index without reading the file'),
+        ('metadata_index_misses', 'Resources that were read because they were new or changed'),
+        ('requirements_resolved', 'Requirements resolved to the resources that satisfy them'),
+        ('analyzer_processes', 'Analyzer processes started'),
+        ('minifier_processes', 'Minifier processes started'),
+        ('analysis_cache_hits', 'Analyses reused instead of running an analyzer'),
+        ('analysis_cache_misses', 'Analyses for which an analyzer was run'),
+        ('minification_cache_hits', 'Minifications reused instead of running a minifier'),
+        ('minification_cache_misses', 'Minifications for which a minifier was run'),
+        ('bytes_written', 'Bytes written to output files')
+    ]
+
+    JSON = 'json'
+    PROMETHEUS = 'prometheus'
+    FORMATS = [JSON, PROMETHEUS]
+
+    # The prefix of the name of each metric in the Prometheus text format
+    PROMETHEUS_PREFIX = 'blend_'
+
+    def __init__(self):
+        self._counters = dict((name, 0) for name, description in Metrics.COUNTERS)
+        self._output_sizes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def increment(name, amount=1):
+        """
+        Add to a counter of the active metrics, if there are any.
+        Arguments:
+        name -- The name of one of the COUNTERS.
+        amount -- The amount to add.
+        """
+        metrics = Metrics.active
+        if metrics is not None:
+            metrics.add(name, amount)
+
+    @staticmethod
+    def output_written(bundle_path, output_path, size):
+        """
+        Record the size of a file written for a bundle in the active metrics, if there are any.
+        Arguments:
+        bundle_path -- The path of the bundle.
+        output_path -- The path of the file that was written.
+        size -- The number of bytes written.
+        """
+        metrics = Metrics.active
+        if metrics is not None:
+            metrics.record_output(bundle_path, output_path, size)
+
+    def add(self, name, amount=1):
+        """
+        Add to a counter.
+        Arguments:
+        name -- The name of one of the COUNTERS.
+        amount -- The amount to add.
+        """
+        self._lock.acquire()
+        try:
+            self._counters[name] += amount
+        finally:
+            self._lock.release()
+
+    def add_differences(self, before, after):
+        """
+        Add the amount by which each of a set of counters kept elsewhere has changed.
+        Arguments:
+        before -- A dictionary of the values of the counters by name.
+        after -- A dictionary of the later values of the same counters.
+        """
+        for name, value in after.iteritems():
+            self.add(name, value - before.get(name, 0))
+
+    def record_output(self, bundle_path, output_path, size):
+        """
+        Record the size of a file written for a bundle and add it to bytes_written.
+        Arguments:
+        bundle_path -- The path of the bundle.
+        output_path -- The path of the file that was written.
+        size -- The number of bytes written.
+        """
+        self._lock.acquire()
+        try:
+            self._counters['bytes_written'] += size
+            self._output_sizes.setdefault(bundle_path, {})[output_path] = size
+        finally:
+            self._lock.release()
+
+    @property
+    def counters(self):
+        """
+        A dictionary of the value of each counter by name.
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._counters)
+        finally:
+            self._lock.release()
+
+    @property
+    def output_sizes(self):
+        """
+        A dictionary of the path of each bundle to a dictionary of the size of each file
+        written for it by path.
+        """
+        self._lock.acquire()
+        try:
+            return dict((bundle_path, dict(sizes)) for bundle_path, sizes in self._output_sizes.iteritems())
+        finally:
+            self._lock.release()
+
+    def as_dict(self):
+        """
+        The counters and output sizes as a dictionary that can be serialized as JSON.
+        """
+        return {'counters': self.counters, 'bundles': self.output_sizes}
+
+    def merge(self, metrics_dict):
+        """
+        Add the counts and output sizes recorded by other metrics, such as those of a
+        worker process.
+        Arguments:
+        metrics_dict -- A dictionary returned by as_dict.
+        """
+        for name, value in metrics_dict['counters'].iteritems():
+            if name != 'bytes_written':
+                self.add(name, value)
+        for bundle_path, sizes in metrics_dict['bundles'].iteritems():
+            for output_path, size in sizes.iteritems():
+                self.record_output(bundle_path, output_path, size)
+
+    def to_prometheus(self):
+        """
+        The counters and output sizes in the Prometheus text exposition format.
+        """
+        counters = self.counters
+        lines = []
+        for name, description in Metrics.COUNTERS:
+            metric_name = '%s%s_total' % (Metrics.PROMETHEUS_PREFIX, name)
+            lines.append('# HELP %s %s.' % (metric_name, description))
+            lines.append('# TYPE %s counter' % metric_name)
+            lines.append('%s %d' % (metric_name, counters[name]))
+        metric_name = '%sbundle_output_bytes' % Metrics.PROMETHEUS_PREFIX
+        lines.append('# HELP %s The size of each file written for each bundle.' % metric_name)
+        lines.append('# TYPE %s gauge' % metric_name)
+        for bundle_path, sizes in sorted(self.output_sizes.iteritems()):
+            for output_path, size in sorted(sizes.iteritems()):
+                lines.append('%s{bundle="%s",output="%s"} %d' % (metric_name, _escape_label_value(bundle_path),
+                    _escape_label_value(output_path), size))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path_to_file, format=JSON):
+        """
+        Write the counters and output sizes to a file.
+        Arguments:
+        path_to_file -- The path of the file to be written.
+        format -- One of FORMATS.
+        """
+        if format == Metrics.PROMETHEUS:
+            content = self.to_prometheus()
+        elif format == Metrics.JSON:
+            content = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        else:
+            raise Exception('Unknown metrics format %r' % format)
+        write_file_atomically(path_to_file, content)
+
+
+def _escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,200 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import threading
+
+from Minification import Minification
+
+
+class MinificationCache:
+    """
+    Reuses the minified content of content that has already been minified by an
+    identically configured minifier. Minified content is stored in a DiskCache so that
+    unchanged bundles are not minified again by successive runs.
+    """
+
+    def __init__(self, disk_cache=None):
+        """
+        Arguments:
+        disk_cache -- An optional DiskCache in which minified content is stored. Without
+        one, every resource is minified.
+        """
+        self._disk_cache = disk_cache
+        # The minified pieces of bundles, which are shared by many bundles in a run
+        self._pieces = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        """
+        The number of minifications that were reused instead of running the minifier.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of resources the minifier had to minify.
+        """
+        return self._misses
+
+    @staticmethod
+    def _key(minifier, resource):
+        """
+        The key of the minification of the resource by the minifier, or None if the
+        resource has no content or is already minified.
+        """
+        if resource.minified:
+            return None
+        content_hash = resource.content_hash
+        if content_hash is None:
+            return None
+        return MinificationCache._key_for_content_hash(minifier, content_hash)
+
+    @staticmethod
+    def _key_for_content_hash(minifier, content_hash):
+        return hashlib.sha1('\n'.join([minifier.fingerprint, content_hash])).hexdigest()
+
+    def _get(self, key):
+        """
+        Get a good Minification of the content stored for the key, or None if there is none.
+        """
+        if self._disk_cache is None:
+            return None
+        content = self._disk_cache.get(key)
+        if content is None:
+            return None
+        minification = Minification()
+        minification.set_content(content)
+        minification.mark_as_good()
+        return minification
+
+    def _set(self, key, minification):
+        """
+        Store the content of a good minification.
+        """
+        if self._disk_cache is not None and minification.good and minification.content is not None:
+            try:
+                self._disk_cache.set(key, minification.content)
+            except (IOError, OSError):
+                pass  # The cache is an optimization, so a read-only or full disk is not an error
+
+    def _count(self, hits, misses):
+        self._lock.acquire()
+        try:
+            self._hits += hits
+            self._misses += misses
+        finally:
+            self._lock.release()
+
+    def minify_content(self, minifier, content, file_type):
+        """
+        Get the Minification of content held in memory by the minifier, reusing the
+        minified content of identical content.
+        Arguments:
+        minifier -- The Minifier to be run.
+        content -- The string to be minified.
+        file_type -- The type of the content, e.g. javascript or css.
+        """
+        key = MinificationCache._key_for_content_hash(minifier, hashlib.sha1(content).hexdigest())
+        minification = self._get(key)
+        if minification is not None:
+            self._count(1, 0)
+            return minification
+        self._count(0, 1)
+        minification = minifier.minify_content(content, file_type)
+        self._set(key, minification)
+        return minification
+
+    def minify_content_batch(self, minifier, contents, file_type):
+        """
+        Get the Minifications of several strings of the same type by the minifier, in the
+        same order. The strings that have not been minified before are passed to the
+        minifier's minify_content_batch together, each distinct string once.
+        Arguments:
+        minifier -- The Minifier to be run.
+        contents -- A list of the strings to be minified.
+        file_type -- The type of the content, e.g. javascript or css.
+        Remarks:
+        This is used to minify the pieces of bundles, so good minifications are also kept
+        in memory for the rest of the run, whether or not there is a disk cache.
+        """
+        keys = [MinificationCache._key_for_content_hash(minifier, hashlib.sha1(content).hexdigest())
+            for content in contents]
+        minifications_by_key = {}
+        missing_keys = []
+        missing_contents = []
+        for key, content in zip(keys, contents):
+            if key in minifications_by_key or key in missing_keys:
+                continue
+            minification = self._pieces.get(key) or self._get(key)
+            if minification is None:
+                missing_keys.append(key)
+                missing_contents.append(content)
+            else:
+                minifications_by_key[key] = minification
+        self._count(len(contents) - len(missing_keys), len(missing_keys))
+
+        if len(missing_keys) > 0:
+            for key, minification in zip(missing_keys, minifier.minify_content_batch(missing_contents, file_type)):
+                minifications_by_key[key] = minification
+                self._set(key, minification)
+        for key, minification in minifications_by_key.iteritems():
+            if minification.good:
+                self._pieces[key] = minification
+        return [minifications_by_key[key] for key in keys]
+
+    def minify_batch(self, minifier, resources):
+        """
+        Get the Minifications of the resources by the minifier, in the same order, reusing
+        the minified content of unchanged resources. The resources that are not in the
+        cache are passed to the minifier's minify_batch together.
+        Arguments:
+        minifier -- The Minifier to be run.
+        resources -- A list of the Resources to be minified.
+        Remarks:
+        Only the content of good minifications is stored. A minification that failed is
+        repeated by the next build. The cache can be used by several threads at once.
+        """
+        minifications = [None] * len(resources)
+        keys = [None] * len(resources)
+        if self._disk_cache is not None:
+            for position, resource in enumerate(resources):
+                keys[position] = MinificationCache._key(minifier, resource)
+                if keys[position] is not None:
+                    minifications[position] = self._get(keys[position])
+
+        positions = [position for position, minification in enumerate(minifications) if minification is None]
+        self._count(len(resources) - len(positions), len(positions))
+        if len(positions) == 0:
+            return minifications
+
+        for position, minification in zip(positions, minifier.minify_batch([resources[p] for p in positions])):
+            minifications[position] = minification
+            if keys[position] is not None:
+                self._set(keys[position], minification)
+        return minifications
@@ -22,8 +22,12 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+import os
+import tempfile
+
 from Resource import Resource
 from Minification import Minification
+from helpers import fingerprint
 
 
 class Minifier():
@@ -35,3 +39,65 @@ class Minifier():
         if resource is not None and not isinstance(resource, Resource):
             raise Exception('minify must be called with a Resource instance')
         return Minification()
+
+    def minify_content(self, content, file_type):
+        """
+        Minify content that is held in memory rather than in a file and return a
+        Minification.
+        Arguments:
+        content -- The string to be minified.
+        file_type -- The type of the content, e.g. javascript or css.
+        Remarks:
+        This implementation writes the content to a temporary file and passes it to
+        minify. Minifiers that can read content directly override it.
+        """
+        extensions = Resource.extensions_for_file_type(file_type)
+        if len(extensions) == 0:
+            raise Exception('minify_content cannot minify content of type %r' % file_type)
+        fd, temp_file_path = tempfile.mkstemp(suffix='.' + sorted(extensions)[0])
+        f = os.fdopen(fd, 'wb')
+        try:
+            f.write(content)
+        finally:
+            f.close()
+        try:
+            return self.minify(Resource(temp_file_path))
+        finally:
+            os.remove(temp_file_path)
+
+    def minify_batch(self, resources):
+        """
+        Minify several resources and return a list of their Minifications in the same
+        order. Minifiers that run an external tool override this to minify all of the
+        resources with a single run of the tool.
+        Arguments:
+        resources -- A list of Resource instances.
+        """
+        return [self.minify(resource) for resource in resources]
+
+    def minify_content_batch(self, contents, file_type):
+        """
+        Minify several strings of the same type and return a list of their Minifications
+        in the same order. Minifiers that run an external tool override this to minify
+        all of the strings with a single run of the tool.
+        Arguments:
+        contents -- A list of the strings to be minified.
+        file_type -- The type of the content, e.g. javascript or css.
+        """
+        return [self.minify_content(content, file_type) for content in contents]
+
+    @property
+    def fingerprint(self):
+        """
+        A string that changes whenever the minification of unchanged content could change: the
+        class, its options and the versions of the external tools it runs.
+        """
+        if getattr(self, '_fingerprint', None) is None:
+            self._fingerprint = fingerprint(self.__class__, getattr(self, '_options', None), self._tool_versions())
+        return self._fingerprint
+
+    def _tool_versions(self):
+        """
+        A list of strings identifying the versions of the external tools used by minify.
+        """
+        return []
@@ -0,0 +1,204 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import thread
+import threading
+import time
+
+from helpers import write_json_file_atomically
+
+
+class Profiler:
+    """
+    Records how long each phase of a build and each bundle, resource and external tool
+    takes, as spans that can be written as Chrome trace events and opened in a trace
+    viewer such as chrome://tracing.
+    Remarks:
+    Spans are recorded with Profiler.span wherever the work is done rather than being
+    passed a profiler. When Profiler.active is None, which is the default, span returns
+    a shared span that does nothing, so profiling costs almost nothing when it is off.
+    """
+
+    # The profiler in which spans are recorded, or None if profiling is off
+    active = None
+
+    # The categories of spans. Phases are the steps of a run, each bundle is built in a
+    # bundle span, resource spans cover the analysis and minification of single files,
+    # tool spans cover the external processes that are run, and write spans cover the
+    # output files that are written.
+    PHASE = 'phase'
+    BUNDLE = 'bundle'
+    RESOURCE = 'resource'
+    TOOL = 'tool'
+    WRITE = 'write'
+
+    # The categories of the spans listed by summary
+    SUMMARY_CATEGORIES = [RESOURCE, TOOL]
+
+    def __init__(self, start_time=None):
+        """
+        Arguments:
+        start_time -- The time from which the timestamps of the spans are measured, by
+        default the time at which the profiler is created. Profilers in other processes
+        use the same start time so that their spans can be combined.
+        """
+        self._start_time = time.time() if start_time is None else start_time
+        self._events = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def span(name, category, **args):
+        """
+        Return a span to be used in a with statement that records how long its block takes
+        in the active profiler.
+        Arguments:
+        name -- A description of the work, such as the path of a file.
+        category -- One of the span categories, such as Profiler.PHASE.
+        args -- Any other details to record with the span.
+        """
+        profiler = Profiler.active
+        if profiler is None:
+            return _NO_SPAN
+        return _Span(profiler, name, category, args)
+
+    @property
+    def start_time(self):
+        return self._start_time
+
+    @property
+    def events(self):
+        """
+        A list of the spans recorded so far, as Chrome trace event dictionaries.
+        """
+        self._lock.acquire()
+        try:
+            return list(self._events)
+        finally:
+            self._lock.release()
+
+    def add_span(self, name, category, start, end, args=None):
+        """
+        Record a span.
+        Arguments:
+        name -- A description of the work.
+        category -- The category of the span.
+        start -- The time at which the work started, as returned by time.time().
+        end -- The time at which the work ended.
+        args -- An optional dictionary of other details to record with the span.
+        """
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': int((start - self._start_time) * 1000000),
+            'dur': int((end - start) * 1000000),
+            'pid': os.getpid(),
+            'tid': thread.get_ident()
+        }
+        if args:
+            event['args'] = args
+        self.add_events([event])
+
+    def add_events(self, events):
+        """
+        Add events recorded by another profiler, such as one in a worker process.
+        Arguments:
+        events -- A list of events from the events property of the other profiler.
+        """
+        self._lock.acquire()
+        try:
+            self._events.extend(events)
+        finally:
+            self._lock.release()
+
+    def write(self, path_to_file):
+        """
+        Write the spans to a file in the Chrome trace event format.
+        Arguments:
+        path_to_file -- The path of the JSON file to be written.
+        """
+        write_json_file_atomically(path_to_file, {'traceEvents': self.events, 'displayTimeUnit': 'ms'})
+
+    def slowest(self, count, categories=None):
+        """
+        Return a list of at most count of the longest spans, longest first.
+        Arguments:
+        count -- The number of spans to return.
+        categories -- An optional list of the categories of the spans to include.
+        """
+        events = [event for event in self.events if categories is None or event['cat'] in categories]
+        return sorted(events, key=lambda event: -event['dur'])[:count]
+
+    def summary(self, count=10):
+        """
+        Return a description of the time taken by each phase and of the slowest
+        resources and tool runs.
+        Arguments:
+        count -- The number of resources and tool runs to list.
+        """
+        lines = ['Phases:']
+        for event in sorted(self.events, key=lambda event: event['ts']):
+            if event['cat'] == Profiler.PHASE:
+                lines.append('  %10.1f ms  %s' % (event['dur'] / 1000.0, event['name']))
+        lines.append('Slowest resources and tools:')
+        for event in self.slowest(count, Profiler.SUMMARY_CATEGORIES):
+            lines.append('  %10.1f ms  %-8s  %s' % (event['dur'] / 1000.0, event['cat'], event['name']))
+        return '\n'.join(lines)
+
+
+class _Span:
+    """
+    Records the time taken by the block of a with statement in a profiler.
+    """
+
+    def __init__(self, profiler, name, category, args):
+        self._profiler = profiler
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._profiler.add_span(self._name, self._category, self._start, time.time(), self._args)
+        return False
+
+
+class _NoSpan:
+    """
+    A span that records nothing, used when profiling is off.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
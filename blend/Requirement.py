@@ -82,3 +82,15 @@ class RequirementNotSatisfiedException(Exception):
 
     def __unicode__(self):
         return "Requirement:\n\t%s\nSearch paths:\n\t%s" % (self.requirement.name, '\n\t'.join(self.paths.search_paths))
+
+
+class CircularRequirementException(Exception):
+    def __init__(self, cycle, *args, **kwargs):
+        super(CircularRequirementException, self).__init__(*args, **kwargs)
+        self.cycle = cycle
+
+    def __str__(self):
+        return self.__unicode__()
+
+    def __unicode__(self):
+        return "Requirement cycle:\n\t%s" % '\n\trequires '.join([resource.path_to_file for resource in self.cycle])
@@ -22,12 +22,17 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+import codecs
+import hashlib
+import mmap
 import os
 import re
-from copy import deepcopy
 import sys
 
-from Requirement import Requirement, RequirementNotSatisfiedException
+from Metrics import Metrics
+from Requirement import Requirement
+from ResourceCache import ResourceCache
+from helpers import stat_or_none
 
 
 class Resource:
@@ -36,8 +41,42 @@ class Resource:
     """
 
     # The load() class method caches Resources instances here to avoid loading
-    # files multiple times.
-    cache = {}
+    # files multiple times. Set cache.max_bytes to limit the content held in memory.
+    cache = ResourceCache()
+
+    # The processable file types of files with each lower case file name extension.
+    # Files with any other extension have the 'unknown' file type.
+    FILE_TYPES_BY_EXTENSION = {
+        'js': 'javascript',
+        'javascript': 'javascript',
+        'css': 'css'
+    }
+
+    # Files of at least this many bytes are memory mapped rather than read into memory
+    # when their content is loaded. None disables memory mapping. Mapping is only used
+    # on platforms where reading a file in text mode does not translate line endings,
+    # so that requirement positions are the same whether or not a file is mapped.
+    mmap_threshold = None
+
+    # How the requirements of a file are found. With FULL_SCAN the whole file is searched.
+    # With HEADER_SCAN only the comments, directives and whitespace at the top of the file
+    # are read, up to the first other token, and the rest of the file is only read when its
+    # content is needed.
+    FULL_SCAN = 'full'
+    HEADER_SCAN = 'header'
+    REQUIREMENT_SCANS = [FULL_SCAN, HEADER_SCAN]
+    requirement_scan = FULL_SCAN
+
+    # The number of bytes read at a time while scanning the header of a file
+    HEADER_READ_SIZE = 4096
+
+    # The comments, directives and whitespace that can appear in the header of a file of
+    # each type. Each also matches a token cut off by the end of the content that has been
+    # read, so that scanning continues once more of the file has been read.
+    HEADER_TOKEN_RES = {
+        'javascript': re.compile(r'\s+|//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)|/\Z'),
+        'css': re.compile(r'\s+|/\*[\s\S]*?(?:\*/|\Z)|/\Z|@(?:import|charset)\b[^;{]*(?:;|\Z)|@[a-z]*\Z')
+    }
 
     @staticmethod
     def _validate_path_to_file(path_to_file):
@@ -52,17 +91,20 @@ class Resource:
             raise Exception('The path_to_file argument must be set to a string')
 
     @staticmethod
-    def load(path_to_file):
+    def load(path_to_file, metadata_index=None):
         """
-        Returns a Resource instance from the global cache if it exists, otherwise
-        creates and returns a new Resource instance.
+        Returns a Resource instance from the global cache if it exists and the file
+        has not changed since it was cached, otherwise creates and returns a new
+        Resource instance.
 
         path_to_file -- The path at which the physical file is/will be located.
+        metadata_index -- An optional MetadataIndex from which new Resource instances
+        for unchanged files are restored without reading the file.
         """
         Resource._validate_path_to_file(path_to_file)
-        if path_to_file not in Resource.cache:
-            Resource.cache[path_to_file] = Resource(path_to_file)
-        return Resource.cache[path_to_file]
+        if metadata_index is None:
+            return Resource.cache.get(path_to_file, lambda path, stat: Resource(path, stat=stat))
+        return Resource.cache.get(path_to_file, metadata_index.load)
 
     @staticmethod
     def reload(path_to_file):
@@ -73,22 +115,126 @@ class Resource:
         path_to_file -- The path at which the physical file is/will be located.
         """
         Resource._validate_path_to_file(path_to_file)
-        if path_to_file in Resource.cache:
-            Resource.cache.remove(path_to_file)
+        Resource.cache.invalidate(path_to_file)
         return Resource.load(path_to_file)
 
-    def __init__(self, path_to_file):
+    def __init__(self, path_to_file, metadata=None, stat=None):
         """
         Arguments:
         path_to_file -- The path at which the physical file is/will be located.
+        metadata -- An optional dictionary previously returned by the metadata property
+        of a Resource for the same, unchanged file.
+        stat -- An optional result of os.stat for the file, from which the size is taken
+        without another stat.
+        Remarks:
+        The file is not read when the Resource is created. The content is read the first
+        time it is accessed and the requirements are parsed the first time they are
+        accessed.
         """
         Resource._validate_path_to_file(path_to_file)
 
         self._path_to_file = path_to_file
         self._extension, self._file_type = Resource._parse_extension_and_file_type(path_to_file)
-        self._base_name, self._minified = Resource._parse_base_name_and_minification_status(path_to_file)
-        self._set_content_and_size(path_to_file)
-        self._set_requirements()
+        self._content = None
+        self._mapped_content = None
+        self._content_loaded = False
+        self._content_hash = None
+        if metadata is None:
+            self._base_name, self._minified = Resource._parse_base_name_and_minification_status(path_to_file)
+            self._size = None
+            if stat is not None and self._file_type != 'unknown':
+                self._size = stat.st_size
+            self._requirements = None
+            self._requirements_parsed = False
+        else:
+            self._set_metadata(metadata)
+
+    def _set_metadata(self, metadata):
+        """
+        Set the member variables from a dictionary returned by the metadata property
+        without reading the file.
+        Arguments:
+        metadata -- A dictionary returned by the metadata property.
+        """
+        self._base_name = str(metadata['base_name'])
+        self._minified = metadata['minified']
+        self._size = metadata['size']
+        self._content_hash = metadata['content_hash']
+        if metadata['requirements'] is None:
+            self._requirements = None
+        else:
+            self._requirements = [Requirement(str(name), tuple(insert_location))
+                for name, insert_location in metadata['requirements']]
+        self._requirements_parsed = True
+
+    def _read_content(self):
+        """
+        Read and return the content of the file without storing it, or return None if the
+        file does not exist or does not have a processable file type.
+        """
+        if os.path.exists(self._path_to_file) and self._file_type != 'unknown':
+            f = open(self._path_to_file, 'r')
+            try:
+                content = f.read()
+            finally:
+                f.close()
+            Metrics.increment('bytes_read', len(content))
+            return content
+        else:
+            return None
+
+    def _read_header(self):
+        """
+        Read and return the header of the file without reading the rest of it, or return
+        None if the file does not exist or does not have a processable file type.
+        """
+        if os.path.exists(self._path_to_file) and self._file_type != 'unknown':
+            f = open(self._path_to_file, 'r')
+            try:
+                content = ''
+                position = 0
+                while True:
+                    data = f.read(Resource.HEADER_READ_SIZE)
+                    content += data
+                    position, finished = Resource._scan_header(content, self._file_type, position, not data)
+                    if finished:
+                        break
+            finally:
+                f.close()
+            Metrics.increment('bytes_read', len(content))
+            return content[:position]
+        else:
+            return None
+
+    @staticmethod
+    def _scan_header(content, file_type, position=0, complete=True):
+        """
+        Scan the comments, directives and whitespace at the start of a file and return a
+        tuple of a position and whether the end of the header was found. If it was, the
+        position is the end of the header. Otherwise, the position is the start of the
+        token at which scanning should continue once more of the file has been read.
+        Arguments:
+        content -- The part of the file that has been read.
+        file_type -- The file type of the file.
+        position -- The position at which to start scanning.
+        complete -- Whether the content is the whole file.
+        """
+        token_re = Resource.HEADER_TOKEN_RES[file_type]
+        length = len(content)
+        if position == 0:
+            # A byte order mark is not a token, but it may precede the header
+            if not complete and codecs.BOM_UTF8.startswith(content):
+                return position, False
+            if content.startswith(codecs.BOM_UTF8):
+                position = len(codecs.BOM_UTF8)
+        while position < length:
+            m = token_re.match(content, position)
+            if m is None:
+                return position, True
+            if m.end() == length and not complete:
+                return position, False
+            position = m.end()
+        return position, complete
 
     def _set_content_and_size(self, path_to_file):
         """
@@ -98,29 +244,99 @@ class Resource:
         path_to_file -- The path at which the physical file is be located.
         Remarks:
         If path_to_file specifies a non-existent file the _content member variable is
-        set to None
-        """
-        if os.path.exists(path_to_file) and self._file_type != 'unknown':
-            self._size = os.path.getsize(path_to_file)
-            f = open(path_to_file, 'r')
-            try:
-                self._content = f.read()
-            finally:
-                f.close()
+        set to None. If the file is at least mmap_threshold bytes it is memory mapped into
+        the _mapped_content member variable and the _content member variable is set to None.
+        """
+        self._content = None
+        self._mapped_content = None
+        stat = stat_or_none(path_to_file) if self._file_type != 'unknown' else None
+        if stat is not None:
+            self._size = stat.st_size
+            if Resource._should_map(self._size):
+                self._mapped_content = self._map_content()
+            else:
+                self._content = self._read_content()
         else:
-            self._content = None
             self._size = 0
+        self._content_hash = None
+        self._content_loaded = True
+        Resource.cache.record_access(self)
+
+    @staticmethod
+    def _should_map(size):
+        """
+        Whether or not a file of the specified size should be memory mapped.
+        Arguments:
+        size -- The size of the file in bytes.
+        """
+        return (Resource.mmap_threshold is not None and os.linesep == '\n' and
+            size > 0 and size >= Resource.mmap_threshold)
+
+    def _map_content(self):
+        """
+        Memory map the file read-only and return the mmap object.
+        """
+        f = open(self._path_to_file, 'rb')
+        try:
+            # The mapping remains valid after the file is closed
+            mapped_content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        Metrics.increment('bytes_read', len(mapped_content))
+        return mapped_content
+
+    def _get_loaded_content(self):
+        """
+        Return the memory mapped content if the file is mapped, otherwise the content
+        string. Regular expressions, hashing and slicing work the same on either.
+        """
+        if not self._content_loaded:
+            self._set_content_and_size(self._path_to_file)
+        else:
+            Resource.cache.record_access(self)
+        if self._mapped_content is not None:
+            return self._mapped_content
+        return self._content
+
+    def release_content(self):
+        """
+        Release the loaded content of the file so that the memory can be reclaimed. The
+        content is read again the next time it is accessed.
+        Remarks:
+        A memory mapping is not closed explicitly because views of it may still be in use.
+        It is closed when the last reference to it is released.
+        """
+        self._content = None
+        self._mapped_content = None
+        self._content_loaded = False
 
     def _set_requirements(self):
         """
         Parse the content of the file and set the _requirements member variable to a
         list Requirement objects.
         Remarks:
-        Must be called AFTER _set_content() is called and after self._file_type is set.
+        With FULL_SCAN the content is loaded to find the requirements and kept, within
+        the memory budget of Resource.cache, so that building the file does not read it
+        again. With HEADER_SCAN only the header is searched, and only the header is read
+        if the content has not been loaded.
         """
         self._requirements = None
+        self._requirements_parsed = True
 
-        if self._file_type == 'unknown' or self._content is None:
+        if self._file_type == 'unknown':
+            return
+
+        if Resource.requirement_scan == Resource.HEADER_SCAN:
+            if self._content_loaded:
+                content = self._get_loaded_content()
+                if content is not None:
+                    content = content[:Resource._scan_header(content, self._file_type)[0]]
+            else:
+                content = self._read_header()
+        else:
+            content = self._get_loaded_content()
+
+        if content is None:
             return
 
         if self._file_type == 'javascript':
@@ -130,7 +346,7 @@ class Resource:
 
         # This loop expects each match to have 2 groups. The first group captures the
         # punctuation mark around the file name and the second captures the name itself
-        for result in require_re.finditer(self._content):
+        for result in require_re.finditer(content):
             if self._file_type == 'javascript':
                 name = str(result.groups()[0])
             else:
@@ -154,15 +370,17 @@ class Resource:
         """
         base_name, ext = os.path.splitext(path_to_file)
         ext = ext.lower()[1:]
+        return ext, Resource.FILE_TYPES_BY_EXTENSION.get(ext, 'unknown')
 
-        if ext == 'js' or ext == 'javascript':
-            file_type = 'javascript'
-        elif ext == 'css':
-            file_type = 'css'
-        else:
-            file_type = 'unknown'
-
-        return ext, file_type
+    @staticmethod
+    def extensions_for_file_type(file_type):
+        """
+        Get a list of the lower case file name extensions of files with the specified
+        file type.
+        Arguments:
+        file_type -- The string name of a processable file type. Can be javascript or css.
+        """
+        return [ext for ext, ext_file_type in Resource.FILE_TYPES_BY_EXTENSION.iteritems() if ext_file_type == file_type]
 
     @staticmethod
     def _parse_base_name_and_minification_status(path_to_file):
@@ -209,16 +427,97 @@ class Resource:
     @property
     def size(self):
         """
-        The path at which the physical file is/will be located.
+        The size of the file in bytes, or 0 if the file does not exist or does not have a
+        processable file type.
         """
+        if self._size is None:
+            if os.path.exists(self._path_to_file) and self._file_type != 'unknown':
+                self._size = os.path.getsize(self._path_to_file)
+            else:
+                self._size = 0
         return self._size
 
+    @property
+    def loaded_size(self):
+        """
+        The number of bytes of content held in memory, which is 0 if the content has not
+        been loaded or is memory mapped.
+        """
+        if self._content is None:
+            return 0
+        return len(self._content)
+
     @property
     def content(self):
         """
         The contents of the file.
         """
-        return self._content
+        content = self._get_loaded_content()
+        if self._mapped_content is not None:
+            # Copies the mapped file into a string. Use content_view to avoid the copy.
+            return content[:]
+        return content
+
+    def content_view(self, start=None, end=None):
+        """
+        Get a read-only view of the content, or a part of it, that does not copy the
+        content. Returns None if the resource has no content.
+        Arguments:
+        start -- The optional position of the first character in the view.
+        end -- The optional position after the last character in the view.
+        """
+        content = self._get_loaded_content()
+        if content is None:
+            return None
+        length = len(content)
+        start, end, step = slice(start, end).indices(length)
+        try:
+            # Python 2 files can only write old style buffers, which also work with mmap
+            return buffer(content, start, max(end - start, 0))
+        except NameError:
+            return memoryview(content)[start:end]
+
+    @property
+    def content_hash(self):
+        """
+        A hex digest of the SHA-1 hash of the contents of the file, or None if the file
+        has no content.
+        """
+        if self._content_hash is None:
+            if self._content_loaded:
+                content = self._get_loaded_content()
+            else:
+                content = self._read_content()
+            if content is not None:
+                self._content_hash = hashlib.sha1(content).hexdigest()
+        return self._content_hash
+
+    @property
+    def metadata(self):
+        """
+        A dictionary of the properties derived from the content of the file that can be
+        serialized as JSON and passed back to the constructor to avoid reading the file.
+        Remarks:
+        With HEADER_SCAN the content hash is only included if the content has already been
+        hashed, so that getting the metadata does not read the whole file.
+        """
+        if self.requirements is None:
+            requirements = None
+        else:
+            requirements = [[requirement.name, list(requirement.insert_location)]
+                for requirement in self.requirements]
+        if Resource.requirement_scan == Resource.HEADER_SCAN:
+            content_hash = self._content_hash
+        else:
+            content_hash = self.content_hash
+        return {
+            'base_name': self.base_name,
+            'minified': self.minified,
+            'size': self.size,
+            'content_hash': content_hash,
+            'requirements': requirements,
+            'requirement_scan': Resource.requirement_scan
+        }
 
     @property
     def extension(self):
@@ -257,11 +556,13 @@ class Resource:
         """
         The descriptions of the the other resources on which this resource depends.
         """
+        if not self._requirements_parsed:
+            self._set_requirements()
         return self._requirements
 
-    def get_chunks_by_merging_requirements_from_paths(self, paths, previously_merged):
+    def get_chunks_by_merging_requirements_from_paths(self, paths, previously_merged, index=None, graph=None):
         if self.requirements:
-            map = self.map_requirements(paths, map={}, previously_required=[])
+            graph = self._get_graph(paths, index, graph)
 
             chunks_and_requirements = []
             position = 0
@@ -271,15 +572,17 @@ class Resource:
                     chunks_and_requirements.append(Chunk(self, position, requirement.insert_location[0]))
                 chunks_and_requirements.append(requirement)
                 position = requirement.insert_location[1]
-            if position < len(self.content):
+            # The last chunk runs to the end of the content, so the content is not loaded here
+            if position < self.size:
                 chunks_and_requirements.append(Chunk(self, position))
 
             chunks = []
             for chunk_or_requirement in chunks_and_requirements:
                 if isinstance(chunk_or_requirement, Requirement):
-                    resource = map[chunk_or_requirement.standard_name]['resource']
+                    resource = graph.required_resource(self, chunk_or_requirement)
                     if resource.base_name not in previously_merged:
-                        chunks = chunks + resource.get_chunks_by_merging_requirements_from_paths(paths, previously_merged)
+                        chunks.extend(resource.get_chunks_by_merging_requirements_from_paths(paths, previously_merged,
+                            graph=graph))
                     previously_merged.append(resource.base_name)
                 else:
                     chunks.append(chunk_or_requirement)
@@ -288,70 +591,93 @@ class Resource:
         else:
             return [Chunk(self)]
 
-    def merge_requirements_from_paths(self, paths, previously_merged):
-        chunks = self.get_chunks_by_merging_requirements_from_paths(paths, previously_merged)
+    def merge_requirements_from_paths(self, paths, previously_merged, index=None, graph=None):
+        chunks = self.get_chunks_by_merging_requirements_from_paths(paths, previously_merged, index, graph)
         return ''.join([chunk.content for chunk in chunks])
 
+    def _get_graph(self, paths, index=None, graph=None):
+        """
+        Return a DependencyGraph that contains this resource, creating one if necessary.
+        Arguments:
+        paths -- A Paths instance defining where to search for files.
+        index -- An optional ResourceIndex of the paths used when creating a new graph.
+        graph -- An optional existing DependencyGraph.
+        Remarks:
+        Raises a CircularRequirementException if adding this resource creates a cycle.
+        """
+        if graph is None:
+            # DependencyGraph depends on this module, so it cannot be imported at the top level
+            from DependencyGraph import DependencyGraph
+            if index is None:
+                index = Resource._create_index(paths)
+            graph = DependencyGraph(index, [self])
+        elif self not in graph:
+            graph.add(self)
+            graph.check_for_cycles()
+        return graph
+
     def distance_to_file(self, path2):
-        abspath1 = os.path.abspath(self.path_to_file)
-        abspath2 = os.path.abspath(path2)
+        """
+        A number that is lower the nearer the file at path2 is to this resource. Files in
+        the same directory are nearest. Otherwise the distance is measured through the
+        deepest directory containing both files, and a file that is further down from that
+        directory is always nearer than a file for which it is further up from this resource.
+        Arguments:
+        path2 -- The path of the other file.
+        Remarks:
+        ResourceIndex.find_nearest makes the same choice without comparing every candidate.
+        """
+        dir1 = os.path.dirname(os.path.abspath(self.path_to_file))
+        dir2 = os.path.dirname(os.path.abspath(path2))
 
         # If the files are in the same directory, return the smallest possible
         # integer as the distance.
-        if os.path.dirname(abspath1) == os.path.dirname(abspath2):
+        if dir1 == dir2:
             return -1 * sys.maxint
 
+        upward_distances = {}
+        upward_distance = 0
+        while dir1 not in upward_distances:
+            upward_distances[dir1] = upward_distance
+            dir1 = os.path.dirname(dir1)
+            upward_distance += 1
+
         downward_distance = 0
-        dir2_head = os.path.dirname(abspath2)
-        dir2_tail = None
-        while dir2_tail != '':
-            dir1_head = os.path.dirname(os.path.abspath(self.path_to_file))
-            dir1_tail = None
-            upward_distance = 0
-            while dir1_tail != '':
-                if dir2_head == dir1_head:
-                    # Lower distance is always better, and downward is always preferable to upward.
-                    # The weight of 100000 applied to the upward distance is arbitrary, but practically
-                    # ensures that a downward match always has a lower distance in all practical cases.
-                    return (-1 * sys.maxint) + downward_distance + (upward_distance * 100000)
-                dir1_head, dir1_tail = os.path.split(dir1_head)
-                upward_distance += 1
-            dir2_head, dir2_tail = os.path.split(dir2_head)
+        while True:
+            if dir2 in upward_distances:
+                # Lower distance is always better, and downward is always preferable to upward.
+                # The weight of 100000 applied to the upward distance is arbitrary, but practically
+                # ensures that a downward match always has a lower distance in all practical cases.
+                return (-1 * sys.maxint) + downward_distance + (upward_distances[dir2] * 100000)
+            parent = os.path.dirname(dir2)
+            if parent == dir2:
+                break
+            dir2 = parent
             downward_distance += 1
 
         # If the two paths do not share anything in common, return
         # the largest possible distance.
         return sys.maxint
 
-    def map_requirements(self, paths, map, previously_required):
+    def map_requirements(self, paths, map, previously_required, index=None, graph=None):
         if self.requirements:
-            for requirement in self.requirements:
-                map[requirement.standard_name] = None
-
-                resources_of_the_same_type = Resource.find_all_of_type_in_paths(self.file_type, paths)
-
-                if resources_of_the_same_type is not None:
-                    matching_resources = []
-                    for resource in resources_of_the_same_type:
-                        if resource.base_name == requirement.standard_name:
-                            matching_resources.append(resource)
-
-                    matching_resources_in_order = sorted(matching_resources,
-                        key=lambda item: self.distance_to_file(item.path_to_file))
-
-                    if len(matching_resources_in_order) > 0:
-                        resource = matching_resources_in_order[0]
-                        new_previously_required = deepcopy(previously_required)
-                        new_previously_required.append(requirement.standard_name)
-                        resource.map_requirements(paths, map, new_previously_required)
-
-                        map[requirement.standard_name] = {
-                            'resource': resource,
-                            'previously_required': deepcopy(previously_required)
-                        }
-
-                if not map[requirement.standard_name]:
-                    raise RequirementNotSatisfiedException(requirement, paths)
+            graph = self._get_graph(paths, index, graph)
+
+            # Each resource is visited once, so a resource required by several others
+            # is only mapped once.
+            visited = set([self])
+            pending = [(self, previously_required)]
+            while pending:
+                resource, required_before = pending.pop()
+                for requirement in resource.requirements or []:
+                    required_resource = graph.required_resource(resource, requirement)
+                    map[requirement.standard_name] = {
+                        'resource': required_resource,
+                        'previously_required': list(required_before)
+                    }
+                    if required_resource not in visited:
+                        visited.add(required_resource)
+                        pending.append((required_resource, required_before + [requirement.standard_name]))
 
         return map
 
@@ -364,11 +690,10 @@ class Resource:
         file_type -- The string name of the type of file to be found. Can be unknown, javascript, or css
         paths -- A Paths instance defining where to search for files.
         Remarks:
-        Calls find_all_of_type_in_path for each path in the paths.
+        Builds a ResourceIndex for the paths. Resources in the output path are not
+        included.
         """
-        resources = []
-        for path in paths.search_paths:
-            resources.extend(Resource.find_all_of_type_in_path(file_type, path, skip_path=paths.output_path))
+        resources = Resource._create_index(paths).find_all_of_type(file_type)
         return resources if len(resources) > 0 else None
 
     @staticmethod
@@ -379,15 +704,19 @@ class Resource:
         Arguments:
         file_type -- The string name of the type of file to be found. Can be unknown, javascript, or css.
         path -- The base directory to be recursively searched for files.
+        skip_path -- An optional directory, such as the output path, that is not searched.
         """
+        # DirectoryWalker is only needed here, so it is imported here
+        from DirectoryWalker import DirectoryWalker
+        if skip_path is None:
+            ignore_paths = None
+        else:
+            ignore_paths = [skip_path]
+        walker = DirectoryWalker(Resource.extensions_for_file_type(file_type), ignore_paths=ignore_paths)
         resources = []
-        for dir_path, dir_names, file_names in os.walk(path):
-            if skip_path is None or os.path.abspath(dir_path) != os.path.abspath(skip_path):
-                for file_name in file_names:
-                    absolute_file_path = os.path.join(dir_path, file_name)
-                    ext, r_type = Resource._parse_extension_and_file_type(absolute_file_path)
-                    if file_type == r_type:
-                        resources.append(Resource.load(absolute_file_path))
+        for dir_path, file_names in walker.walk(path):
+            for file_name in file_names:
+                resources.append(Resource.load(os.path.join(dir_path, file_name)))
         return resources
 
     @staticmethod
@@ -397,19 +726,23 @@ class Resource:
         paths that have a processable file type.
         Arguments:
         paths -- A Paths instance defining where to search for files.
+        Remarks:
+        Resources in the output path are not included.
         """
-        resources = []
-        for path in paths.search_paths:
-            resources_in_path = []
-            for dir_path, dir_names, file_names in os.walk(path):
-                for file_name in file_names:
-                    absolute_file_path = os.path.join(dir_path, file_name)
-                    ext, file_type = Resource._parse_extension_and_file_type(absolute_file_path)
-                    if file_type != 'unknown':
-                        resources_in_path.append(Resource.load(absolute_file_path))
-            resources.extend(resources_in_path)
+        resources = Resource._create_index(paths).resources
         return resources if len(resources) > 0 else None
 
+    @staticmethod
+    def _create_index(paths):
+        """
+        Walk the specified paths once and return a ResourceIndex of the resources found.
+        Arguments:
+        paths -- A Paths instance defining where to search for files.
+        """
+        # ResourceIndex imports this module, so it cannot be imported at the top level
+        from ResourceIndex import ResourceIndex
+        return ResourceIndex(paths)
+
     def __str__(self):
         return self.__unicode__()
 
@@ -448,4 +781,12 @@ class Chunk():
 
     @property
     def content(self):
-        return self._resource.content[self._start:self._end]
+        return self._resource._get_loaded_content()[self._start:self._end]
+
+    @property
+    def view(self):
+        """
+        A read-only view of the content of the chunk that does not copy the content of
+        the resource. Suitable for writing directly to a file.
+        """
+        return self._resource.content_view(self._start, self._end)
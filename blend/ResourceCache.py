@@ -0,0 +1,210 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import OrderedDict
+
+from helpers import signature_of_stat, stat_or_none
+
+
+class ResourceCache(object):
+    """
+    Caches Resource instances by path and limits the amount of file content they hold
+    in memory. When the content loaded by cached resources exceeds the memory budget,
+    the content of the least recently used resources is released. Released content is
+    read again the next time it is accessed.
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        Arguments:
+        max_bytes -- The maximum number of bytes of content that cached resources may
+        hold in memory. None means that there is no limit.
+        """
+        self._max_bytes = max_bytes
+        # path -> (resource, stat signature), ordered from least to most recently used
+        self._entries = OrderedDict()
+        # path -> bytes of content held by the cached resource, for only the resources
+        # holding content, ordered from least to most recently used so that eviction
+        # does not need to look at the resources holding nothing
+        self._loaded_bytes = OrderedDict()
+        self._total_loaded_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_bytes(self):
+        """
+        The maximum number of bytes of content that cached resources may hold in memory,
+        or None if there is no limit.
+        """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+        self._evict()
+
+    @property
+    def loaded_bytes(self):
+        """
+        The number of bytes of content currently held in memory by cached resources.
+        """
+        return self._total_loaded_bytes
+
+    @property
+    def hits(self):
+        """
+        The number of times get returned a cached resource.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of times get created a resource because the path was not cached or
+        the file had changed since it was cached.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        The number of times the content of a resource was released to stay within the
+        memory budget.
+        """
+        return self._evictions
+
+    def largest_loaded(self, count=None):
+        """
+        Return a list of the path and the number of bytes of content held in memory of
+        the cached resources holding the most content, largest first. Resources holding
+        no content are left out.
+        Arguments:
+        count -- The maximum number of resources to return, or None for all of them.
+        """
+        loaded = sorted(self._loaded_bytes.iteritems(), key=lambda item: (-item[1], item[0]))
+        if count is not None:
+            loaded = loaded[:count]
+        return loaded
+
+    def __contains__(self, path_to_file):
+        return path_to_file in self._entries
+
+    def __getitem__(self, path_to_file):
+        return self._entries[path_to_file][0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path_to_file, create_resource):
+        """
+        Return the cached resource for the path if the file has not changed since it was
+        cached, otherwise create, cache and return a new resource.
+        Arguments:
+        path_to_file -- The path at which the physical file is/will be located.
+        create_resource -- A function that accepts path_to_file and the result of os.stat
+        for it, or None if it does not exist, and returns a new Resource.
+        Remarks:
+        The file is only stat once, and the result is passed on so that creating the
+        resource does not stat it again.
+        """
+        stat = stat_or_none(path_to_file)
+        signature = signature_of_stat(stat)
+        entry = self._entries.get(path_to_file)
+        if entry is not None:
+            if entry[1] == signature:
+                self._hits += 1
+                self._touch(path_to_file)
+                return entry[0]
+            self.invalidate(path_to_file)
+
+        self._misses += 1
+        resource = create_resource(path_to_file, stat)
+        self._entries[path_to_file] = (resource, signature)
+        self.record_access(resource)
+        return resource
+
+    def invalidate(self, path_to_file):
+        """
+        Remove the resource for the path from the cache, if there is one, so that the
+        next call to get creates a new resource.
+        Arguments:
+        path_to_file -- The path at which the physical file is/will be located.
+        """
+        if path_to_file in self._entries:
+            del self._entries[path_to_file]
+            self._total_loaded_bytes -= self._loaded_bytes.pop(path_to_file, 0)
+
+    def clear(self):
+        """
+        Remove every resource from the cache.
+        """
+        self._entries.clear()
+        self._loaded_bytes.clear()
+        self._total_loaded_bytes = 0
+
+    def record_access(self, resource):
+        """
+        Mark a cached resource as the most recently used and account for the content it
+        holds in memory, releasing the content of other resources if the memory budget
+        is exceeded. Resources that are not in the cache are ignored.
+        Arguments:
+        resource -- A Resource whose content has been loaded or accessed.
+        """
+        path_to_file = resource.path_to_file
+        entry = self._entries.get(path_to_file)
+        if entry is None or entry[0] is not resource:
+            return
+        loaded_bytes = resource.loaded_size
+        self._total_loaded_bytes += loaded_bytes - self._loaded_bytes.pop(path_to_file, 0)
+        if loaded_bytes > 0:
+            self._loaded_bytes[path_to_file] = loaded_bytes
+        self._touch(path_to_file)
+        self._evict()
+
+    def _touch(self, path_to_file):
+        """
+        Move the entry for the path to the most recently used end of the cache.
+        """
+        self._entries[path_to_file] = self._entries.pop(path_to_file)
+        if path_to_file in self._loaded_bytes:
+            self._loaded_bytes[path_to_file] = self._loaded_bytes.pop(path_to_file)
+
+    def _evict(self):
+        """
+        Release the content of the least recently used resources until the content held
+        in memory is within the budget. The most recently used resource is never released.
+        """
+        if self._max_bytes is None or self._total_loaded_bytes <= self._max_bytes:
+            return
+        most_recently_used_path = next(reversed(self._entries), None)
+        while self._total_loaded_bytes > self._max_bytes:
+            path_to_file = next(iter(self._loaded_bytes), None)
+            # The most recently used resource is last, so it is the only one left
+            if path_to_file is None or path_to_file == most_recently_used_path:
+                break
+            self._entries[path_to_file][0].release_content()
+            self._total_loaded_bytes -= self._loaded_bytes.pop(path_to_file)
+            self._evictions += 1
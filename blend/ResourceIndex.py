@@ -0,0 +1,179 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+
+from Resource import Resource
+from DirectoryWalker import DirectoryWalker
+from ResourceResolver import ResourceResolver
+
+
+class ResourceIndex:
+    """
+    An index of every processable Resource found in a set of search paths. The
+    search paths are walked once when the index is created and requirements are
+    then located with a dictionary lookup keyed by (file_type, base_name).
+    """
+
+    def __init__(self, paths, metadata_index=None, thread_count=DirectoryWalker.DEFAULT_THREAD_COUNT,
+                 ignore_patterns=None):
+        """
+        Arguments:
+        paths -- A Paths instance defining where to search for files.
+        metadata_index -- An optional MetadataIndex from which resources for unchanged
+        files are restored without reading them.
+        thread_count -- The number of directories that are read at the same time while
+        walking the search paths.
+        ignore_patterns -- An optional list of glob patterns matching files and directories
+        that should not be indexed. See DirectoryWalker.
+        Remarks:
+        The output path is not walked when it is inside a search path, so previous
+        outputs are not indexed. A search path that is the output path, or is inside it,
+        is still walked.
+        """
+        self._paths = paths
+        self._metadata_index = metadata_index
+        self._walker = DirectoryWalker(Resource.FILE_TYPES_BY_EXTENSION.keys(), thread_count,
+            ignore_patterns=ignore_patterns, ignore_paths=[paths.output_path])
+        self._resources = []
+        self._resources_by_type_and_name = {}
+        self._positions_by_path = {}
+        self._directories = []
+        self._resolver = None
+        self._build()
+
+    def _build(self):
+        """
+        Walk each of the search paths in order and record every resource with a
+        processable file type.
+        """
+        for path in self._paths.search_paths:
+            # The walker only lists files with processable extensions
+            for dir_path, file_names in self._walker.walk(path, include_empty_directories=True):
+                self._directories.append(dir_path)
+                for file_name in file_names:
+                    resource = Resource.load(os.path.join(dir_path, file_name), self._metadata_index)
+                    self._positions_by_path[resource.path_to_file] = len(self._resources)
+                    self._resources.append(resource)
+                    key = (resource.file_type, resource.base_name)
+                    if key not in self._resources_by_type_and_name:
+                        self._resources_by_type_and_name[key] = []
+                    self._resources_by_type_and_name[key].append(resource)
+
+    @property
+    def paths(self):
+        """
+        The Paths instance from which the index was built.
+        """
+        return self._paths
+
+    @property
+    def resources(self):
+        """
+        A list of all the processable resources in the search paths in the order in
+        which they were found.
+        """
+        return self._resources
+
+    @property
+    def directories(self):
+        """
+        A list of every directory that was walked, including directories that do not
+        contain any processable files.
+        """
+        return self._directories
+
+    def is_ignored(self, path, is_directory):
+        """
+        Whether or not a file or directory in the search paths is skipped when they are
+        walked, because it is in the output path or it, or a directory containing it,
+        matches one of the ignore patterns. Paths outside of the search paths are not
+        ignored.
+        Arguments:
+        path -- The path of the file or directory.
+        is_directory -- Whether or not the path is a directory.
+        """
+        absolute_path = os.path.abspath(path)
+        ignored = None
+        for search_path in self._paths.search_paths:
+            absolute_search_path = os.path.abspath(search_path)
+            if absolute_path != absolute_search_path and not absolute_path.startswith(absolute_search_path + os.sep):
+                continue
+            # A path in nested search paths is indexed if any of the walks reach it
+            if not self._walker.is_ignored(search_path, path, is_directory):
+                return False
+            ignored = True
+        return bool(ignored)
+
+    def refresh(self, paths_to_files):
+        """
+        Replace the resources for files that have changed since they were indexed
+        without walking the search paths again. Paths that are not in the index are
+        ignored. Files that were added or removed are only found by a new index.
+        Arguments:
+        paths_to_files -- The paths of the changed files, as given by Resource.path_to_file.
+        """
+        for path_to_file in paths_to_files:
+            position = self._positions_by_path.get(path_to_file)
+            if position is None:
+                continue
+            previous = self._resources[position]
+            resource = Resource.load(path_to_file, self._metadata_index)
+            self._resources[position] = resource
+            resources_with_name = self._resources_by_type_and_name[(previous.file_type, previous.base_name)]
+            resources_with_name[resources_with_name.index(previous)] = resource
+        # The nearest resources are recomputed for the new instances
+        self._resolver = None
+
+    def find(self, file_type, base_name):
+        """
+        Get a list of the resources with the specified file_type and base_name in the
+        order in which they were found. Returns an empty list if there are none.
+        Arguments:
+        file_type -- The string name of the type of file to be found. Can be javascript or css.
+        base_name -- The lower case base name of the resource. See Resource.base_name.
+        """
+        return self._resources_by_type_and_name.get((file_type, base_name), [])
+
+    def find_nearest(self, file_type, base_name, directory):
+        """
+        Get the resource with the specified file_type and base_name that is nearest to the
+        directory, or None if there is no such resource. See ResourceResolver.
+        Arguments:
+        file_type -- The string name of the type of file to be found. Can be javascript or css.
+        base_name -- The lower case base name of the resource. See Resource.base_name.
+        directory -- The absolute path of the directory from which to search.
+        """
+        if self._resolver is None:
+            self._resolver = ResourceResolver(self)
+        return self._resolver.find_nearest(file_type, base_name, directory)
+
+    def find_all_of_type(self, file_type):
+        """
+        Get a list of the resources with the specified file_type in the order in which
+        they were found.
+        Arguments:
+        file_type -- The string name of the type of file to be found. Can be javascript or css.
+        """
+        return [resource for resource in self._resources if resource.file_type == file_type]
@@ -0,0 +1,107 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+
+
+class ResourceResolver:
+    """
+    Finds the resource nearest to a directory among the resources in a ResourceIndex
+    that share a file type and base name. A resource in a directory below a common
+    ancestor is always preferred to one that requires going further up the tree, the
+    same preference as Resource.distance_to_file.
+    """
+
+    def __init__(self, index):
+        """
+        Arguments:
+        index -- The ResourceIndex containing the resources to be resolved.
+        """
+        self._index = index
+        # (file_type, base_name) -> {directory: (downward distance, resource)} for every
+        # directory that contains a matching resource, directly or in a sub-directory
+        self._nearest_below = {}
+        # (file_type, directory, base_name) -> resource
+        self._resolved = {}
+
+    @staticmethod
+    def _directories_from(directory):
+        """
+        Yield the directory followed by each of its ancestors up to the root.
+        """
+        while True:
+            yield directory
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return
+            directory = parent
+
+    def _build(self, file_type, base_name):
+        """
+        Record, for each directory containing a resource with the file_type and base_name,
+        the resource that is the fewest directories below it. Ties go to the resource
+        found first by the index.
+        """
+        nearest_below = {}
+        for resource in self._index.find(file_type, base_name):
+            directory = os.path.dirname(os.path.abspath(resource.path_to_file))
+            for distance, ancestor in enumerate(ResourceResolver._directories_from(directory)):
+                if ancestor not in nearest_below or distance < nearest_below[ancestor][0]:
+                    nearest_below[ancestor] = (distance, resource)
+        self._nearest_below[(file_type, base_name)] = nearest_below
+        return nearest_below
+
+    def find_nearest(self, file_type, base_name, directory):
+        """
+        Get the resource with the specified file_type and base_name that is nearest to the
+        directory, or None if the index does not contain a matching resource.
+        Arguments:
+        file_type -- The string name of the type of file to be found. Can be javascript or css.
+        base_name -- The lower case base name of the resource. See Resource.base_name.
+        directory -- The absolute path of the directory from which to search.
+        Remarks:
+        The nearest resource is in the closest ancestor of the directory (including the
+        directory itself) that contains any matching resource and, within that ancestor,
+        is the fewest directories down. If no matching resource shares an ancestor with
+        the directory the first matching resource in the index is returned.
+        """
+        key = (file_type, directory, base_name)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        nearest_below = self._nearest_below.get((file_type, base_name))
+        if nearest_below is None:
+            nearest_below = self._build(file_type, base_name)
+
+        resource = None
+        for ancestor in ResourceResolver._directories_from(directory):
+            if ancestor in nearest_below:
+                resource = nearest_below[ancestor][1]
+                break
+        if resource is None:
+            candidates = self._index.find(file_type, base_name)
+            if len(candidates) > 0:
+                resource = candidates[0]
+        self._resolved[key] = resource
+        return resource
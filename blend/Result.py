@@ -107,6 +107,42 @@ class Result(object):
             self._errors = []
         self._errors.append(error)
 
+    def to_dict(self):
+        """
+        A dictionary of the messages, warnings, errors and status of the result that can be
+        serialized as JSON and turned back into a result with from_dict.
+        """
+        return {
+            'messages': self._messages,
+            'warnings': self._warnings,
+            'errors': self._errors,
+            'good': self._good
+        }
+
+    @classmethod
+    def from_dict(cls, result_dict):
+        """
+        Create a result from a dictionary returned by to_dict.
+        Arguments:
+        result_dict -- A dictionary returned by to_dict, possibly after a round trip through JSON.
+        """
+        result = cls()
+        result._messages = Result._to_str_list(result_dict['messages'])
+        result._warnings = Result._to_str_list(result_dict['warnings'])
+        result._errors = Result._to_str_list(result_dict['errors'])
+        result._good = result_dict['good']
+        return result
+
+    @staticmethod
+    def _to_str_list(values):
+        """
+        Encode the unicode strings produced by decoding JSON as UTF-8 so that they can be
+        joined with the str values produced by analyzers and minifiers.
+        """
+        if values is None:
+            return None
+        return [value.encode('utf-8') if isinstance(value, unicode) else value for value in values]
+
     def mark_as_good(self):
         self._good = True
 
@@ -27,6 +27,9 @@ from Analyzer import Analyzer
 
 class SizeAnalyzer(Analyzer):
 
+    # The message includes the path of the resource
+    results_depend_on_path = True
+
     def __init__(self, options=None):
         self._options = options or {}
 
@@ -0,0 +1,336 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import sys
+import time
+import traceback
+
+from Resource import Resource
+from helpers import stat_signature
+
+# pyinotify reports changes as they happen on Linux. Without it the watched files and
+# directories are polled.
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+
+class Watcher:
+    """
+    Builds the bundles of an Application and then rebuilds only the bundles affected by
+    each change to the files in the search paths. The resources are kept in memory
+    between builds, so unchanged files are not read or parsed again.
+    """
+
+    DEFAULT_POLL_INTERVAL_SECONDS = 0.25
+
+    # Changes are collected until none have been made for this long, so that saving
+    # several files at once results in a single rebuild.
+    DEFAULT_DEBOUNCE_SECONDS = 0.1
+
+    def __init__(self, application, poll_interval=DEFAULT_POLL_INTERVAL_SECONDS,
+                 debounce=DEFAULT_DEBOUNCE_SECONDS, use_inotify=True):
+        """
+        Arguments:
+        application -- The Application whose bundles are built.
+        poll_interval -- The number of seconds between checks for changes.
+        debounce -- The number of seconds without changes to wait before rebuilding.
+        use_inotify -- Whether or not to use pyinotify, if it is installed, instead of polling.
+        """
+        self._application = application
+        self._poll_interval = poll_interval
+        self._debounce = debounce
+        self._use_inotify = use_inotify and pyinotify is not None
+        self._notifier = None
+        self._events = []
+        self._index = None
+        self._graph = None
+        # path -> stat signature of every watched file and directory
+        self._signatures = {}
+
+    @property
+    def index(self):
+        """
+        The ResourceIndex of the resources in the search paths.
+        """
+        return self._index
+
+    @property
+    def graph(self):
+        """
+        The DependencyGraph of the bundles, or None if it could not be resolved.
+        """
+        return self._graph
+
+    def run(self):
+        """
+        Build every bundle and then rebuild the affected bundles whenever files change,
+        until interrupted with Ctrl+C. Returns 0.
+        """
+        self.build()
+        if self._use_inotify:
+            self._start_notifier()
+        print "Watching for changes. Press Ctrl+C to stop."
+        try:
+            while True:
+                changed_paths, structure_changed = self._wait_for_changes()
+                self._rebuild(changed_paths, structure_changed)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._notifier is not None:
+                self._notifier.stop()
+                self._notifier = None
+        return 0
+
+    def build(self):
+        """
+        Index the search paths and build every bundle. Returns 0 on success and -1 on
+        failure.
+        """
+        if not os.path.exists(self._application.output_dir):
+            os.makedirs(self._application.output_dir)
+        self._index = self._application._create_index()
+        self._graph = None
+        self._take_snapshot()
+        return self._update(None, True)
+
+    def check(self):
+        """
+        Rebuild the bundles affected by any changes made since the last build without
+        waiting. Returns a list of the bundles that were rebuilt.
+        """
+        changed_paths, structure_changed = self._poll()
+        if not changed_paths and not structure_changed:
+            return []
+        self._rebuild(changed_paths, structure_changed)
+        return self._application.rebuilt_bundles
+
+    def _rebuild(self, changed_paths, structure_changed):
+        """
+        Update the index for the changes and rebuild the affected bundles.
+        Arguments:
+        changed_paths -- A set of the paths of the files that changed.
+        structure_changed -- Whether or not files or directories were added or removed.
+        """
+        start_time = time.time()
+        if structure_changed:
+            # The search paths are walked again, but unchanged resources come from the cache
+            self._index = self._application._create_index()
+            self._take_snapshot()
+        else:
+            self._index.refresh(changed_paths)
+        self._update(changed_paths, structure_changed)
+        print "Rebuilt %d bundles in %.3f seconds" % (len(self._application.rebuilt_bundles),
+            time.time() - start_time)
+
+    def _bundles(self):
+        """
+        Get a list of the resources with requirements that are built into bundles.
+        """
+        if len(self._application.file_list) > 0:
+            resources = [Resource.load(path_to_file) for path_to_file in self._application.file_list]
+        else:
+            resources = self._index.resources
+        return [resource for resource in resources if resource.requirements is not None]
+
+    def _update(self, changed_paths, structure_changed):
+        """
+        Resolve the requirements of the bundles again and build the affected bundles.
+        Returns 0 on success and -1 on failure.
+        Arguments:
+        changed_paths -- A set of the paths of the files that changed, or None to build
+        every bundle.
+        structure_changed -- Whether or not files or directories were added or removed.
+        """
+        application = self._application
+        application.rebuilt_bundles = []
+        application.unchanged_bundles = []
+        try:
+            bundles = self._bundles()
+            previous_graph = self._graph
+            self._graph = application._create_graph(self._index, bundles)
+            if self._graph is None:
+                return -1
+
+            if changed_paths is None or previous_graph is None:
+                affected_bundles = bundles
+            else:
+                affected_bundles = self._affected_bundles(bundles, previous_graph, changed_paths, structure_changed)
+
+            result = 0
+            for bundle in affected_bundles:
+                if application._build(bundle, self._graph) != 0:
+                    result = -1
+            return result
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            return -1
+        finally:
+            application._save_metadata_index()
+            application._save_manifest()
+
+    def _affected_bundles(self, bundles, previous_graph, changed_paths, structure_changed):
+        """
+        Get a list of the bundles that include a changed file, found by following the
+        requirements in reverse from each changed file. When files were added or removed,
+        bundles whose requirements now resolve to different files are included too.
+        """
+        affected = set()
+        pending = [resource for resource in self._graph.resources if resource.path_to_file in changed_paths]
+        while pending:
+            resource = pending.pop()
+            if resource not in affected:
+                affected.add(resource)
+                pending.extend(self._graph.dependents(resource))
+
+        if structure_changed:
+            for bundle in bundles:
+                if bundle in affected:
+                    continue
+                if bundle not in previous_graph:
+                    affected.add(bundle)
+                    continue
+                inputs = [resource.path_to_file for resource in self._graph.topological_order([bundle])]
+                previous_inputs = [resource.path_to_file for resource in previous_graph.topological_order([bundle])]
+                if inputs != previous_inputs:
+                    affected.add(bundle)
+
+        return [bundle for bundle in bundles if bundle in affected]
+
+    def _watched_paths(self):
+        """
+        Get a list of the files and directories whose changes affect the bundles.
+        """
+        paths = list(self._index.directories)
+        paths.extend(resource.path_to_file for resource in self._index.resources)
+        paths.extend(self._application.file_list)
+        return paths
+
+    def _take_snapshot(self):
+        """
+        Record the stat data of every watched file and directory.
+        """
+        self._signatures = dict((path, stat_signature(path)) for path in self._watched_paths())
+
+    def _poll(self):
+        """
+        Compare the stat data of the watched files and directories with the snapshot.
+        Returns a tuple of the set of paths of changed files and whether or not files or
+        directories were added or removed.
+        """
+        changed_paths = set()
+        structure_changed = False
+        for path, signature in self._signatures.iteritems():
+            current_signature = stat_signature(path)
+            if current_signature != signature:
+                if current_signature is None or os.path.isdir(path):
+                    # A directory changes when entries are added to or removed from it
+                    structure_changed = True
+                else:
+                    changed_paths.add(path)
+                self._signatures[path] = current_signature
+        return changed_paths, structure_changed
+
+    def _wait_for_changes(self):
+        """
+        Wait until files change and then until no more changes are made for the debounce
+        interval. Returns a tuple of the set of paths of changed files and whether or not
+        files or directories were added or removed.
+        """
+        changed_paths = set()
+        structure_changed = False
+        timeout = self._poll_interval
+        while True:
+            new_changed_paths, new_structure_changed = self._detect_changes(timeout)
+            if new_changed_paths or new_structure_changed:
+                changed_paths.update(new_changed_paths)
+                structure_changed = structure_changed or new_structure_changed
+                timeout = self._debounce
+            elif changed_paths or structure_changed:
+                return changed_paths, structure_changed
+
+    def _detect_changes(self, timeout):
+        """
+        Wait for up to timeout seconds and return the changes made meanwhile.
+        """
+        if self._notifier is None:
+            time.sleep(timeout)
+            return self._poll()
+
+        if self._notifier.check_events(int(timeout * 1000)):
+            self._notifier.read_events()
+            self._notifier.process_events()
+        events = self._events
+        self._events = []
+        return self._changes_from_events(events)
+
+    def _changes_from_events(self, events):
+        """
+        Return a tuple of the set of paths of changed files and whether or not files or
+        directories were added or removed, according to a list of pyinotify events.
+        Arguments:
+        events -- A list of tuples of the path, whether or not it is a directory and
+        whether or not the event is a change to its contents.
+        """
+        output_path = os.path.abspath(self._application.output_dir)
+        changed_paths = set()
+        structure_changed = False
+        for pathname, is_directory, is_change_to_contents in events:
+            # Writing the bundles must not trigger another build
+            if pathname == output_path or pathname.startswith(output_path + os.sep):
+                continue
+            # Nothing in an ignored directory, such as .git or node_modules, is indexed
+            if self._index.is_ignored(pathname, is_directory):
+                continue
+            if is_change_to_contents and not is_directory:
+                if pathname in self._signatures:
+                    changed_paths.add(pathname)
+            elif is_directory or os.path.splitext(pathname)[1][1:].lower() in Resource.FILE_TYPES_BY_EXTENSION:
+                structure_changed = True
+        return changed_paths, structure_changed
+
+    def _start_notifier(self):
+        """
+        Watch the search paths and any files in the file list with pyinotify.
+        """
+        contents_mask = pyinotify.IN_CLOSE_WRITE | pyinotify.IN_MODIFY
+        mask = contents_mask | pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM | \
+            pyinotify.IN_MOVED_TO
+
+        def record_event(event):
+            self._events.append((event.pathname, event.dir, bool(event.mask & contents_mask)))
+
+        def is_ignored(path):
+            return self._index.is_ignored(path, True)
+
+        watch_manager = pyinotify.WatchManager()
+        self._notifier = pyinotify.Notifier(watch_manager, default_proc_fun=record_event, timeout=0)
+        for path in self._application.paths.search_paths:
+            # Ignored directories are not watched, including those created later
+            watch_manager.add_watch(path, mask, rec=True, auto_add=True, exclude_filter=is_ignored)
+        for path_to_file in self._application.file_list:
+            watch_manager.add_watch(path_to_file, contents_mask)
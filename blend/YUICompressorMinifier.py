@@ -24,13 +24,20 @@
 
 import os
 import re
+import shutil
 import subprocess
+import tempfile
 
 from Minifier import Minifier
-from helpers import first_file_name_in_path_matching_regex
+from Minification import Minification
+from Metrics import Metrics
+from Profiler import Profiler
+from helpers import first_file_name_in_path_matching_regex, file_checksum
 
 
 class YUICompressorMinifier(Minifier):
+    # The values of the --type argument for the file types the YUI Compressor can minify
+    TYPE_ARGS_BY_FILE_TYPE = {'javascript': 'js', 'css': 'css'}
 
     def __init__(self, options=None):
         self._options = options or {}
@@ -40,6 +47,19 @@ class YUICompressorMinifier(Minifier):
         self._yuic_jar_regex = re.compile(r'^yuicompressor.*\.jar$')
         self._yuic_jar_file_path = first_file_name_in_path_matching_regex(self._lib_path, self._yuic_jar_regex)
 
+    def _tool_versions(self):
+        """
+        A checksum of the YUI Compressor jar.
+        """
+        return [file_checksum(self._yuic_jar_file_path)]
+
+    def _create_proc_args(self, *args):
+        yuic_proc_args = ["java"]
+        yuic_proc_args.extend(self._options.get('args', []))
+        yuic_proc_args.extend(["-jar", self._yuic_jar_file_path])
+        yuic_proc_args.extend(args)
+        return yuic_proc_args
+
     def minify(self, resource):
         minification = Minifier.minify(self, resource)
         if self._yuic_jar_file_path is None:
@@ -52,19 +72,156 @@ class YUICompressorMinifier(Minifier):
             minification.mark_as_good()
             minification.add_message('The resource %s is already minified.' % resource.path_to_file)
         else:
-            yuic_proc_args = ["java"]
-            yuic_proc_args.extend(self._options.get('args', []))
-            yuic_proc_args.extend(["-jar", self._yuic_jar_file_path, resource.path_to_file])
-            yuic_proc = subprocess.Popen(yuic_proc_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            yuic_output = yuic_proc.communicate()
+            self._run(minification, self._create_proc_args(resource.path_to_file))
 
-            if yuic_proc.returncode == 0:
-                minification.set_content(yuic_output[0])
-                minification.mark_as_good()
-            else:
-                minification.mark_as_bad()
-                minification.add_error("The YUI Compressor had non-zero exit code: " + str(yuic_proc.returncode) +
-                    "\n    " + str(yuic_proc_args) +
-                    "\n    " + yuic_output[1])
+        return minification
+
+    def minify_content(self, content, file_type):
+        """
+        Minify content held in memory by passing it to the YUI Compressor on stdin, so
+        that it does not need to be written to a file first.
+        Arguments:
+        content -- The string to be minified.
+        file_type -- The type of the content, javascript or css.
+        """
+        minification = Minification()
+        if self._yuic_jar_file_path is None:
+            minification.mark_as_bad()
+            minification.add_error('A YUI Compressor .jar file could not be found in %s.' % self._lib_path)
+            return minification
+        if file_type not in YUICompressorMinifier.TYPE_ARGS_BY_FILE_TYPE:
+            minification.mark_as_bad()
+            minification.add_error('The YUI Compressor cannot minify content of type %r.' % file_type)
+            return minification
 
+        type_arg = YUICompressorMinifier.TYPE_ARGS_BY_FILE_TYPE[file_type]
+        self._run(minification, self._create_proc_args('--type', type_arg), content)
         return minification
+
+    def _run(self, minification, yuic_proc_args, content=None):
+        """
+        Run the YUI Compressor and set the content and status of the minification from
+        its output.
+        Arguments:
+        minification -- The Minification to be updated.
+        yuic_proc_args -- The command line to run.
+        content -- The content to write to stdin, or None if the input is a file named by
+        the command line.
+        """
+        # The arguments after the jar describe the input
+        description = ' '.join(yuic_proc_args[yuic_proc_args.index(self._yuic_jar_file_path) + 1:])
+        with Profiler.span('yuicompressor %s' % description, Profiler.TOOL, args=yuic_proc_args):
+            yuic_proc = subprocess.Popen(yuic_proc_args, stdin=subprocess.PIPE if content is not None else None,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            Metrics.increment('minifier_processes')
+            yuic_output = yuic_proc.communicate(content)
+
+        if yuic_proc.returncode == 0:
+            minification.set_content(yuic_output[0])
+            minification.mark_as_good()
+        else:
+            minification.mark_as_bad()
+            minification.add_error("The YUI Compressor had non-zero exit code: " + str(yuic_proc.returncode) +
+                "\n    " + str(yuic_proc_args) +
+                "\n    " + yuic_output[1])
+
+    def minify_batch(self, resources):
+        """
+        Minify several resources with a single run of the YUI Compressor rather than
+        starting a JVM for each one.
+        Arguments:
+        resources -- A list of Resource instances.
+        Remarks:
+        The YUI Compressor stops at the first file it cannot minify, so if the batch fails
+        every resource that was part of it is minified on its own to get its individual
+        result. Resources that are already minified are not part of the batch.
+        """
+        minifications = [None] * len(resources)
+        positions = []
+        for position, resource in enumerate(resources):
+            if self._yuic_jar_file_path is None or resource.minified:
+                minifications[position] = self.minify(resource)
+            else:
+                positions.append(position)
+
+        # A single file is minified on its own, which avoids copying it
+        if len(positions) > 1:
+            contents = self._run_batch([(os.path.splitext(resources[position].path_to_file)[1],
+                resources[position].content_view()) for position in positions])
+            for position, content in zip(positions, contents):
+                if content is not None:
+                    minifications[position] = Minifier.minify(self, resources[position])
+                    minifications[position].set_content(content)
+                    minifications[position].mark_as_good()
+
+        for position in positions:
+            if minifications[position] is None:
+                minifications[position] = self.minify(resources[position])
+        return minifications
+
+    def minify_content_batch(self, contents, file_type):
+        """
+        Minify several strings of the same type with a single run of the YUI Compressor.
+        Arguments:
+        contents -- A list of the strings to be minified.
+        file_type -- The type of the content, javascript or css.
+        Remarks:
+        As with minify_batch, if the batch fails every string is minified on its own.
+        """
+        minifications = [None] * len(contents)
+        if (len(contents) > 1 and self._yuic_jar_file_path is not None and
+                file_type in YUICompressorMinifier.TYPE_ARGS_BY_FILE_TYPE):
+            extension = '.' + YUICompressorMinifier.TYPE_ARGS_BY_FILE_TYPE[file_type]
+            for position, content in enumerate(self._run_batch([(extension, content) for content in contents])):
+                if content is not None:
+                    minifications[position] = Minification()
+                    minifications[position].set_content(content)
+                    minifications[position].mark_as_good()
+
+        for position, content in enumerate(contents):
+            if minifications[position] is None:
+                minifications[position] = self.minify_content(content, file_type)
+        return minifications
+
+    def _run_batch(self, inputs):
+        """
+        Minify several inputs with a single run of the YUI Compressor and return a list of
+        the minified content of each, or of None for each if the run failed.
+        Arguments:
+        inputs -- A list of tuples of a file name extension, such as .js, that tells the
+        YUI Compressor the type of the content, and the content.
+        Remarks:
+        The content of each input is written to a temporary directory and the YUI
+        Compressor writes each minified file next to it.
+        """
+        batch_dir = tempfile.mkdtemp(prefix='blend-yuic-')
+        try:
+            input_paths = []
+            for position, (extension, content) in enumerate(inputs):
+                input_path = os.path.join(batch_dir, '%d%s' % (position, extension))
+                f = open(input_path, 'wb')
+                try:
+                    f.write(content)
+                finally:
+                    f.close()
+                input_paths.append(input_path)
+
+            # Each output file is named by appending .min to the name of its input
+            yuic_proc_args = self._create_proc_args('-o', '$:.min', *input_paths)
+            with Profiler.span('yuicompressor batch of %d files' % len(inputs), Profiler.TOOL, args=yuic_proc_args):
+                yuic_proc = subprocess.Popen(yuic_proc_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                Metrics.increment('minifier_processes')
+                yuic_proc.communicate()
+
+            outputs = [None] * len(inputs)
+            if yuic_proc.returncode == 0:
+                for position, input_path in enumerate(input_paths):
+                    if os.path.exists(input_path + '.min'):
+                        f = open(input_path + '.min', 'rb')
+                        try:
+                            outputs[position] = f.read()
+                        finally:
+                            f.close()
+            return outputs
+        finally:
+            shutil.rmtree(batch_dir, ignore_errors=True)
@@ -23,17 +23,34 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 from Resource import Resource
+from ResourceCache import ResourceCache
+from ResourceIndex import ResourceIndex
+from ResourceResolver import ResourceResolver
+from DirectoryWalker import DirectoryWalker
+from DependencyGraph import DependencyGraph
+from MetadataIndex import MetadataIndex
+from BuildManifest import BuildManifest
+from DiskCache import DiskCache
+from AnalysisCache import AnalysisCache
+from MinificationCache import MinificationCache
 from Requirement import Requirement
 from Paths import Paths
 from Application import Application
+from Watcher import Watcher
 from Analyzer import Analyzer
 from Analysis import Analysis
 from SizeAnalyzer import SizeAnalyzer
 from Configuration import Configuration
 from JSLintAnalyzer import JSLintAnalyzer
+from JSLintWorkerPool import JSLintWorkerPool
 from Minifier import Minifier
 from Result import Result
 from Minification import Minification
 from YUICompressorMinifier import YUICompressorMinifier
+from CSSMinifier import CSSMinifier
+from JSMinifier import JSMinifier
+from Metrics import Metrics
+from MemoryReport import MemoryReport
+from Profiler import Profiler
 
 __version__ = '0.0.1'
\ No newline at end of file
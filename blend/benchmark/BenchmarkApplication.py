@@ -0,0 +1,252 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Times each phase of Application.run on a synthetic project, both cold, with empty caches
+and a fresh process state, and warm, with the metadata index, analysis and minification
+caches and Resource.cache left by the cold run. The results can be saved as a baseline
+and later runs compared with it, failing if any phase has become slower than the
+baseline by more than a threshold.
+
+Usage, from the root of the source tree:
+
+    python -m blend.benchmark.BenchmarkApplication [options]
+
+For example, save a baseline before a change and compare with it afterwards:
+
+    python -m blend.benchmark.BenchmarkApplication --save-baseline baseline.json
+    python -m blend.benchmark.BenchmarkApplication --baseline baseline.json --threshold 0.2
+
+The project is built with the JSMinifier and CSSMinifier and without analyzers, so that
+the results measure blend rather than Java or Node.js.
+"""
+
+import json
+import optparse
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import time
+
+from blend.Application import Application
+from blend.Profiler import Profiler
+from blend.Resource import Resource
+from blend.benchmark.SyntheticProject import SyntheticProject
+
+REPEAT = 3
+# Comparisons with a baseline need the best of several runs to rise above the noise
+MIN_BASELINE_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# Phases that get faster or slower by less than this are not regressions, however large
+# the change is relative to the baseline, since their timing is mostly noise
+MIN_REGRESSION_SECONDS = 0.005
+RUNS = ['cold', 'warm']
+PHASES = ['discovery', 'requirements', 'resolution', 'build', 'minification', 'total']
+CONFIGURATION = {
+    'minifiers': {
+        'javascript': {'name': 'blend.JSMinifier'},
+        'css': {'name': 'blend.CSSMinifier'}
+    }
+}
+
+
+def time_run(project_dir, work_dir, jobs, incremental):
+    """
+    Build the project once and return a dictionary of the seconds taken by each phase
+    and in total.
+    """
+    profile_path = os.path.join(work_dir, 'profile.json')
+    blend_dir = os.path.join(work_dir, '.blend')
+    stdout = sys.stdout
+    sys.stdout = StringIO.StringIO()
+    try:
+        app = Application(path_list=[project_dir], include_cwd=False, output_dir=os.path.join(work_dir, 'output'),
+            config_file_path=os.path.join(work_dir, 'config.json'),
+            metadata_index_path=os.path.join(blend_dir, 'metadata.json'), ignore_file_path=None,
+            manifest_path=os.path.join(blend_dir, 'manifest.json') if incremental else None, jobs=jobs,
+            analysis_cache_path=os.path.join(blend_dir, 'cache', 'analysis'),
+            minification_cache_path=os.path.join(blend_dir, 'cache', 'minification'), profile_path=profile_path)
+        start = time.time()
+        result = app.run()
+        total = time.time() - start
+    finally:
+        output = sys.stdout.getvalue()
+        sys.stdout = stdout
+    if result != 0:
+        raise Exception('The build of the synthetic project failed:\n%s' % output)
+
+    f = open(profile_path)
+    try:
+        events = json.load(f)['traceEvents']
+    finally:
+        f.close()
+    timings = dict((phase, 0.0) for phase in PHASES)
+    for event in events:
+        if event['cat'] == Profiler.PHASE and event['name'] in timings:
+            timings[event['name']] += event['dur'] / 1e6
+    timings['total'] = total
+    return timings
+
+
+def benchmark(project, jobs=1, incremental=False, repeat=REPEAT):
+    """
+    Create the project and return a dictionary of the best time of each phase of the
+    cold and warm runs, by run and phase.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        project_dir = os.path.join(root, 'project')
+        project.create(project_dir)
+        results = dict((run, {}) for run in RUNS)
+        for i in range(repeat):
+            work_dir = os.path.join(root, 'work%d' % i)
+            os.mkdir(work_dir)
+            f = open(os.path.join(work_dir, 'config.json'), 'w')
+            try:
+                json.dump(CONFIGURATION, f)
+            finally:
+                f.close()
+            Resource.cache.clear()
+            for run in RUNS:
+                for phase, seconds in time_run(project_dir, work_dir, jobs, incremental).iteritems():
+                    results[run][phase] = min(seconds, results[run].get(phase, seconds))
+        return results
+    finally:
+        Resource.cache.clear()
+        shutil.rmtree(root)
+
+
+def find_regressions(baseline, results, threshold):
+    """
+    Return a list of the run, phase, baseline seconds and current seconds of each phase
+    that is slower than in the baseline by more than the threshold, a fraction of the
+    baseline time.
+    """
+    regressions = []
+    for run in RUNS:
+        for phase in PHASES:
+            before = baseline[run].get(phase)
+            after = results[run].get(phase)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before > MIN_REGRESSION_SECONDS:
+                regressions.append((run, phase, before, after))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    for run in RUNS:
+        print '%s run' % run.capitalize()
+        for phase in PHASES:
+            seconds = results[run][phase]
+            if baseline is None or phase not in baseline[run]:
+                print '  %-14s %9.1f ms' % (phase, seconds * 1000)
+            else:
+                before = baseline[run][phase]
+                change = (seconds - before) / before * 100 if before else 0.0
+                print '  %-14s %9.1f ms %9.1f ms %+7.1f%%' % (phase, seconds * 1000, before * 1000, change)
+
+
+def read_json(path):
+    f = open(path)
+    try:
+        return json.load(f)
+    finally:
+        f.close()
+
+
+def write_json(path, value):
+    f = open(path, 'w')
+    try:
+        json.dump(value, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+
+
+def main(argv):
+    parser = optparse.OptionParser('usage: python -m blend.benchmark.BenchmarkApplication [options]')
+    parser.add_option('--files', dest='file_count', type='int', default=SyntheticProject().file_count,
+        help='the number of files in the project')
+    parser.add_option('--depth', type='int', default=SyntheticProject().depth,
+        help='the number of layers of libraries below the applications')
+    parser.add_option('--fan-out', dest='fan_out', type='int', default=SyntheticProject().fan_out,
+        help='the number of files required by each file')
+    parser.add_option('--diamond-density', dest='diamond_density', type='float',
+        default=SyntheticProject().diamond_density,
+        help='the fraction of requirements of a library that is likely to be required by other files too')
+    parser.add_option('--file-size', dest='file_size', type='int', default=SyntheticProject().file_size,
+        help='the average size of a file in bytes')
+    parser.add_option('--css-ratio', dest='css_ratio', type='float', default=SyntheticProject().css_ratio,
+        help='the fraction of the files that are css')
+    parser.add_option('--seed', type='int', default=SyntheticProject().seed,
+        help='the seed of the random choices made when generating the project')
+    parser.add_option('--jobs', type='int', default=1, help='the number of bundles to build at once')
+    parser.add_option('--incremental', default=False, action='store_true',
+        help='use a build manifest, so that the warm run skips the unchanged bundles')
+    parser.add_option('--repeat', type='int', default=REPEAT, help='the number of times to build the project')
+    parser.add_option('--save-baseline', dest='save_baseline', metavar='FILE',
+        help='save the results to FILE as a baseline')
+    parser.add_option('--baseline', metavar='FILE',
+        help='compare the results with the baseline in FILE and fail if any phase regressed')
+    parser.add_option('--threshold', type='float', default=DEFAULT_THRESHOLD,
+        help='the fraction by which a phase may be slower than the baseline, 0.25 by default')
+    options, arguments = parser.parse_args(argv[1:])
+    if options.baseline and options.repeat < MIN_BASELINE_REPEAT:
+        parser.error('--baseline needs --repeat of at least %d, since fewer runs are too noisy to compare'
+            % MIN_BASELINE_REPEAT)
+
+    project = SyntheticProject(file_count=options.file_count, depth=options.depth, fan_out=options.fan_out,
+        diamond_density=options.diamond_density, file_size=options.file_size, css_ratio=options.css_ratio,
+        seed=options.seed)
+    settings = {'project': project.as_dict(), 'jobs': options.jobs, 'incremental': options.incremental}
+
+    baseline = None
+    if options.baseline:
+        baseline = read_json(options.baseline)
+        if baseline['settings'] != settings:
+            print 'The baseline in %s was measured with different settings: %s' % (options.baseline,
+                json.dumps(baseline['settings'], sort_keys=True))
+            return 2
+
+    print 'Building %d files (best of %d)' % (project.file_count, options.repeat)
+    results = benchmark(project, options.jobs, options.incremental, options.repeat)
+    print_results(results, baseline['results'] if baseline is not None else None)
+
+    if options.save_baseline:
+        write_json(options.save_baseline, {'settings': settings, 'results': results})
+        print 'Saved the baseline to %s' % options.save_baseline
+
+    if baseline is not None:
+        regressions = find_regressions(baseline['results'], results, options.threshold)
+        for run, phase, before, after in regressions:
+            print 'The %s %s phase regressed from %.1f ms to %.1f ms' % (run, phase, before * 1000, after * 1000)
+        if regressions:
+            return 1
+        print 'No phase regressed by more than %d%%' % (options.threshold * 100)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
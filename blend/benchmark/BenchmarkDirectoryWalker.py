@@ -0,0 +1,122 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Compares the time taken to discover the processable files in a synthetic tree using
+os.walk, the way Resource.find_all_in_paths used to, with DirectoryWalker using
+different numbers of threads.
+
+Usage, from the root of the source tree:
+
+    python -m blend.benchmark.BenchmarkDirectoryWalker [directory_count [files_per_directory]]
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+from blend.DirectoryWalker import DirectoryWalker
+from blend.Resource import Resource
+
+DEFAULT_DIRECTORY_COUNT = 500
+DEFAULT_FILES_PER_DIRECTORY = 20
+FAN_OUT = 8
+THREAD_COUNTS = [1, 4, 8, 16]
+REPEAT = 5
+
+
+def create_tree(root, directory_count, files_per_directory):
+    """
+    Create directory_count directories below root, each with at most FAN_OUT
+    sub-directories, and fill each one with a mix of javascript, css and other files.
+    """
+    directory_paths = [root]
+    for i in range(1, directory_count):
+        parent_path = directory_paths[(i - 1) // FAN_OUT]
+        directory_path = os.path.join(parent_path, 'dir%d' % i)
+        os.mkdir(directory_path)
+        directory_paths.append(directory_path)
+    extensions = ['js', 'js', 'css', 'txt', 'png']
+    for directory_path in directory_paths:
+        for i in range(files_per_directory):
+            file_path = os.path.join(directory_path, 'file%d.%s' % (i, extensions[i % len(extensions)]))
+            open(file_path, 'w').close()
+
+
+def discover_with_os_walk(path):
+    """
+    Discover processable files the way Resource.find_all_in_paths did before
+    DirectoryWalker was introduced.
+    """
+    file_paths = []
+    for dir_path, dir_names, file_names in os.walk(path):
+        for file_name in file_names:
+            absolute_file_path = os.path.join(dir_path, file_name)
+            ext, file_type = Resource._parse_extension_and_file_type(absolute_file_path)
+            if file_type != 'unknown':
+                file_paths.append(absolute_file_path)
+    return file_paths
+
+
+def discover_with_directory_walker(path, thread_count):
+    walker = DirectoryWalker(Resource.FILE_TYPES_BY_EXTENSION.keys(), thread_count)
+    file_paths = []
+    for dir_path, file_names in walker.walk(path):
+        file_paths.extend([os.path.join(dir_path, file_name) for file_name in file_names])
+    return file_paths
+
+
+def best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+
+def main(argv):
+    directory_count = int(argv[1]) if len(argv) > 1 else DEFAULT_DIRECTORY_COUNT
+    files_per_directory = int(argv[2]) if len(argv) > 2 else DEFAULT_FILES_PER_DIRECTORY
+
+    root = tempfile.mkdtemp()
+    try:
+        create_tree(root, directory_count, files_per_directory)
+
+        expected = sorted(discover_with_os_walk(root))
+        print 'Discovering %d files in %d directories (best of %d)' % (len(expected), directory_count, REPEAT)
+
+        os_walk_time = best_time(lambda: discover_with_os_walk(root))
+        print '%-28s %8.1f ms' % ('os.walk', os_walk_time * 1000)
+
+        for thread_count in THREAD_COUNTS:
+            if sorted(discover_with_directory_walker(root, thread_count)) != expected:
+                print 'DirectoryWalker with %d threads found different files than os.walk' % thread_count
+                return 1
+            walker_time = best_time(lambda: discover_with_directory_walker(root, thread_count))
+            print '%-28s %8.1f ms %6.2fx' % ('DirectoryWalker, %d threads' % thread_count, walker_time * 1000,
+                os_walk_time / walker_time)
+    finally:
+        shutil.rmtree(root)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
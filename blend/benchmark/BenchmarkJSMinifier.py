@@ -0,0 +1,103 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Compares the throughput of the JSMinifier, which runs in the Python process, with the
+YUI Compressor, which starts a JVM for each script. Both minify the same scripts from
+memory, the way Application does with --minified-only. The YUI Compressor is skipped if
+Java cannot be run.
+
+Usage, from the root of the source tree:
+
+    python -m blend.benchmark.BenchmarkJSMinifier [path/to/script.js ...]
+
+Without arguments, the scripts in blend/lib are used.
+"""
+
+import os
+import sys
+import timeit
+
+from blend.JSMinifier import JSMinifier
+from blend.YUICompressorMinifier import YUICompressorMinifier
+
+REPEAT = 5
+DEFAULT_SCRIPT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+
+
+def read_scripts(paths):
+    scripts = []
+    for path in paths:
+        f = open(path, 'rb')
+        try:
+            scripts.append(f.read())
+        finally:
+            f.close()
+    return scripts
+
+
+def minify_all(minifier, scripts):
+    """
+    Minify each of the scripts and return the total size of the minified content, or None
+    if any of them could not be minified.
+    """
+    total = 0
+    for script in scripts:
+        minification = minifier.minify_content(script, 'javascript')
+        if not minification.good:
+            return None
+        total += len(minification.content)
+    return total
+
+
+def report(name, minifier, scripts, repeat):
+    input_size = sum(len(script) for script in scripts)
+    try:
+        output_size = minify_all(minifier, scripts)
+    except OSError, e:
+        print '%-28s skipped: %s' % (name, e)
+        return None
+    if output_size is None:
+        print '%-28s skipped: the scripts could not be minified' % name
+        return None
+    best_time = min(timeit.repeat(lambda: minify_all(minifier, scripts), number=1, repeat=repeat))
+    print '%-28s %8.1f ms %8.2f MB/s %6.1f%% of the original size' % (name, best_time * 1000,
+        input_size / best_time / (1024 * 1024), 100.0 * output_size / input_size)
+    return best_time
+
+
+def main(argv):
+    paths = argv[1:] or sorted(os.path.join(DEFAULT_SCRIPT_DIRECTORY, file_name)
+        for file_name in os.listdir(DEFAULT_SCRIPT_DIRECTORY) if file_name.endswith('.js'))
+    scripts = read_scripts(paths)
+    print 'Minifying %d scripts, %d bytes in all (best of %d)' % (len(scripts), sum(len(s) for s in scripts), REPEAT)
+
+    js_minifier_time = report('JSMinifier', JSMinifier(), scripts, REPEAT)
+    yui_time = report('YUICompressorMinifier', YUICompressorMinifier(), scripts, 1)
+    if js_minifier_time and yui_time:
+        print 'The JSMinifier is %.1fx faster' % (yui_time / js_minifier_time)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
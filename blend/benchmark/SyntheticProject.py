@@ -0,0 +1,215 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Generates synthetic source trees for benchmarking blend, with a configurable number of
+files, depth and fan-out of requirements, density of diamonds, file size and mix of
+javascript and css.
+
+Usage, from the root of the source tree:
+
+    python -m blend.benchmark.SyntheticProject directory [file_count [depth [fan_out]]]
+"""
+
+import os
+import random
+import sys
+
+
+class SyntheticProject:
+    """
+    The settings of a synthetic source tree that can be created in a directory.
+    Remarks:
+    The files of each type are arranged in depth + 1 layers. The files in the first layer
+    are the applications, in an app directory, and the files in every other layer are
+    libraries, in a lib directory. Each file that is not in the last layer requires
+    fan_out files from the next layer. Without diamonds, each library is required by a
+    single file, so the requirements of each bundle form a tree. With a diamond density
+    between 0 and 1, that fraction of the requirements are of a random library in the
+    next layer instead, which is usually also required by another file, so that
+    libraries are reached along several paths and shared between bundles. The layers
+    grow by the number of libraries that are not shared, so that most libraries are
+    required by something. The same seed always creates the same tree.
+    """
+
+    # The size of each layer grows by at most this factor, so that deep trees with a
+    # large fan-out still have more than one bundle
+    MAX_LAYER_GROWTH = 8.0
+
+    def __init__(self, file_count=1000, depth=4, fan_out=4, diamond_density=0.25, file_size=2048, css_ratio=0.2,
+                 files_per_directory=50, seed=0):
+        """
+        Arguments:
+        file_count -- The total number of javascript and css files.
+        depth -- The number of layers of libraries below the bundles.
+        fan_out -- The number of files required by each file that is not in the last layer.
+        diamond_density -- The fraction of requirements, from 0 to 1, of a random library
+        rather than one that is not yet required.
+        file_size -- The average size of a file in bytes. The size of each file varies by
+        up to half of this either way.
+        css_ratio -- The fraction of the files, from 0 to 1, that are css.
+        files_per_directory -- The maximum number of files in each directory.
+        seed -- The seed of the random choices.
+        """
+        if depth < 0 or fan_out < 1 or files_per_directory < 1:
+            raise Exception('The depth must be at least 0 and the fan-out and files per directory at least 1')
+        if not 0 <= diamond_density <= 1 or not 0 <= css_ratio <= 1:
+            raise Exception('The diamond density and css ratio must be between 0 and 1')
+        self.file_count = file_count
+        self.depth = depth
+        self.fan_out = fan_out
+        self.diamond_density = diamond_density
+        self.file_size = file_size
+        self.css_ratio = css_ratio
+        self.files_per_directory = files_per_directory
+        self.seed = seed
+
+    def as_dict(self):
+        """
+        The settings of the project as a dictionary that can be serialized as JSON.
+        """
+        return {
+            'file_count': self.file_count,
+            'depth': self.depth,
+            'fan_out': self.fan_out,
+            'diamond_density': self.diamond_density,
+            'file_size': self.file_size,
+            'css_ratio': self.css_ratio,
+            'files_per_directory': self.files_per_directory,
+            'seed': self.seed
+        }
+
+    def create(self, root):
+        """
+        Create the files of the project below a directory and return a list of the paths
+        of the files with requirements, which are the bundles blend builds.
+        Arguments:
+        root -- The directory in which to create the project. It is created if it does
+        not exist.
+        """
+        rng = random.Random(self.seed)
+        css_count = int(round(self.file_count * self.css_ratio))
+        bundle_paths = []
+        bundle_paths.extend(self._create_files(root, 'javascript', self.file_count - css_count, rng))
+        bundle_paths.extend(self._create_files(root, 'css', css_count, rng))
+        return bundle_paths
+
+    def layer_sizes(self, count):
+        """
+        Return a list of the number of files of a type in each layer.
+        Arguments:
+        count -- The number of files of the type.
+        """
+        layer_count = min(self.depth + 1, count)
+        if layer_count == 0:
+            return []
+        growth = min(SyntheticProject.MAX_LAYER_GROWTH, max(1.0, self.fan_out * (1 - self.diamond_density)))
+        weights = [growth ** layer for layer in range(layer_count)]
+        sizes = [max(1, int(count * weight / sum(weights))) for weight in weights]
+        # Rounding leftovers go to the largest layer, which is the last one
+        sizes[-1] += count - sum(sizes)
+        return sizes
+
+    def _create_files(self, root, file_type, count, rng):
+        if file_type == 'css':
+            prefix, extension = 'style', 'css'
+        else:
+            prefix, extension = 'module', 'js'
+        layers = []
+        for layer, size in enumerate(self.layer_sizes(count)):
+            layers.append(['%s_%d_%d' % (prefix, layer, i) for i in range(size)])
+
+        bundle_paths = []
+        for layer, names in enumerate(layers):
+            next_layer = layers[layer + 1] if layer + 1 < len(layers) else []
+            unrequired = 0
+            for i, name in enumerate(names):
+                requirements = []
+                for j in range(min(self.fan_out, len(next_layer))):
+                    if rng.random() < self.diamond_density:
+                        requirement = rng.choice(next_layer)
+                        while requirement in requirements:
+                            requirement = rng.choice(next_layer)
+                    else:
+                        requirement = next_layer[unrequired % len(next_layer)]
+                        while requirement in requirements:
+                            unrequired += 1
+                            requirement = next_layer[unrequired % len(next_layer)]
+                        unrequired += 1
+                    requirements.append(requirement)
+                if layer == 0:
+                    directory = os.path.join(root, 'app', 'dir%d' % (i // self.files_per_directory))
+                else:
+                    directory = os.path.join(root, 'lib', 'layer%d' % layer, 'dir%d' % (i // self.files_per_directory))
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                path_to_file = os.path.join(directory, '%s.%s' % (name, extension))
+                size = rng.randint(self.file_size // 2, self.file_size + self.file_size // 2)
+                f = open(path_to_file, 'w')
+                try:
+                    f.write(_content(file_type, name, requirements, size))
+                finally:
+                    f.close()
+                if requirements:
+                    bundle_paths.append(path_to_file)
+        return bundle_paths
+
+
+def _content(file_type, name, requirements, size):
+    """
+    Source code of about size bytes that requires each of the requirements.
+    """
+    if file_type == 'css':
+        lines = ['/*= require %s */\n' % requirement for requirement in requirements]
+        template = '.%s-%%d { margin: %%dpx 0; color: #%%06x; }\n' % name.replace('_', '-')
+    else:
+        lines = ['//= require %s\n' % requirement for requirement in requirements]
+        template = 'var %s_%%d = function (value) { return value * %%d + 0x%%06x; };\n' % name
+    length = sum(len(line) for line in lines)
+    i = 0
+    while length < size:
+        line = template % (i, i, i * 2654435761 % 0x1000000)
+        lines.append(line)
+        length += len(line)
+        i += 1
+    return ''.join(lines)
+
+
+def main(argv):
+    if len(argv) < 2:
+        print 'usage: python -m blend.benchmark.SyntheticProject directory [file_count [depth [fan_out]]]'
+        return 2
+    project = SyntheticProject()
+    if len(argv) > 2:
+        project.file_count = int(argv[2])
+    if len(argv) > 3:
+        project.depth = int(argv[3])
+    if len(argv) > 4:
+        project.fan_out = int(argv[4])
+    bundle_paths = project.create(argv[1])
+    print 'Created %d files with %d bundles in %s' % (project.file_count, len(bundle_paths), argv[1])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
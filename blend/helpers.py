@@ -1,4 +1,7 @@
 import os
+import json
+import hashlib
+import tempfile
 
 
 def first_file_name_in_path_matching_regex(path, regex):
@@ -7,3 +10,94 @@ def first_file_name_in_path_matching_regex(path, regex):
             if regex.match(file_name):
                 return os.path.join(path, file_name)
     return None
+
+
+def file_checksum(path_to_file):
+    """
+    Return the SHA-1 hex digest of the content of a file, or None if the file does not
+    exist or cannot be read.
+    """
+    if path_to_file is None:
+        return None
+    try:
+        f = open(path_to_file, 'rb')
+    except IOError:
+        return None
+    try:
+        sha1 = hashlib.sha1()
+        for block in iter(lambda: f.read(65536), ''):
+            sha1.update(block)
+        return sha1.hexdigest()
+    finally:
+        f.close()
+
+
+def stat_signature(path):
+    """
+    Return a tuple of the stat data used to detect changes to a file or directory, or
+    None if it does not exist.
+    """
+    return signature_of_stat(stat_or_none(path))
+
+
+def stat_or_none(path):
+    """
+    Return the result of os.stat for a file or directory, or None if it does not exist.
+    """
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def signature_of_stat(stat):
+    """
+    Return the tuple that stat_signature returns for the result of os.stat, or None if
+    the stat result is None.
+    """
+    if stat is None:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def fingerprint(cls, options, tools):
+    """
+    Return a SHA-1 hex digest identifying a configured analyzer or minifier.
+    Arguments:
+    cls -- The class of the analyzer or minifier.
+    options -- The options dictionary with which it was created.
+    tools -- A list of strings identifying the versions of the external tools it runs.
+    """
+    description = json.dumps(['%s.%s' % (cls.__module__, cls.__name__), options or {}, tools],
+        sort_keys=True, default=repr)
+    return hashlib.sha1(description).hexdigest()
+
+
+def write_json_file_atomically(path_to_file, value):
+    """
+    Serialize value as JSON into a temporary file and rename it to path_to_file so that
+    an interrupted write never leaves a partially written file behind. The directory is
+    created if it does not exist.
+    """
+    write_file_atomically(path_to_file, json.dumps(value))
+
+
+def write_file_atomically(path_to_file, content):
+    """
+    Write content into a temporary file and rename it to path_to_file so that an
+    interrupted write never leaves a partially written file behind. The directory is
+    created if it does not exist.
+    """
+    directory = os.path.dirname(os.path.abspath(path_to_file))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    fd, temp_file_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    f = os.fdopen(fd, 'w')
+    try:
+        f.write(content)
+    finally:
+        f.close()
+    if os.name == 'nt' and os.path.exists(path_to_file):
+        # Windows cannot rename over an existing file
+        os.remove(path_to_file)
+    os.rename(temp_file_path, path_to_file)
@@ -0,0 +1,129 @@
+// A long running JSLint worker for the JSLintAnalyzer in blend.
+//
+// Usage:
+//     node blend-jslint-worker.js path/to/jslint.js
+//     java -jar js.jar blend-jslint-worker.js path/to/jslint.js
+//
+// The worker loads JSLint once and then lints any number of sources read from
+// standard input. Each request is the length of a source in bytes on a line by itself
+// followed by the source encoded as UTF-8. Each response written to standard output is
+// the length of a result in bytes on a line by itself followed by the result. The first
+// line of a result is the exit code that jslint.js would have returned for the source
+// and the rest is the output jslint.js would have printed. As with jslint.js, options
+// may be appended to a source as " --options { key: val }". The worker exits when
+// standard input is closed.
+
+var scriptArguments = (typeof arguments !== 'undefined') ? arguments : [];
+
+(function () {
+    // Only the part of jslint.js that defines JSLINT is loaded, not the command line
+    // interface that follows it.
+    var COMMAND_LINE_INTERFACE_MARKER = '// Changes by Azavea:';
+
+    function jslintDefinition(text) {
+        var markerIndex = text.indexOf(COMMAND_LINE_INTERFACE_MARKER);
+        return markerIndex < 0 ? text : text.substring(0, markerIndex);
+    }
+
+    function lint(input) {
+        var optionIndex = input.indexOf(' --options');
+        var js, options, output = '';
+
+        if (input && optionIndex > 0) {
+            js = input.substring(0, optionIndex);
+            // 10 chars in ' --options'.
+            try {
+                eval('options = ' + input.substr(optionIndex + 10));
+            } catch (ex) {
+                return '3\nBad jslint options, did not parse: ' + input.substr(optionIndex + 10) + '\n' +
+                    'Error: ' + ex + '\n';
+            }
+            options.passfail = false;
+        } else {
+            js = input;
+            options = {passfail: false};
+        }
+
+        if (JSLINT(js, options)) {
+            return '0\n';
+        }
+        if (!JSLINT.errors) {
+            return '1\nJSLINT failed but had no errors!\n';
+        }
+        for (var x = 0; x < JSLINT.errors.length; x++) {
+            var e = JSLINT.errors[x];
+            if (e) { // last object is null
+                output += 'Lint at line ' + ((e.line || e.line === 0) ? e.line : -1) + ' character ' +
+                    ((e.character || e.character === 0) ? e.character : -1) + ': ' + e.reason + '\n';
+                output += (e.evidence || '').replace(/^\s*(\S*(\s+\S+)*)\s*$/, "$1") + '\n';
+            }
+        }
+        return '1\n' + output;
+    }
+
+    if (typeof importPackage === 'function') {
+        // Rhino version.
+        eval(jslintDefinition(String(readFile(scriptArguments[0], 'UTF-8'))));
+
+        var input = new java.io.DataInputStream(new java.io.BufferedInputStream(java.lang.System['in']));
+        var output = new java.io.BufferedOutputStream(new java.io.FileOutputStream(java.io.FileDescriptor.out));
+        var readHeader = function () {
+            var header = '';
+            var b;
+            while ((b = input.read()) !== 10) {
+                if (b < 0) {
+                    return null;
+                }
+                header += String.fromCharCode(b);
+            }
+            return header;
+        };
+        var header;
+        while ((header = readHeader()) !== null) {
+            var source = java.lang.reflect.Array.newInstance(java.lang.Byte.TYPE, parseInt(header, 10));
+            input.readFully(source);
+            var result = new java.lang.String(lint(String(new java.lang.String(source, 'UTF-8')))).getBytes('UTF-8');
+            output.write(new java.lang.String(result.length + '\n').getBytes('US-ASCII'));
+            output.write(result);
+            output.flush();
+        }
+        quit(0);
+    } else if (typeof process !== 'undefined') {
+        // Node.js version.
+        var fs = require('fs');
+        var vm = require('vm');
+        var toBuffer = function (text, encoding) {
+            return Buffer.from ? Buffer.from(text, encoding) : new Buffer(text, encoding);
+        };
+        vm.runInThisContext(jslintDefinition(fs.readFileSync(process.argv[2], 'utf8')), process.argv[2]);
+
+        var buffered = toBuffer('', 'utf8');
+        process.stdin.on('data', function (chunk) {
+            buffered = Buffer.concat([buffered, chunk]);
+            for (;;) {
+                var newline = 0;
+                while (newline < buffered.length && buffered[newline] !== 10) {
+                    newline++;
+                }
+                if (newline === buffered.length) {
+                    return;
+                }
+                var length = parseInt(buffered.toString('ascii', 0, newline), 10);
+                if (buffered.length < newline + 1 + length) {
+                    return;
+                }
+                var source = buffered.toString('utf8', newline + 1, newline + 1 + length);
+                buffered = buffered.slice(newline + 1 + length);
+                var result = toBuffer(lint(source), 'utf8');
+                process.stdout.write(result.length + '\n');
+                process.stdout.write(result);
+            }
+        });
+        process.stdin.on('end', function () {
+            process.exit(0);
+        });
+        process.stdin.resume();
+    } else {
+        throw { message: "Unknown script host." };
+    }
+}());
@@ -0,0 +1,120 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import Analyzer, AnalysisCache, DiskCache, Resource, SizeAnalyzer
+import shutil
+import os
+import helpers
+
+
+class CountingAnalyzer(Analyzer):
+
+    def __init__(self, options=None):
+        self._options = options or {}
+        self.analyze_count = 0
+
+    def analyze(self, resource):
+        analysis = Analyzer.analyze(self, resource)
+        self.analyze_count += 1
+        analysis.add_message('%d lines' % len(resource.content.split('\n')))
+        if self._options.get('good', True):
+            analysis.mark_as_good()
+        else:
+            analysis.add_error('bad')
+        return analysis
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Asserts that the AnalysisCache class reuses the analyses of identical content."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.disk_cache = DiskCache(os.path.join(self.test_env_dir, 'cache'))
+        self.path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        helpers.create_file_with_content(self.path_to_test_file, 'var foo = {};\nvar bar = {};\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def test_repeated_analyses_are_reused_in_memory(self):
+        analyzer = CountingAnalyzer()
+        cache = AnalysisCache()
+        first = cache.analyze(analyzer, Resource(self.path_to_test_file))
+        second = cache.analyze(analyzer, Resource(self.path_to_test_file))
+        self.assertEqual(1, analyzer.analyze_count)
+        self.assertTrue(first is second)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_a_batch_only_passes_the_resources_not_analyzed_before_to_the_analyzer(self):
+        path_to_other_file = os.path.join(self.test_env_dir, 'file2.js')
+        helpers.create_file_with_content(path_to_other_file, 'var foo = {};\n')
+        analyzer = CountingAnalyzer()
+        cache = AnalysisCache()
+        cache.analyze(analyzer, Resource(self.path_to_test_file))
+        analyses = cache.analyze_batch(analyzer, [Resource(path_to_other_file), Resource(self.path_to_test_file)])
+        self.assertEqual([['2 lines'], ['3 lines']], [analysis.messages for analysis in analyses])
+        self.assertEqual(2, analyzer.analyze_count)
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+    def test_analyses_are_reused_from_disk_by_later_runs(self):
+        AnalysisCache(self.disk_cache).analyze(CountingAnalyzer(), Resource(self.path_to_test_file))
+
+        analyzer = CountingAnalyzer()
+        analysis = AnalysisCache(self.disk_cache).analyze(analyzer, Resource(self.path_to_test_file))
+        self.assertEqual(0, analyzer.analyze_count)
+        self.assertTrue(analysis.good)
+        self.assertEqual(['3 lines'], analysis.messages)
+
+    def test_changed_content_or_options_are_analyzed_again(self):
+        cache = AnalysisCache(self.disk_cache)
+        analyzer = CountingAnalyzer()
+        cache.analyze(analyzer, Resource(self.path_to_test_file))
+        cache.analyze(CountingAnalyzer({'verbose': True}), Resource(self.path_to_test_file))
+
+        helpers.create_file_with_content(self.path_to_test_file, 'var foo = {};\n')
+        analysis = cache.analyze(analyzer, Resource(self.path_to_test_file))
+        self.assertEqual(2, analyzer.analyze_count)
+        self.assertEqual(['2 lines'], analysis.messages)
+        self.assertEqual(3, cache.misses)
+
+    def test_failed_analyses_are_not_reused(self):
+        analyzer = CountingAnalyzer({'good': False})
+        cache = AnalysisCache(self.disk_cache)
+        cache.analyze(analyzer, Resource(self.path_to_test_file))
+        analysis = cache.analyze(analyzer, Resource(self.path_to_test_file))
+        self.assertEqual(2, analyzer.analyze_count)
+        self.assertFalse(analysis.good)
+
+    def test_analyses_that_depend_on_the_path_are_not_shared_by_identical_files(self):
+        path_to_copy = os.path.join(self.test_env_dir, 'copy', 'file1.js')
+        helpers.create_file_with_content(path_to_copy, 'var foo = {};\nvar bar = {};\n')
+        cache = AnalysisCache()
+        analyzer = SizeAnalyzer()
+        cache.analyze(analyzer, Resource(self.path_to_test_file))
+        analysis = cache.analyze(analyzer, Resource(path_to_copy))
+        self.assertEqual(0, cache.hits)
+        self.assertTrue(analysis.messages[0].startswith(path_to_copy))
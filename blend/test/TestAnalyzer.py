@@ -23,7 +23,7 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import unittest
-from blend import Analyzer, Analysis, Resource
+from blend import Analyzer, Analysis, Resource, SizeAnalyzer
 
 
 class TestAnalyzer(unittest.TestCase):
@@ -61,3 +61,7 @@ class TestAnalyzer(unittest.TestCase):
     def test_analysis_has_a_good_property(self):
         analysis = self.analyzer.analyze(None)
         self.assertIsNotNone(analysis.good)
+
+    def test_fingerprint_depends_on_the_class(self):
+        self.assertEqual(Analyzer().fingerprint, self.analyzer.fingerprint)
+        self.assertNotEqual(SizeAnalyzer().fingerprint, self.analyzer.fingerprint)
@@ -24,11 +24,14 @@
 
 import unittest
 import tempfile
+import json
 
 import shutil
 import os
 import sys
-from blend import Application
+import StringIO
+from blend import Analyzer, Application, JSMinifier, MemoryReport, Minification, Minifier, Profiler, Resource, \
+    YUICompressorMinifier
 from helpers import create_files, create_file_with_content, clean_up_files, clean_output
 
 
@@ -38,12 +41,12 @@ class TestApplication(unittest.TestCase):
         self.test_env_dir = tempfile.mkdtemp()
         self.test_config_file_path = os.path.join(self.test_env_dir, 'config.json')
         self.default_config_file_path = os.path.join(os.getcwd(), '.blend', 'config.json')
-        if os.path.exists(self.default_config_file_path):
+        if os.path.exists(os.path.dirname(self.default_config_file_path)):
             shutil.rmtree(os.path.dirname(self.default_config_file_path))
 
     def tearDown(self):
         shutil.rmtree(self.test_env_dir)
-        if os.path.exists(self.default_config_file_path):
+        if os.path.exists(os.path.dirname(self.default_config_file_path)):
             shutil.rmtree(os.path.dirname(self.default_config_file_path))
         clean_output()
 
@@ -87,7 +90,448 @@ class TestApplication(unittest.TestCase):
         self.assertEqual(0, app.run())
         clean_up_files(paths_to_test_files)
 
+    def test_run_with_circular_requirements_returns_an_error(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2')
+        create_file_with_content(paths_to_test_files[1], '// This is file 2\n//= require file1')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], file_list=[paths_to_test_files[0]],
+            config_file_path=self.test_config_file_path)
+        self.assertEqual(-1, app.run())
+
+    def test_run_writes_the_merged_resources(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2\n// end')
+        create_file_with_content(paths_to_test_files[1], '// This is file 2\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], file_list=[paths_to_test_files[0]],
+            config_file_path=self.test_config_file_path)
+        self.assertEqual(0, app.run())
+        f = open(os.path.join(app.output_dir, 'file1.js'), 'r')
+        try:
+            self.assertEqual('// This is file 1\n// This is file 2\n// end', f.read())
+        finally:
+            f.close()
+
+    def test_run_with_a_search_path_as_the_output_dir(self):
+        create_file_with_content(os.path.join(self.test_env_dir, 'js', 'main.js'), '//= require lib\nmain\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'js', 'lib.js'), 'lib\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=self.test_env_dir,
+            config_file_path=self.test_config_file_path, metadata_index_path=None)
+        result, output = self.run_and_capture_output(app)
+        self.assertEqual(0, result)
+        self.assertEqual([os.path.join(self.test_env_dir, 'js', 'main.js')],
+            [bundle.path_to_file for bundle in app.rebuilt_bundles])
+        self.assertEqual('lib\nmain\n', open(os.path.join(self.test_env_dir, 'main.js')).read())
+
+    def test_run_with_memory_mapped_resources(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2\n// end')
+        create_file_with_content(paths_to_test_files[1], '// This is file 2\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], file_list=[paths_to_test_files[0]],
+            config_file_path=self.test_config_file_path, mmap_threshold=1)
+        try:
+            self.assertEqual(0, app.run())
+        finally:
+            Resource.mmap_threshold = None
+        f = open(os.path.join(app.output_dir, 'file1.js'), 'r')
+        try:
+            self.assertEqual('// This is file 1\n// This is file 2\n// end', f.read())
+        finally:
+            f.close()
+
+    def test_loads_ignore_patterns_from_ignore_file(self):
+        ignore_file_path = os.path.join(self.test_env_dir, 'ignore')
+        create_file_with_content(ignore_file_path, 'node_modules\n')
+        app = Application(ignore_file_path=ignore_file_path)
+        self.assertTrue('node_modules' in app.config.ignore_patterns)
+
+    def test_output_dir_is_not_searched(self):
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        create_file_with_content(os.path.join(output_dir, 'file1.js'), '//= require missing\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=output_dir,
+            config_file_path=self.test_config_file_path)
+        self.assertEqual(0, app.run())
+
+    def test_unchanged_incremental_run_reads_no_files(self):
+        create_file_with_content(self.test_config_file_path, '{}')
+        # Files modified within MetadataIndex.RACY_INTERVAL_SECONDS are always read again
+        for path_to_file in self.create_bundles(3):
+            os.utime(path_to_file, (1000000000, 1000000000))
+        for file_name in os.listdir(os.path.join(self.test_env_dir, 'lib')):
+            os.utime(os.path.join(self.test_env_dir, 'lib', file_name), (1000000000, 1000000000))
+        blend_dir = os.path.join(self.test_env_dir, '.blend')
+
+        def run():
+            Resource.cache.clear()
+            app = Application(path_list=[os.path.join(self.test_env_dir, 'app'), os.path.join(self.test_env_dir, 'lib')],
+                include_cwd=False, output_dir=os.path.join(self.test_env_dir, 'output'),
+                config_file_path=self.test_config_file_path, metadata_index_path=os.path.join(blend_dir, 'metadata.json'),
+                manifest_path=os.path.join(blend_dir, 'manifest.json'))
+            self.assertEqual(0, self.run_and_capture_output(app)[0])
+            return app
+
+        self.assertEqual(3, len(run().rebuilt_bundles))
+        app = run()
+        self.assertEqual(3, len(app.unchanged_bundles))
+        self.assertEqual(0, app.metrics.counters['bytes_read'])
+
+    def test_cold_run_reads_each_file_once(self):
+        create_file_with_content(self.test_config_file_path, '{}')
+        paths_to_files = self.create_bundles(3)
+        lib_dir = os.path.join(self.test_env_dir, 'lib')
+        paths_to_files += [os.path.join(lib_dir, file_name) for file_name in os.listdir(lib_dir)]
+        Resource.cache.clear()
+        app = Application(path_list=[os.path.join(self.test_env_dir, 'app'), lib_dir], include_cwd=False,
+            output_dir=os.path.join(self.test_env_dir, 'output'), config_file_path=self.test_config_file_path)
+        self.assertEqual(0, self.run_and_capture_output(app)[0])
+        self.assertEqual(sum(os.path.getsize(path_to_file) for path_to_file in paths_to_files),
+            app.metrics.counters['bytes_read'])
+
+    def test_incremental_run_only_rebuilds_changed_bundles(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2\n')
+        create_file_with_content(paths_to_test_files[1], '// This is file 2\n')
+        create_file_with_content(self.test_config_file_path,
+            '{"analyzers": {"javascript": [{"name": "blend.SizeAnalyzer"}]}}')
+        manifest_path = os.path.join(self.test_env_dir, '.blend', 'manifest.json')
+
+        def run():
+            app = Application(path_list=[self.test_env_dir], include_cwd=False, file_list=[paths_to_test_files[0]],
+                config_file_path=self.test_config_file_path, manifest_path=manifest_path)
+            self.assertEqual(0, app.run())
+            return app
+
+        app = run()
+        self.assertEqual(1, len(app.rebuilt_bundles))
+        self.assertTrue(os.path.exists(manifest_path))
+
+        app = run()
+        self.assertEqual(0, len(app.rebuilt_bundles))
+        self.assertEqual(1, len(app.unchanged_bundles))
+
+        create_file_with_content(paths_to_test_files[1], '// This is file 2, changed\n')
+        app = run()
+        self.assertEqual(1, len(app.rebuilt_bundles))
+        f = open(os.path.join(app.output_dir, 'file1.js'), 'r')
+        try:
+            self.assertEqual('// This is file 1\n// This is file 2, changed\n', f.read())
+        finally:
+            f.close()
+
+        os.remove(os.path.join(app.output_dir, 'file1.js'))
+        app = run()
+        self.assertEqual(1, len(app.rebuilt_bundles))
+
+    def test_each_resource_is_analyzed_once_per_run(self):
+        create_file_with_content(os.path.join(self.test_env_dir, 'app1.js'),
+            '//= require lib1\napp1\n//= require lib2\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'app2.js'), '//= require lib1\napp2\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib1.js'), 'lib1\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib2.js'), 'lib2\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False,
+            output_dir=os.path.join(self.test_env_dir, 'output'), config_file_path=self.test_config_file_path,
+            analysis_cache_path=None)
+        analyzed_paths = []
+
+        class RecordingAnalyzer(Analyzer):
+            def analyze(self, resource):
+                analyzed_paths.append(resource.path_to_file)
+                analysis = Analyzer.analyze(self, resource)
+                analysis.add_message('analyzed')
+                analysis.mark_as_good()
+                return analysis
+
+        app.config.add_analyzer_for_file_type(RecordingAnalyzer(), 'javascript')
+        self.assertEqual(0, self.run_and_capture_output(app)[0])
+        self.assertEqual(4, len(analyzed_paths))
+        self.assertEqual(4, len(set(analyzed_paths)))
+
+    def run_and_capture_output(self, app):
+        stdout = sys.stdout
+        sys.stdout = StringIO.StringIO()
+        try:
+            result = app.run()
+            return result, sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+    def create_bundles(self, count):
+        paths_to_test_files = []
+        for i in range(count):
+            path_to_test_file = os.path.join(self.test_env_dir, 'app', 'app%d.js' % i)
+            create_file_with_content(path_to_test_file, '//= require lib%d\napp %d\n' % (i, i))
+            create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib%d.js' % i), 'lib %d\n' % i * (i + 1))
+            paths_to_test_files.append(path_to_test_file)
+        return paths_to_test_files
+
+    def test_parallel_run_matches_serial_run(self):
+        self.create_bundles(6)
+        create_file_with_content(self.test_config_file_path,
+            '{"analyzers": {"javascript": [{"name": "blend.SizeAnalyzer"}]}}')
+        output_dirs = [os.path.join(self.test_env_dir, 'output%d' % jobs) for jobs in (1, 4)]
+        results = []
+        for jobs, output_dir in zip((1, 4), output_dirs):
+            app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=output_dir,
+                config_file_path=self.test_config_file_path, metadata_index_path=None, jobs=jobs)
+            result, output = self.run_and_capture_output(app)
+            results.append((result, output.replace(output_dir, 'OUTPUT'), len(app.rebuilt_bundles)))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual((0, 6), (results[1][0], results[1][2]))
+        for i in range(6):
+            file_name = 'app%d.js' % i
+            self.assertEqual(open(os.path.join(output_dirs[0], file_name)).read(),
+                open(os.path.join(output_dirs[1], file_name)).read())
+
+    def run_with_batch_recording_minifier(self, jobs, output_dir, write_unminified=True):
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=output_dir,
+            config_file_path=self.test_config_file_path, metadata_index_path=None, jobs=jobs,
+            write_unminified=write_unminified)
+        batches = []
+
+        class BatchRecordingMinifier(Minifier):
+            def minify_batch(self, resources):
+                batches.append(sorted(os.path.basename(resource.path_to_file) for resource in resources))
+                return Minifier.minify_batch(self, resources)
+
+            def minify(self, resource):
+                return self._minify(resource.content)
+
+            def minify_content(self, content, file_type):
+                batches.append(file_type)
+                return self._minify(content)
+
+            def _minify(self, content):
+                minification = Minification()
+                minification.set_content(content.replace('\n', ''))
+                minification.mark_as_good()
+                return minification
+
+        app.config.set_minifier_for_file_type(BatchRecordingMinifier(), 'javascript')
+        self.assertEqual(0, self.run_and_capture_output(app)[0])
+        return batches
+
+    def test_serial_run_minifies_all_the_bundles_in_one_batch(self):
+        self.create_bundles(3)
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        batches = self.run_with_batch_recording_minifier(1, output_dir)
+        self.assertEqual([['app0.js', 'app1.js', 'app2.js']], batches)
+        self.assertEqual('lib 1lib 1app 1', open(os.path.join(output_dir, 'app1-min.js')).read())
+
+    def test_run_without_unminified_output_minifies_the_merged_content_in_memory(self):
+        self.create_bundles(2)
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        self.assertEqual(['javascript', 'javascript'], self.run_with_batch_recording_minifier(1, output_dir, False))
+        self.assertEqual(['app0-min.js', 'app1-min.js'], sorted(os.listdir(output_dir)))
+        self.assertEqual('lib 1lib 1app 1', open(os.path.join(output_dir, 'app1-min.js')).read())
+
+    def run_with_chunk_recording_minifier(self, output_dir):
+        create_file_with_content(self.test_config_file_path, '{}')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=output_dir,
+            config_file_path=self.test_config_file_path, metadata_index_path=None, minify_chunks=True,
+            minification_cache_path=os.path.join(self.test_env_dir, 'cache'))
+        minified_contents = []
+
+        class ChunkRecordingMinifier(Minifier):
+            def minify_content(self, content, file_type):
+                minified_contents.append(content)
+                minification = Minification()
+                minification.set_content(content.replace(' ', ''))
+                minification.mark_as_good()
+                return minification
+
+        app.config.set_minifier_for_file_type(ChunkRecordingMinifier(), 'javascript')
+        self.assertEqual(0, self.run_and_capture_output(app)[0])
+        return sorted(minified_contents)
+
+    def test_run_with_minify_chunks_minifies_each_piece_once(self):
+        create_file_with_content(os.path.join(self.test_env_dir, 'app', 'app1.js'),
+            '//= require lib\nvar app = 1;\n//= require jquery\nvar end = 1;\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'app', 'app2.js'), '//= require lib\nvar app = 2;\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib.js'), 'var lib = 1;\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'jquery.min.js'), 'var $ = 1;\n')
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        self.assertEqual(['var app = 1;\n', 'var app = 2;\n', 'var end = 1;\n', 'var lib = 1;\n'],
+            self.run_with_chunk_recording_minifier(output_dir))
+        self.assertEqual('varlib=1;\nvarapp=1;\nvar $ = 1;\nvarend=1;',
+            open(os.path.join(output_dir, 'app1-min.js')).read())
+        self.assertEqual('varlib=1;\nvarapp=2;', open(os.path.join(output_dir, 'app2-min.js')).read())
+
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib.js'), 'var lib = 2;\n')
+        self.assertEqual(['var lib = 2;\n'], self.run_with_chunk_recording_minifier(output_dir))
+        self.assertEqual('varlib=2;\nvarapp=2;', open(os.path.join(output_dir, 'app2-min.js')).read())
+
+    def test_run_with_the_js_minifier(self):
+        create_file_with_content(os.path.join(self.test_env_dir, 'app', 'app.js'),
+            '//= require lib\n// The app\nvar app = lib + 1;\n')
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib.js'), '/* The lib */\nvar lib = 1;\n')
+        create_file_with_content(self.test_config_file_path, '{}')
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        app = Application(path_list=[self.test_env_dir], include_cwd=False, output_dir=output_dir,
+            config_file_path=self.test_config_file_path, metadata_index_path=None, minification_cache_path=None)
+        app.config.set_minifier_for_file_type(JSMinifier(), 'javascript')
+        self.assertEqual(0, self.run_and_capture_output(app)[0])
+        self.assertEqual('var lib=1;var app=lib+1;', open(os.path.join(output_dir, 'app-min.js')).read())
+
+    def test_unchanged_bundles_are_not_minified_again(self):
+        self.create_bundles(3)
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        self.assertEqual([['app0.js', 'app1.js', 'app2.js']], self.run_with_batch_recording_minifier(1, output_dir))
+        create_file_with_content(os.path.join(self.test_env_dir, 'lib', 'lib1.js'), 'lib one\n')
+        self.assertEqual([['app1.js']], self.run_with_batch_recording_minifier(1, output_dir))
+        self.assertEqual('lib 0app 0', open(os.path.join(output_dir, 'app0-min.js')).read())
+        self.assertEqual('lib oneapp 1', open(os.path.join(output_dir, 'app1-min.js')).read())
+
+    def test_parallel_run_minifies_a_batch_per_job(self):
+        self.create_bundles(4)
+        output_dir = os.path.join(self.test_env_dir, 'output')
+        batches = self.run_with_batch_recording_minifier(2, output_dir)
+        self.assertEqual(2, len(batches))
+        self.assertEqual(['app%d.js' % i for i in range(4)], sorted(sum(batches, [])))
+        self.assertEqual('lib 1lib 1app 1', open(os.path.join(output_dir, 'app1-min.js')).read())
+
+    def test_failed_parallel_run_leaves_the_same_files_as_a_serial_run(self):
+        self.create_bundles(6)
+        create_file_with_content(self.test_config_file_path, '{}')
+
+        class FailingAnalyzer(Analyzer):
+            def analyze(self, resource):
+                analysis = Analyzer.analyze(self, resource)
+                analysis.add_message('analyzed')
+                if os.path.basename(resource.path_to_file) != 'app1.js':
+                    analysis.mark_as_good()
+                return analysis
+
+        output_files = []
+        for jobs in (1, 3):
+            output_dir = os.path.join(self.test_env_dir, 'output%d' % jobs)
+            app = Application(path_list=[os.path.join(self.test_env_dir, 'app'), os.path.join(self.test_env_dir, 'lib')],
+                include_cwd=False, output_dir=output_dir, config_file_path=self.test_config_file_path,
+                metadata_index_path=None, jobs=jobs, analysis_cache_path=None)
+            app.config.add_analyzer_for_file_type(FailingAnalyzer(), 'javascript')
+            self.assertEqual(-1, self.run_and_capture_output(app)[0])
+            output_files.append(sorted(os.listdir(output_dir)))
+        self.assertEqual(['app0.js'], output_files[0])
+        self.assertEqual(output_files[0], output_files[1])
+
+    def test_parallel_run_reports_the_first_failure_like_a_serial_run(self):
+        self.create_bundles(4)
+        create_file_with_content(self.test_config_file_path, '{}')
+        results = []
+        for jobs in (1, 3):
+            app = Application(path_list=[self.test_env_dir], include_cwd=False,
+                output_dir=os.path.join(self.test_env_dir, 'output'),
+                config_file_path=self.test_config_file_path, metadata_index_path=None, jobs=jobs)
+            app.config.set_minifier_for_file_type(
+                YUICompressorMinifier({'lib_path': os.path.join(self.test_env_dir, 'missing')}), 'javascript')
+            results.append(self.run_and_capture_output(app))
+        self.assertEqual(-1, results[0][0])
+        self.assertEqual(results[0], results[1])
+
     @unittest.skipIf(len(sys.argv) > 1, "If arguments are passed to the unit test runner, this test fails")
+    def test_profiled_run_writes_a_chrome_trace(self):
+        self.create_bundles(3)
+        create_file_with_content(self.test_config_file_path,
+            '{"analyzers": {"javascript": [{"name": "blend.SizeAnalyzer"}]}}')
+        for jobs in (1, 2):
+            profile_path = os.path.join(self.test_env_dir, 'profile%d.json' % jobs)
+            app = Application(path_list=[self.test_env_dir], include_cwd=False,
+                output_dir=os.path.join(self.test_env_dir, 'output%d' % jobs),
+                config_file_path=self.test_config_file_path, metadata_index_path=None, jobs=jobs,
+                analysis_cache_path=None, minification_cache_path=None, profile_path=profile_path)
+            app.config.set_minifier_for_file_type(JSMinifier(), 'javascript')
+            result, output = self.run_and_capture_output(app)
+            self.assertEqual(0, result)
+            self.assertTrue('Slowest resources and tools:' in output)
+            self.assertTrue(('Wrote the profile to %s' % profile_path) in output)
+            self.assertEqual(None, Profiler.active)
+
+            events = json.load(open(profile_path))['traceEvents']
+            self.assertEqual(['build', 'discovery', 'minification', 'requirements', 'resolution'],
+                sorted(event['name'] for event in events if event['cat'] == 'phase'))
+            self.assertEqual(sorted(os.path.join(self.test_env_dir, 'app', 'app%d.js' % i) for i in range(3)),
+                sorted(event['name'] for event in events if event['cat'] == 'bundle'))
+            # Each bundle's two files are analyzed together
+            self.assertEqual([2, 2, 2], [len(event['args']['files']) for event in events
+                if event['cat'] == 'resource' and event.get('args', {}).get('analyzer') == 'SizeAnalyzer'])
+            self.assertEqual(6, len([event for event in events if event['cat'] == 'write']))
+
+    def test_run_counts_metrics(self):
+        self.create_bundles(3)
+        create_file_with_content(self.test_config_file_path,
+            '{"analyzers": {"javascript": [{"name": "blend.SizeAnalyzer"}]}}')
+        counters = []
+        for jobs in (1, 2):
+            output_dir = os.path.join(self.test_env_dir, 'output%d' % jobs)
+            metrics_path = os.path.join(self.test_env_dir, 'metrics%d.prom' % jobs)
+            Resource.cache.clear()
+            app = Application(path_list=[os.path.join(self.test_env_dir, 'app'), os.path.join(self.test_env_dir, 'lib')],
+                include_cwd=False, output_dir=output_dir,
+                config_file_path=self.test_config_file_path, metadata_index_path=None, jobs=jobs,
+                analysis_cache_path=None, minification_cache_path=None, metrics_path=metrics_path,
+                metrics_format='prometheus')
+            app.config.set_minifier_for_file_type(JSMinifier(), 'javascript')
+            self.assertEqual(0, self.run_and_capture_output(app)[0])
+
+            output_sizes = app.metrics.output_sizes
+            self.assertEqual(3, len(output_sizes))
+            bundle_path = os.path.join(self.test_env_dir, 'app', 'app1.js')
+            self.assertEqual({
+                os.path.join(output_dir, 'app1.js'): os.path.getsize(os.path.join(output_dir, 'app1.js')),
+                os.path.join(output_dir, 'app1-min.js'): os.path.getsize(os.path.join(output_dir, 'app1-min.js'))
+            }, output_sizes[bundle_path])
+            self.assertEqual(sum(sum(sizes.values()) for sizes in output_sizes.values()),
+                app.metrics.counters['bytes_written'])
+            self.assertEqual(app.metrics.to_prometheus(), open(metrics_path).read())
+            counters.append(app.metrics.counters)
+
+        self.assertEqual(6, counters[0]['files_walked'])
+        self.assertEqual(3, counters[0]['requirements_resolved'])
+        self.assertEqual(6, counters[0]['analysis_cache_misses'])
+        self.assertEqual(3, counters[0]['minification_cache_misses'])
+        self.assertTrue(counters[0]['bytes_read'] > 0)
+        self.assertEqual(counters[0], counters[1])
+
+    def test_run_reports_memory(self):
+        self.create_bundles(2)
+        create_file_with_content(self.test_config_file_path,
+            '{"analyzers": {"javascript": [{"name": "blend.SizeAnalyzer"}]}}')
+        for jobs in (1, 2):
+            output_dir = os.path.join(self.test_env_dir, 'output%d' % jobs)
+            Resource.cache.clear()
+            app = Application(path_list=[os.path.join(self.test_env_dir, 'app'), os.path.join(self.test_env_dir, 'lib')],
+                include_cwd=False, output_dir=output_dir, config_file_path=self.test_config_file_path,
+                metadata_index_path=None, jobs=jobs, analysis_cache_path=None, minification_cache_path=None,
+                memory_report=True)
+            app.config.set_minifier_for_file_type(JSMinifier(), 'javascript')
+            result, output = self.run_and_capture_output(app)
+            self.assertEqual(0, result)
+            self.assertTrue(MemoryReport.active is None)
+
+            report = app.memory_report
+            self.assertEqual(['discovery', 'requirements', 'resolution', 'build', 'minification'],
+                [phase['name'] for phase in report.phases])
+            self.assertEqual([
+                (os.path.join(self.test_env_dir, 'app', 'app1.js'), len('lib 1\nlib 1\napp 1\n')),
+                (os.path.join(self.test_env_dir, 'app', 'app0.js'), len('lib 0\napp 0\n'))
+            ], report.largest_bundles(10))
+            self.assertEqual(Resource.cache.loaded_bytes, report.resource_cache['loaded_bytes'])
+            self.assertTrue('Peak resident memory by phase:' in output)
+            self.assertTrue('Resource.cache holds' in output)
+
     def test_main_exits_cleanly_when_no_args_are_passed(self):
         app = Application
         try:
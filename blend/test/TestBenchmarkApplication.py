@@ -0,0 +1,60 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+
+from blend.benchmark.BenchmarkApplication import MIN_REGRESSION_SECONDS, find_regressions
+
+
+class TestBenchmarkApplication(unittest.TestCase):
+    """Asserts that the benchmark of Application only reports phases that regressed past the threshold."""
+
+    def results(self, cold, warm=None):
+        return {'cold': dict(cold), 'warm': dict(warm or cold)}
+
+    def test_phases_slower_than_the_threshold_are_regressions(self):
+        baseline = self.results({'discovery': 1.0, 'build': 2.0, 'total': 3.0})
+        results = self.results({'discovery': 1.2, 'build': 2.6, 'total': 3.8}, {'discovery': 1.0, 'build': 2.0,
+            'total': 3.0})
+        self.assertEqual([('cold', 'build', 2.0, 2.6), ('cold', 'total', 3.0, 3.8)],
+            find_regressions(baseline, results, 0.25))
+        self.assertEqual([('cold', 'build', 2.0, 2.6)], find_regressions(baseline, results, 0.27))
+        self.assertEqual([], find_regressions(baseline, results, 0.5))
+
+    def test_faster_phases_are_not_regressions(self):
+        baseline = self.results({'build': 2.0})
+        self.assertEqual([], find_regressions(baseline, self.results({'build': 1.0}), 0))
+
+    def test_changes_smaller_than_the_minimum_are_not_regressions(self):
+        baseline = self.results({'requirements': 0.001})
+        self.assertEqual([], find_regressions(baseline,
+            self.results({'requirements': 0.001 + MIN_REGRESSION_SECONDS / 2}), 0.25))
+        self.assertEqual([('cold', 'requirements', 0.001, 0.001 + MIN_REGRESSION_SECONDS * 2),
+            ('warm', 'requirements', 0.001, 0.001 + MIN_REGRESSION_SECONDS * 2)],
+            find_regressions(baseline, self.results({'requirements': 0.001 + MIN_REGRESSION_SECONDS * 2}), 0.25))
+
+    def test_phases_missing_from_either_result_are_skipped(self):
+        baseline = self.results({'build': 1.0, 'minification': 1.0})
+        results = self.results({'build': 1.0, 'discovery': 5.0})
+        self.assertEqual([], find_regressions(baseline, results, 0.25))
@@ -33,6 +33,39 @@ class TestBlend(unittest.TestCase):
     def test_blend_has_a_resource_class(self):
         inspect.isclass(Resource)
 
+    def test_blend_has_a_resource_cache_class(self):
+        inspect.isclass(ResourceCache)
+
+    def test_blend_has_a_resource_index_class(self):
+        inspect.isclass(ResourceIndex)
+
+    def test_blend_has_a_resource_resolver_class(self):
+        inspect.isclass(ResourceResolver)
+
+    def test_blend_has_a_build_manifest_class(self):
+        inspect.isclass(BuildManifest)
+
+    def test_blend_has_a_watcher_class(self):
+        inspect.isclass(Watcher)
+
+    def test_blend_has_a_disk_cache_class(self):
+        inspect.isclass(DiskCache)
+
+    def test_blend_has_an_analysis_cache_class(self):
+        inspect.isclass(AnalysisCache)
+
+    def test_blend_has_a_minification_cache_class(self):
+        inspect.isclass(MinificationCache)
+
+    def test_blend_has_a_dependency_graph_class(self):
+        inspect.isclass(DependencyGraph)
+
+    def test_blend_has_a_metadata_index_class(self):
+        inspect.isclass(MetadataIndex)
+
+    def test_blend_has_a_directory_walker_class(self):
+        inspect.isclass(DirectoryWalker)
+
     def test_blend_has_a_requirement_class(self):
         inspect.isclass(Requirement)
 
@@ -57,6 +90,9 @@ class TestBlend(unittest.TestCase):
     def test_blend_has_a_JSLintAnalyzerClass(self):
         inspect.isclass(JSLintAnalyzer)
 
+    def test_blend_has_a_JSLintWorkerPool_class(self):
+        inspect.isclass(JSLintWorkerPool)
+
     def test_blend_has_a_minifier_class(self):
         inspect.isclass(Minifier)
 
@@ -68,3 +104,18 @@ class TestBlend(unittest.TestCase):
 
     def test_blend_has_a_YUICompressorMinifier_class(self):
         inspect.isclass(YUICompressorMinifier)
+
+    def test_blend_has_a_CSSMinifier_class(self):
+        inspect.isclass(CSSMinifier)
+
+    def test_blend_has_a_JSMinifier_class(self):
+        inspect.isclass(JSMinifier)
+
+    def test_blend_has_a_Profiler_class(self):
+        inspect.isclass(Profiler)
+
+    def test_blend_has_a_Metrics_class(self):
+        inspect.isclass(Metrics)
+
+    def test_blend_has_a_MemoryReport_class(self):
+        inspect.isclass(MemoryReport)
@@ -0,0 +1,104 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import BuildManifest, Minifier, Resource, SizeAnalyzer
+import shutil
+import os
+import helpers
+
+
+class TestBuildManifest(unittest.TestCase):
+    """Asserts that the BuildManifest class detects the changes that require a bundle to be built again."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.manifest_file_path = os.path.join(self.test_env_dir, '.blend', 'manifest.json')
+        self.bundle_path = os.path.join(self.test_env_dir, 'file1.js')
+        self.input_path = os.path.join(self.test_env_dir, 'file2.js')
+        self.output_path = os.path.join(self.test_env_dir, 'output', 'file1.js')
+        helpers.create_file_with_content(self.bundle_path, '//= require file2\n')
+        helpers.create_file_with_content(self.input_path, 'var foo = {};\n')
+        helpers.create_file_with_content(self.output_path, 'var foo = {};\n\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def create_entry(self, input_paths=None, analyzers=None, minifier=None):
+        inputs = [Resource(path) for path in input_paths or [self.input_path, self.bundle_path]]
+        analyzer_lists = dict((resource, analyzers) for resource in inputs)
+        return BuildManifest.create_entry(inputs, analyzer_lists, minifier, [self.output_path])
+
+    def test_a_recorded_entry_survives_a_save_and_needs_no_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        self.assertEqual(['it has not been built before'],
+            manifest.reasons_to_rebuild(self.bundle_path, self.create_entry()))
+        manifest.record(self.bundle_path, self.create_entry())
+        manifest.save()
+
+        manifest = BuildManifest(self.manifest_file_path)
+        self.assertEqual([], manifest.reasons_to_rebuild(self.bundle_path, self.create_entry()))
+
+    def test_changed_inputs_are_reasons_to_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        manifest.record(self.bundle_path, self.create_entry())
+
+        helpers.create_file_with_content(self.input_path, 'var bar = {};\n')
+        self.assertEqual(['%s changed' % self.input_path],
+            manifest.reasons_to_rebuild(self.bundle_path, self.create_entry()))
+        self.assertEqual(['%s is no longer an input' % self.input_path],
+            manifest.reasons_to_rebuild(self.bundle_path, self.create_entry([self.bundle_path])))
+
+    def test_changed_configuration_is_a_reason_to_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        manifest.record(self.bundle_path, self.create_entry(analyzers=[SizeAnalyzer()]))
+
+        reasons = manifest.reasons_to_rebuild(self.bundle_path,
+            self.create_entry(analyzers=[SizeAnalyzer({'verbose': True})], minifier=Minifier()))
+        self.assertEqual(['the analyzers of %s changed' % self.bundle_path,
+            'the analyzers of %s changed' % self.input_path,
+            'the minifier changed'], reasons)
+
+    def test_minifying_chunks_is_a_reason_to_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        manifest.record(self.bundle_path, self.create_entry(minifier=Minifier()))
+        entry = BuildManifest.create_entry([Resource(self.input_path), Resource(self.bundle_path)], {},
+            Minifier(), [self.output_path], minify_chunks=True)
+        self.assertEqual(['the minifier changed'], manifest.reasons_to_rebuild(self.bundle_path, entry))
+
+    def test_missing_outputs_are_reasons_to_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        manifest.record(self.bundle_path, self.create_entry())
+        os.remove(self.output_path)
+        self.assertEqual(['%s is missing' % self.output_path],
+            manifest.reasons_to_rebuild(self.bundle_path, self.create_entry()))
+
+    def test_removed_entries_need_a_rebuild(self):
+        manifest = BuildManifest(self.manifest_file_path)
+        manifest.record(self.bundle_path, self.create_entry())
+        manifest.remove(self.bundle_path)
+        self.assertEqual(['it has not been built before'],
+            manifest.reasons_to_rebuild(self.bundle_path, self.create_entry()))
@@ -0,0 +1,120 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import os
+import shutil
+import tempfile
+from helpers import create_file_with_content
+from blend import CSSMinifier, Resource
+
+# Stylesheets and the output of the YUI Compressor 2.4.6 for each of them
+YUI_CORPUS = [
+    ('/* comment */\nbody {\n    color: #FFFFFF;\n    margin: 0px 0px 0px 0px;\n}\n',
+        'body{color:#fff;margin:0}'),
+    ('a:hover , a :link { color : rgb(51, 102, 153) ; }',
+        'a:hover,a :link{color:#369}'),
+    ('p { opacity: 0.50; padding: 0.5em 0em; }',
+        'p{opacity:.50;padding:.5em 0}'),
+    ('/*! license */\n.empty { }\ndiv { font-family: "Times  New /* not a comment */ Roman"; }',
+        '/*! license */div{font-family:"Times  New /* not a comment */ Roman"}'),
+    ('html >/**/ body p { color: #aabbcc; border: none; }',
+        'html>/**/body p{color:#abc;border:0}'),
+    ('.ie { filter: progid:DXImageTransform.Microsoft.Alpha(Opacity=80); }',
+        '.ie{filter:alpha(opacity=80)}'),
+    ('.chroma { filter: chroma(color="#FFFFFF"); }',
+        '.chroma{filter:chroma(color="#FFFFFF")}'),
+    ('.a { background-position: 0 0; }',
+        '.a{background-position:0 0}'),
+    ('a { color: red;; }',
+        'a{color:red}'),
+    ('@media screen and (max-width: 100px) { p { color: red; } }',
+        '@media screen and (max-width:100px){p{color:red}}'),
+    ('/* hack \\*/\n.mac { color: red; }\n/* end */',
+        '/*\\*/.mac{color:red}/**/'),
+    ('p:first-letter { color: red; }',
+        'p:first-letter {color:red}'),
+    ('a { color: red !important; }',
+        'a{color:red!important}'),
+]
+
+
+class TestCSSMinifier(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def test_output_matches_the_yui_compressor_without_merging_rules(self):
+        minifier = CSSMinifier({'merge_rules': False})
+        for css, expected in YUI_CORPUS:
+            self.assertEqual(expected, minifier.compress(css))
+
+    def test_merging_rules_does_not_change_the_yui_corpus(self):
+        minifier = CSSMinifier()
+        for css, expected in YUI_CORPUS:
+            self.assertEqual(expected, minifier.compress(css))
+
+    def test_adjacent_rules_with_the_same_selector_are_merged(self):
+        self.assertEqual('a{color:red;margin:0}b{margin:0}',
+            CSSMinifier().compress('a { color: red } a { margin: 0 } b { margin: 0 }'))
+
+    def test_adjacent_rules_with_the_same_declarations_are_merged(self):
+        self.assertEqual('a,b{color:red}a{margin:0}', CSSMinifier().compress('a{color:red}b{color:red}a{margin:0}'))
+
+    def test_rules_in_media_blocks_are_merged(self):
+        self.assertEqual('@media print{p,q{color:red}}', CSSMinifier().compress('@media print{p{color:red}q{color:red}}'))
+
+    def test_rules_that_are_not_adjacent_are_not_merged(self):
+        css = 'a{color:red}b{color:blue}a{color:red}'
+        self.assertEqual(css, CSSMinifier().compress(css))
+
+    def test_rules_with_pseudo_classes_are_not_merged_by_declarations(self):
+        css = 'a::-moz-selection{color:red}a::selection{color:red}'
+        self.assertEqual(css, CSSMinifier().compress(css))
+
+    def test_at_rules_are_not_merged(self):
+        css = '@font-face{font-family:x}@font-face{font-family:x}'
+        self.assertEqual(css, CSSMinifier().compress(css))
+
+    def test_minify_a_resource(self):
+        test_file_path = os.path.join(self.test_env_dir, 'test.css')
+        create_file_with_content(test_file_path, 'a {\n    color: #FF0000;\n}\n')
+        minification = CSSMinifier().minify(Resource(test_file_path))
+        self.assertTrue(minification.good)
+        self.assertEqual('a{color:#f00}', minification.content)
+
+    def test_minifying_an_already_minified_resource_returns_unmodified_content(self):
+        test_file_path = os.path.join(self.test_env_dir, 'test.min.css')
+        create_file_with_content(test_file_path, 'a { color: red }')
+        minification = CSSMinifier().minify(Resource(test_file_path))
+        self.assertTrue(minification.good)
+        self.assertEqual('a { color: red }', minification.content)
+
+    def test_content_other_than_css_cannot_be_minified(self):
+        minification = CSSMinifier().minify_content('var a = 1;', 'javascript')
+        self.assertFalse(minification.good)
+        self.assertEqual(["The CSSMinifier cannot minify content of type 'javascript'."], minification.errors)
@@ -30,6 +30,7 @@ from blend.Resource import Resource
 from blend.SizeAnalyzer import SizeAnalyzer
 from blend import Minifier
 from blend.YUICompressorMinifier import YUICompressorMinifier
+from blend.CSSMinifier import CSSMinifier
 
 import os
 import shutil
@@ -114,6 +115,22 @@ class TestConfiguration(unittest.TestCase):
         self.assertIsNotNone(actual_minifier)
         self.assertIsInstance(actual_minifier, YUICompressorMinifier)
 
+    def test_can_load_minifier_options_from_config_file(self):
+        config_file_path = os.path.join(self.test_env_dir, 'blend.config')
+        create_file_with_content(config_file_path,
+            """{
+                "minifiers": {
+                    "css": {
+                        "name": "blend.CSSMinifier",
+                        "options": {"merge_rules": false}
+                    }
+                }
+            }""")
+        conf = Configuration(config_file_path)
+        actual_minifier = conf.get_minifier_for_file_type('css')
+        self.assertIsInstance(actual_minifier, CSSMinifier)
+        self.assertEqual('a{color:red}b{color:red}', actual_minifier.compress('a { color: red; } b { color: red; }'))
+
     def test_can_add_minifier_for_filetype(self):
         conf = Configuration()
         minifier = Minifier()
@@ -154,3 +171,26 @@ class TestConfiguration(unittest.TestCase):
     def test_add_analyzer_for_file_type_raises_when_skip_list_is_a_string(self):
         conf = Configuration()
         self.assertRaises(Exception, conf.add_analyzer_for_file_type, Analyzer(), 'javascript', 'something invalid')
+
+    def test_version_control_directories_are_ignored_by_default(self):
+        conf = Configuration()
+        self.assertTrue('.git' in conf.ignore_patterns)
+
+    def test_can_load_ignore_patterns_from_config_file(self):
+        config_file_path = os.path.join(self.test_env_dir, 'blend.config')
+        create_file_with_content(config_file_path, '{"ignore": ["node_modules", "build/*"]}')
+        conf = Configuration(config_file_path)
+        self.assertTrue('node_modules' in conf.ignore_patterns)
+        self.assertTrue('build/*' in conf.ignore_patterns)
+
+    def test_ignore_setting_must_be_a_list(self):
+        config_file_path = os.path.join(self.test_env_dir, 'blend.config')
+        create_file_with_content(config_file_path, '{"ignore": "node_modules"}')
+        self.assertRaises(Exception, Configuration, config_file_path)
+
+    def test_can_load_ignore_patterns_from_ignore_file(self):
+        ignore_file_path = os.path.join(self.test_env_dir, 'ignore')
+        create_file_with_content(ignore_file_path, '# Dependencies\nnode_modules\n\n  *.tmp.js  \n')
+        conf = Configuration()
+        conf.load_ignore_file(ignore_file_path)
+        self.assertEqual(Configuration.DEFAULT_IGNORE_PATTERNS + ['node_modules', '*.tmp.js'], conf.ignore_patterns)
@@ -0,0 +1,120 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import Resource, Paths, ResourceIndex, DependencyGraph
+from blend.Requirement import RequirementNotSatisfiedException, CircularRequirementException
+import shutil
+import os
+import helpers
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """Asserts that the DependencyGraph class resolves requirements correctly."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+        helpers.clean_output()
+
+    def create_diamond(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js'),
+            os.path.join(self.test_env_dir, 'dir3', 'file3.js'),
+            os.path.join(self.test_env_dir, 'dir4', 'file4.js')]
+        helpers.create_file_with_content(paths_to_test_files[0], '//= require file2\n//= require file3\n')
+        helpers.create_file_with_content(paths_to_test_files[1], '//= require file4\n')
+        helpers.create_file_with_content(paths_to_test_files[2], '//= require file4\n')
+        helpers.create_file_with_content(paths_to_test_files[3], '// This is file 4\n')
+        return paths_to_test_files
+
+    def create_index(self):
+        return ResourceIndex(Paths(self.test_env_dir, include_cwd=False))
+
+    def test_requirements_are_resolved(self):
+        paths_to_test_files = self.create_diamond()
+        index = self.create_index()
+        file1_resource = Resource.load(paths_to_test_files[0])
+        graph = DependencyGraph(index, [file1_resource])
+
+        required_paths = [resource.path_to_file for resource in graph.required_resources(file1_resource)]
+        self.assertEqual(paths_to_test_files[1:3], required_paths)
+        self.assertEqual(paths_to_test_files[1],
+            graph.required_resource(file1_resource, file1_resource.requirements[0]).path_to_file)
+
+    def test_dependents_are_the_reverse_of_requirements(self):
+        paths_to_test_files = self.create_diamond()
+        graph = DependencyGraph(self.create_index(), [Resource.load(paths_to_test_files[0])])
+        file4_resource = Resource.load(paths_to_test_files[3])
+        self.assertEqual(paths_to_test_files[1:3],
+            [resource.path_to_file for resource in graph.dependents(file4_resource)])
+        self.assertEqual([], graph.dependents(Resource.load(paths_to_test_files[0])))
+
+    def test_shared_requirements_are_added_once(self):
+        paths_to_test_files = self.create_diamond()
+        graph = DependencyGraph(self.create_index(), [Resource.load(paths_to_test_files[0])])
+        self.assertEqual(4, len(graph.resources))
+
+    def test_topological_order_puts_requirements_first(self):
+        paths_to_test_files = self.create_diamond()
+        graph = DependencyGraph(self.create_index(), [Resource.load(paths_to_test_files[0])])
+        ordered_paths = [resource.path_to_file for resource in graph.topological_order()]
+        self.assertEqual([paths_to_test_files[3], paths_to_test_files[1], paths_to_test_files[2],
+            paths_to_test_files[0]], ordered_paths)
+
+    def test_topological_order_of_a_subset(self):
+        paths_to_test_files = self.create_diamond()
+        graph = DependencyGraph(self.create_index(), [Resource.load(paths_to_test_files[0])])
+        ordered_paths = [resource.path_to_file for resource in
+            graph.topological_order([Resource.load(paths_to_test_files[2])])]
+        self.assertEqual([paths_to_test_files[3], paths_to_test_files[2]], ordered_paths)
+
+    def test_unsatisfied_requirement_raises(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        helpers.create_file_with_content(path_to_test_file, '//= require missing\n')
+        index = self.create_index()
+        self.assertRaises(RequirementNotSatisfiedException, DependencyGraph, index,
+            [Resource.load(path_to_test_file)])
+
+    def test_cycles_are_reported(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'file1.js'),
+            os.path.join(self.test_env_dir, 'file2.js'),
+            os.path.join(self.test_env_dir, 'file3.js')]
+        helpers.create_file_with_content(paths_to_test_files[0], '//= require file2\n')
+        helpers.create_file_with_content(paths_to_test_files[1], '//= require file3\n')
+        helpers.create_file_with_content(paths_to_test_files[2], '//= require file1\n')
+        index = self.create_index()
+        try:
+            DependencyGraph(index, [Resource.load(paths_to_test_files[0])])
+            self.fail('Expected a CircularRequirementException')
+        except CircularRequirementException, cre:
+            cycle_paths = [resource.path_to_file for resource in cre.cycle]
+            self.assertEqual(paths_to_test_files + [paths_to_test_files[0]], cycle_paths)
+            self.assertTrue(paths_to_test_files[2] in str(cre))
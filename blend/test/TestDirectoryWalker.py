@@ -0,0 +1,124 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import DirectoryWalker
+import shutil
+import os
+import helpers
+
+
+class TestDirectoryWalker(unittest.TestCase):
+    """Asserts that the DirectoryWalker class lists files correctly."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        helpers.create_files([
+            os.path.join(self.test_env_dir, 'b.js'),
+            os.path.join(self.test_env_dir, 'a.CSS'),
+            os.path.join(self.test_env_dir, 'readme.txt'),
+            os.path.join(self.test_env_dir, 'dir2', 'd.js'),
+            os.path.join(self.test_env_dir, 'dir1', 'c.js'),
+            os.path.join(self.test_env_dir, 'dir1', 'sub', 'e.js'),
+            os.path.join(self.test_env_dir, 'dir1', 'empty', 'movie.avi')])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def relative_results(self, results):
+        return [(os.path.relpath(directory_path, self.test_env_dir), file_names)
+            for directory_path, file_names in results]
+
+    def test_walk_lists_files_depth_first_in_order_by_name(self):
+        results = DirectoryWalker().walk(self.test_env_dir)
+        self.assertEqual([
+            ('.', ['a.CSS', 'b.js', 'readme.txt']),
+            ('dir1', ['c.js']),
+            (os.path.join('dir1', 'empty'), ['movie.avi']),
+            (os.path.join('dir1', 'sub'), ['e.js']),
+            ('dir2', ['d.js'])], self.relative_results(results))
+
+    def test_walk_filters_by_extension(self):
+        results = DirectoryWalker(['css']).walk(self.test_env_dir)
+        self.assertEqual([('.', ['a.CSS'])], self.relative_results(results))
+
+    def test_walk_can_include_directories_without_matching_files(self):
+        results = DirectoryWalker(['css']).walk(self.test_env_dir, include_empty_directories=True)
+        self.assertEqual([
+            ('.', ['a.CSS']),
+            ('dir1', []),
+            (os.path.join('dir1', 'empty'), []),
+            (os.path.join('dir1', 'sub'), []),
+            ('dir2', [])], self.relative_results(results))
+
+    def test_results_do_not_depend_on_the_number_of_threads(self):
+        single_threaded_results = DirectoryWalker(['js', 'css'], thread_count=1).walk(self.test_env_dir)
+        multi_threaded_results = DirectoryWalker(['js', 'css'], thread_count=4).walk(self.test_env_dir)
+        self.assertEqual(single_threaded_results, multi_threaded_results)
+
+    def test_walk_of_a_missing_directory_is_empty(self):
+        self.assertEqual([], DirectoryWalker().walk(os.path.join(self.test_env_dir, 'missing')))
+
+    def test_walk_matches_os_walk(self):
+        os_walk_file_paths = []
+        for dir_path, dir_names, file_names in os.walk(self.test_env_dir):
+            os_walk_file_paths.extend([os.path.join(dir_path, file_name) for file_name in file_names])
+        walker_file_paths = []
+        for dir_path, file_names in DirectoryWalker().walk(self.test_env_dir):
+            walker_file_paths.extend([os.path.join(dir_path, file_name) for file_name in file_names])
+        self.assertEqual(sorted(os_walk_file_paths), sorted(walker_file_paths))
+
+    def test_ignored_directories_and_files_are_skipped(self):
+        results = DirectoryWalker(ignore_patterns=['sub', '*.txt', os.path.join('dir1', 'empty')]).walk(self.test_env_dir)
+        self.assertEqual([
+            ('.', ['a.CSS', 'b.js']),
+            ('dir1', ['c.js']),
+            ('dir2', ['d.js'])], self.relative_results(results))
+
+    def test_absolute_ignore_patterns(self):
+        results = DirectoryWalker(ignore_patterns=[os.path.join(self.test_env_dir, 'dir*')]).walk(self.test_env_dir)
+        self.assertEqual([('.', ['a.CSS', 'b.js', 'readme.txt'])], self.relative_results(results))
+
+    def test_ignored_paths_are_not_read(self):
+        results = DirectoryWalker(ignore_paths=[os.path.join(self.test_env_dir, 'dir1')]).walk(self.test_env_dir)
+        self.assertEqual([
+            ('.', ['a.CSS', 'b.js', 'readme.txt']),
+            ('dir2', ['d.js'])], self.relative_results(results))
+        # Only directories below the one being walked are skipped
+        self.assertEqual(self.relative_results(DirectoryWalker().walk(self.test_env_dir)),
+            self.relative_results(DirectoryWalker(ignore_paths=[self.test_env_dir]).walk(self.test_env_dir)))
+
+    def test_paths_in_ignored_directories_are_ignored(self):
+        walker = DirectoryWalker(ignore_patterns=['sub', '*.txt'], ignore_paths=[os.path.join(self.test_env_dir, 'dir2')])
+        root = self.test_env_dir
+        self.assertTrue(walker.is_ignored(root, os.path.join(root, 'dir1', 'sub'), True))
+        self.assertTrue(walker.is_ignored(root, os.path.join(root, 'dir1', 'sub', 'new', 'e.js'), False))
+        self.assertTrue(walker.is_ignored(root, os.path.join(root, 'readme.txt'), False))
+        self.assertTrue(walker.is_ignored(root, os.path.join(root, 'dir2', 'd.js'), False))
+        self.assertFalse(walker.is_ignored(root, os.path.join(root, 'dir1', 'c.js'), False))
+        self.assertFalse(walker.is_ignored(root, root, True))
+        self.assertFalse(walker.is_ignored(os.path.join(root, 'dir2'), os.path.join(root, 'dir2'), True))
+        self.assertFalse(walker.is_ignored(os.path.join(root, 'dir1'), os.path.join(root, 'dir2', 'd.js'), False))
@@ -0,0 +1,94 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import DiskCache
+import shutil
+import os
+
+
+class TestDiskCache(unittest.TestCase):
+    """Asserts that the DiskCache class stores values by key."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.test_env_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def test_missing_keys_have_no_value(self):
+        self.assertIsNone(DiskCache(self.cache_dir).get('0123abcd'))
+
+    def test_stored_values_are_shared_by_instances(self):
+        DiskCache(self.cache_dir).set('0123abcd', 'value')
+        self.assertEqual('value', DiskCache(self.cache_dir).get('0123abcd'))
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, '01', '0123abcd')))
+
+    def test_stored_values_can_be_replaced(self):
+        cache = DiskCache(self.cache_dir)
+        cache.set('0123abcd', 'value')
+        cache.set('0123abcd', 'other value')
+        self.assertEqual('other value', cache.get('0123abcd'))
+        self.assertEqual(['0123abcd'], os.listdir(os.path.join(self.cache_dir, '01')))
+
+    def set_with_age(self, cache, key, value, age):
+        cache.set(key, value)
+        path = os.path.join(self.cache_dir, key[:2], key)
+        mtime = os.path.getmtime(path) - age
+        os.utime(path, (mtime, mtime))
+
+    def test_least_recently_used_values_are_evicted_beyond_max_bytes(self):
+        cache = DiskCache(self.cache_dir, max_bytes=25)
+        self.set_with_age(cache, 'aa01', 'x' * 10, 300)
+        self.set_with_age(cache, 'bb02', 'y' * 10, 200)
+        cache.set('cc03', 'z' * 10)
+        self.assertIsNone(cache.get('aa01'))
+        self.assertEqual('y' * 10, cache.get('bb02'))
+        self.assertEqual('z' * 10, cache.get('cc03'))
+        self.assertEqual(1, cache.evictions)
+
+    def test_reading_a_value_makes_it_recently_used(self):
+        cache = DiskCache(self.cache_dir, max_bytes=25)
+        self.set_with_age(cache, 'aa01', 'x' * 10, 300)
+        self.set_with_age(cache, 'bb02', 'y' * 10, 200)
+        self.assertEqual('x' * 10, cache.get('aa01'))
+        cache.set('cc03', 'z' * 10)
+        self.assertEqual('x' * 10, cache.get('aa01'))
+        self.assertIsNone(cache.get('bb02'))
+
+    def test_values_stored_by_other_instances_count_towards_max_bytes(self):
+        self.set_with_age(DiskCache(self.cache_dir), 'aa01', 'x' * 20, 300)
+        cache = DiskCache(self.cache_dir, max_bytes=25)
+        cache.set('bb02', 'y' * 10)
+        self.assertIsNone(cache.get('aa01'))
+        self.assertEqual('y' * 10, cache.get('bb02'))
+
+    def test_values_are_not_evicted_without_max_bytes(self):
+        cache = DiskCache(self.cache_dir)
+        for i in range(10):
+            cache.set('%04d' % i, 'x' * 100)
+        self.assertEqual(['x' * 100] * 10, [cache.get('%04d' % i) for i in range(10)])
@@ -0,0 +1,204 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from helpers import create_file_with_content
+from blend import JSLintAnalyzer, JSLintWorkerPool, Resource
+from blend.JSLintWorkerPool import JSLintWorkerError
+
+# A stand-in for lib/jslint.js that complains about any source containing 'lint',
+# exits when asked to lint a source containing 'crash' and takes a while to lint a
+# source containing 'slow'. Like lib/jslint.js it can also be
+# run on its own.
+STUB_JSLINT = """
+var JSLINT = function (js, options) {
+    if (js.indexOf('crash') >= 0) {
+        process.exit(5);
+    }
+    if (js.indexOf('slow') >= 0) {
+        var end = Date.now() + 100;
+        while (Date.now() < end) {}
+    }
+    JSLINT.errors = [];
+    if (js.indexOf('lint') >= 0) {
+        JSLINT.errors.push({line: 1, character: js.indexOf('lint') + 1,
+            reason: 'Found lint in process ' + process.pid + ' with ' + JSON.stringify(options) + '.',
+            evidence: js});
+    }
+    JSLINT.errors.push(null);
+    return JSLINT.errors.length === 1;
+};
+// Changes by Azavea:
+var input = '';
+process.stdin.setEncoding('utf8');
+process.stdin.on('data', function (chunk) { input += chunk; });
+process.stdin.on('end', function () {
+    if (!JSLINT(input, {passfail: false})) {
+        var e = JSLINT.errors[0];
+        process.stdout.write('Lint at line ' + e.line + ' character ' + e.character + ': ' + e.reason + '\\n');
+        process.stdout.write(e.evidence + '\\n');
+        process.exit(1);
+    }
+    process.exit(0);
+});
+"""
+
+
+def node_is_available():
+    try:
+        null_file = open(os.devnull, 'w')
+        try:
+            return subprocess.call(['node', '--version'], stdout=null_file, stderr=null_file) == 0
+        finally:
+            null_file.close()
+    except OSError:
+        return False
+
+
+@unittest.skipUnless(node_is_available(), 'node.js is not on the PATH')
+class TestJSLintWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.lib_path = os.path.join(self.test_env_dir, 'lib')
+        os.mkdir(self.lib_path)
+        self.jslint_path = os.path.join(self.lib_path, 'jslint.js')
+        create_file_with_content(self.jslint_path, STUB_JSLINT)
+        blend_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        self.worker_path = os.path.join(blend_path, 'lib', 'blend-jslint-worker.js')
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close()
+        shutil.rmtree(self.test_env_dir)
+
+    def make_pool(self, worker_count=1):
+        pool = JSLintWorkerPool(['node', self.worker_path, self.jslint_path], worker_count)
+        self.pools.append(pool)
+        return pool
+
+    def test_worker_count_must_be_positive(self):
+        self.assertRaises(ValueError, JSLintWorkerPool, ['node'], 0)
+
+    def test_lint_returns_0_and_no_output_for_a_source_with_no_lint(self):
+        self.assertEquals((0, ''), self.make_pool().lint('var answer = 42;'))
+
+    def test_lint_returns_1_and_the_complaints_for_a_source_with_lint(self):
+        returncode, output = self.make_pool().lint('var lint = 42;')
+        self.assertEquals(1, returncode)
+        self.assertTrue(output.startswith('Lint at line 1 character 5: Found lint in process '))
+        self.assertTrue(output.endswith('\nvar lint = 42;\n'))
+
+    def test_lint_passes_options_appended_to_the_source(self):
+        returncode, output = self.make_pool().lint('var lint = 42; --options { white: true }')
+        self.assertEquals(1, returncode)
+        self.assertTrue('with {"white":true,"passfail":false}.' in output)
+
+    def test_lint_returns_3_for_options_that_do_not_parse(self):
+        returncode, output = self.make_pool().lint('var answer = 42; --options {')
+        self.assertEquals(3, returncode)
+        self.assertTrue(output.startswith('Bad jslint options, did not parse:'))
+
+    def test_lint_frames_sources_by_their_length_in_bytes(self):
+        pool = self.make_pool()
+        source = 'var lint = "\xc3\xa9\xe2\x82\xac\\n";\n\n'
+        returncode, output = pool.lint(source)
+        self.assertEquals(1, returncode)
+        self.assertTrue(output.endswith('\n' + source.strip() + '\n'))
+        self.assertEquals((0, ''), pool.lint(''))
+        self.assertEquals((0, ''), pool.lint('var answer = "\xc3\xa9";'))
+
+    def test_one_worker_lints_every_source(self):
+        pool = self.make_pool()
+        outputs = [pool.lint('var lint = %d;' % i)[1] for i in range(20)]
+        self.assertEquals(1, len(set(output.split(' with ')[0] for output in outputs)))
+        self.assertEquals(0, pool.restarts)
+
+    def test_a_worker_that_crashes_is_restarted(self):
+        pool = self.make_pool()
+        pid_before = pool.lint('var lint;')[1].split(' with ')[0]
+        self.assertRaises(JSLintWorkerError, pool.lint, 'crash')
+        self.assertEquals(1, pool.restarts)
+        pid_after = pool.lint('var lint;')[1].split(' with ')[0]
+        self.assertNotEquals(pid_before, pid_after)
+        self.assertEquals(2, pool.restarts)
+
+    def test_the_error_for_a_worker_that_crashes_includes_its_return_code(self):
+        try:
+            self.make_pool().lint('crash')
+            self.fail('Expected a JSLintWorkerError')
+        except JSLintWorkerError as e:
+            self.assertTrue('return code 5' in str(e))
+
+    def test_a_worker_that_cannot_start_raises_an_error(self):
+        create_file_with_content(self.jslint_path, 'throw new Error("broken jslint");')
+        try:
+            self.make_pool().lint('var answer = 42;')
+            self.fail('Expected a JSLintWorkerError')
+        except JSLintWorkerError as e:
+            self.assertTrue('broken jslint' in str(e))
+
+    def test_close_stops_the_workers(self):
+        pool = self.make_pool()
+        pool.lint('var answer = 42;')
+        pool.close()
+        self.assertEquals((0, ''), pool.lint('var answer = 42;'))
+
+    def test_analyzer_with_workers_matches_analyzer_without_workers(self):
+        test_file_path = os.path.join(self.test_env_dir, 'test.js')
+        create_file_with_content(test_file_path, 'var lint = 42;')
+        with_workers = JSLintAnalyzer({'lib_path': self.lib_path, 'workers': 2})
+        self.pools.append(with_workers._worker_pool)
+        without_workers = JSLintAnalyzer({'lib_path': self.lib_path})
+        self.assertTrue(with_workers._worker_pool is not None)
+        self.assertTrue(without_workers._worker_pool is None)
+
+        worker_analysis = with_workers.analyze(Resource(test_file_path))
+        process_analysis = without_workers.analyze(Resource(test_file_path))
+        self.assertFalse(worker_analysis.good)
+        self.assertFalse(process_analysis.good)
+        strip_pid = lambda errors: [error.split(' in process ')[0] for error in errors]
+        self.assertEquals(strip_pid(process_analysis.errors), strip_pid(worker_analysis.errors))
+        self.assertTrue('Using 2 JSLint worker process(es)' in worker_analysis.messages)
+
+    def test_analyzer_lints_a_batch_with_every_worker(self):
+        resources = []
+        for i in range(4):
+            test_file_path = os.path.join(self.test_env_dir, 'test%d.js' % i)
+            create_file_with_content(test_file_path, 'var slow_lint_%d = 42;' % i)
+            resources.append(Resource(test_file_path))
+        analyzer = JSLintAnalyzer({'lib_path': self.lib_path, 'workers': 2})
+        self.pools.append(analyzer._worker_pool)
+
+        analyses = analyzer.analyze_batch(resources)
+        self.assertEquals([False] * 4, [analysis.good for analysis in analyses])
+        for i, analysis in enumerate(analyses):
+            self.assertTrue(('var slow_lint_%d = 42;' % i) in analysis.errors[0])
+        process_ids = set(analysis.errors[0].split(' in process ')[1].split()[0] for analysis in analyses)
+        self.assertEquals(2, len(process_ids))
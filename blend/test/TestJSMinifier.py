@@ -0,0 +1,102 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import os
+import shutil
+import tempfile
+from helpers import create_file_with_content
+from blend import JSMinifier, Resource
+
+
+class TestJSMinifier(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def assertCompresses(self, expected, js):
+        self.assertEqual(expected, JSMinifier().compress(js))
+
+    def test_comments_and_whitespace_are_removed(self):
+        self.assertCompresses('var a=1,b=2;function f(x){return x*2;}',
+            '// line comment\nvar a = 1,  b = 2; /* block\ncomment */\nfunction f ( x ) {\n    return x * 2;\n}\n')
+
+    def test_preserved_comments_are_kept(self):
+        self.assertCompresses('/*! license */\nvar a=1;/*@cc_on @*/', '/*! license */\nvar a = 1; /*@cc_on @*/')
+
+    def test_strings_are_not_changed(self):
+        self.assertCompresses('a="x  // y";b=\'/* z */\';c="\\"  ";d=`  ${ e }  `;',
+            'a = "x  // y"; b = \'/* z */\'; c = "\\"  "; d = `  ${ e }  `;')
+
+    def test_nested_template_literals_are_not_changed(self):
+        self.assertCompresses('a=`x ${ b ? `y ${ {c: 1}.c } }` : \'}\' } z`;d=1;',
+            'a = `x ${ b ? `y ${ {c: 1}.c } }` : \'}\' } z`;\nd = 1;')
+
+    def test_regular_expressions_are_not_changed(self):
+        self.assertCompresses('a=/ b\\/[/ ]/g.test(c);return/ d /;',
+            'a = / b\\/[/ ]/g.test( c );\nreturn / d /;')
+
+    def test_divisions_are_not_mistaken_for_regular_expressions(self):
+        self.assertCompresses('a=b/2/c;d=(e)/2/f;g=h[0]/2/i;j++/2/k;',
+            'a = b / 2 / c;\nd = (e) / 2 / f;\ng = h[0] / 2 / i;\nj++ / 2 / k;')
+
+    def test_spaces_that_change_the_meaning_are_kept(self):
+        self.assertCompresses('a=b+ +c- -d;e=f+ ++g;h=1 .toString();i=j/ /k/.l;',
+            'a = b + +c - -d;\ne = f + ++g;\nh = 1 .toString();\ni = j / /k/.l;')
+
+    def test_line_breaks_needed_for_automatic_semicolon_insertion_are_kept(self):
+        self.assertCompresses('a=b\n++c\nreturn\nd\ne()\n(f)\nvar g=function(){}\nh()\nclass I{#j=1\n#k=2}',
+            'a = b\n++c\nreturn\nd\ne()\n(f)\nvar g = function () {}\nh()\nclass I {\n    #j = 1\n    #k = 2\n}\n')
+
+    def test_line_breaks_in_comments_are_kept_where_needed(self):
+        self.assertCompresses('return\na', 'return /* a\nb */ a')
+
+    def test_line_breaks_that_are_not_needed_are_removed(self):
+        self.assertCompresses('a=[1,2];b={c:3};d.e().f();', 'a = [\n    1,\n    2\n];\nb = {\n    c: 3\n};\nd\n    .e()\n    .f();\n')
+
+    def test_non_ascii_identifiers_keep_their_spaces(self):
+        self.assertCompresses('var \xc3\xa9=1;', 'var \xc3\xa9 = 1;')
+        self.assertCompresses(u'var \u00e9=1;', u'var \u00e9 = 1;')
+
+    def test_minify_a_resource(self):
+        test_file_path = os.path.join(self.test_env_dir, 'test.js')
+        create_file_with_content(test_file_path, 'var a = 1; // one\n')
+        minification = JSMinifier().minify(Resource(test_file_path))
+        self.assertTrue(minification.good)
+        self.assertEqual('var a=1;', minification.content)
+
+    def test_minifying_an_already_minified_resource_returns_unmodified_content(self):
+        test_file_path = os.path.join(self.test_env_dir, 'test.min.js')
+        create_file_with_content(test_file_path, 'var a = 1;')
+        minification = JSMinifier().minify(Resource(test_file_path))
+        self.assertTrue(minification.good)
+        self.assertEqual('var a = 1;', minification.content)
+
+    def test_content_other_than_javascript_cannot_be_minified(self):
+        minification = JSMinifier().minify_content('a { color: red }', 'css')
+        self.assertFalse(minification.good)
+        self.assertEqual(["The JSMinifier cannot minify content of type 'css'."], minification.errors)
@@ -0,0 +1,94 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+from blend import MemoryReport, Resource, ResourceCache
+from helpers import create_file_with_content
+
+
+class TestMemoryReport(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.original_cache = Resource.cache
+        Resource.cache = ResourceCache()
+
+    def tearDown(self):
+        MemoryReport.active = None
+        Resource.cache = self.original_cache
+        shutil.rmtree(self.test_env_dir)
+
+    def test_nothing_is_recorded_without_an_active_report(self):
+        MemoryReport.active = None
+        with MemoryReport.phase('build'):
+            MemoryReport.bundle_merged('app.js', 10)
+
+    def test_memory_is_attributed_to_each_phase(self):
+        report = MemoryReport.active = MemoryReport()
+        report.start()
+        with MemoryReport.phase('discovery'):
+            pass
+        with MemoryReport.phase('build'):
+            data = 'x' * (4 * 1024 * 1024)
+            time.sleep(MemoryReport.SAMPLE_INTERVAL_SECONDS * 3)
+        report.stop()
+        del data
+
+        phases = report.phases
+        self.assertEqual(['discovery', 'build'], [phase['name'] for phase in phases])
+        for phase in phases:
+            self.assertTrue(phase['peak_rss'] >= phase['start_rss'])
+            self.assertTrue(phase['end_rss'] is not None)
+        self.assertTrue(phases[1]['peak_rss'] - phases[1]['start_rss'] >= 3 * 1024 * 1024)
+        self.assertEqual(set(['name', 'start_rss', 'end_rss', 'peak_rss']), set(phases[0].keys()))
+
+    def test_largest_bundles_are_listed_first(self):
+        report = MemoryReport.active = MemoryReport()
+        MemoryReport.bundle_merged('small.js', 10)
+        MemoryReport.bundle_merged('large.js', 1000)
+        MemoryReport.bundle_merged('medium.js', 100)
+        self.assertEqual([('large.js', 1000), ('medium.js', 100)], report.largest_bundles(2))
+
+    def test_content_held_by_the_resource_cache_is_reported(self):
+        path_to_file = os.path.join(self.test_env_dir, 'app.js')
+        create_file_with_content(path_to_file, 'var foo = {};')
+        Resource.load(path_to_file).content
+        report = MemoryReport()
+        report.start()
+        report.stop(Resource.cache)
+        self.assertEqual({
+            'resources': 1,
+            'loaded_resources': 1,
+            'loaded_bytes': 13,
+            'max_bytes': None,
+            'largest': [(path_to_file, 13)]
+        }, report.resource_cache)
+        summary = report.summary()
+        self.assertTrue('Resource.cache holds 13 B in 1 of 1 resources' in summary)
+        self.assertTrue(path_to_file in summary)
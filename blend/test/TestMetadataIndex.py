@@ -0,0 +1,128 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import MetadataIndex, Resource
+import shutil
+import os
+import time
+import helpers
+
+
+class TestMetadataIndex(unittest.TestCase):
+    """Asserts that the MetadataIndex class restores unchanged resources without reading them."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.index_file_path = os.path.join(self.test_env_dir, '.blend', 'metadata.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def create_file_in_the_past(self, path_to_file, content, seconds_ago=100):
+        helpers.create_file_with_content(path_to_file, content)
+        modified_time = time.time() - seconds_ago
+        os.utime(path_to_file, (modified_time, modified_time))
+
+    def test_unchanged_resources_are_restored_from_a_saved_index(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        content = '//= require file2\nvar foo = {};\n'
+        self.create_file_in_the_past(path_to_test_file, content)
+
+        index = MetadataIndex(self.index_file_path)
+        original = index.load(path_to_test_file)
+        self.assertEqual(1, index.misses)
+        index.save()
+        self.assertTrue(os.path.exists(self.index_file_path))
+
+        index = MetadataIndex(self.index_file_path)
+        restored = index.load(path_to_test_file)
+        self.assertEqual(1, index.hits)
+        self.assertEqual(0, index.misses)
+        self.assertEqual(original.base_name, restored.base_name)
+        self.assertEqual(original.minified, restored.minified)
+        self.assertEqual(original.size, restored.size)
+        self.assertEqual(original.content_hash, restored.content_hash)
+        self.assertEqual(1, len(restored.requirements))
+        self.assertEqual('file2', restored.requirements[0].name)
+        self.assertEqual((0, 18), restored.requirements[0].insert_location)
+        self.assertEqual(content, restored.content)
+
+    def test_changed_resources_are_read_again(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        self.create_file_in_the_past(path_to_test_file, 'var foo = {};', seconds_ago=200)
+
+        index = MetadataIndex(self.index_file_path)
+        index.load(path_to_test_file)
+        index.save()
+
+        self.create_file_in_the_past(path_to_test_file, '//= require file2\n', seconds_ago=100)
+        index = MetadataIndex(self.index_file_path)
+        resource = index.load(path_to_test_file)
+        self.assertEqual(0, index.hits)
+        self.assertEqual(1, index.misses)
+        self.assertEqual('file2', resource.requirements[0].name)
+
+    def test_resources_scanned_in_another_mode_are_read_again(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        self.create_file_in_the_past(path_to_test_file, '//= require file2\nvar foo = {};\n//= require file3\n')
+
+        index = MetadataIndex(self.index_file_path)
+        self.assertEqual(2, len(index.load(path_to_test_file).requirements))
+        index.save()
+
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        try:
+            index = MetadataIndex(self.index_file_path)
+            resource = index.load(path_to_test_file)
+            self.assertEqual(0, index.hits)
+            self.assertEqual(['file2'], [requirement.name for requirement in resource.requirements])
+            index.save()
+
+            index = MetadataIndex(self.index_file_path)
+            index.load(path_to_test_file)
+            self.assertEqual(1, index.hits)
+        finally:
+            Resource.requirement_scan = Resource.FULL_SCAN
+
+    def test_recently_modified_files_are_not_recorded(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        helpers.create_file_with_content(path_to_test_file, 'var foo = {};')
+
+        index = MetadataIndex(self.index_file_path)
+        index.load(path_to_test_file)
+        index.save()
+
+        index = MetadataIndex(self.index_file_path)
+        index.load(path_to_test_file)
+        self.assertEqual(0, index.hits)
+
+    def test_an_invalid_index_file_is_ignored(self):
+        helpers.create_file_with_content(self.index_file_path, 'not json')
+        path_to_test_file = os.path.join(self.test_env_dir, 'file1.js')
+        self.create_file_in_the_past(path_to_test_file, 'var foo = {};')
+        index = MetadataIndex(self.index_file_path)
+        self.assertEqual('var foo = {};', index.load(path_to_test_file).content)
@@ -0,0 +1,115 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from blend import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        Metrics.active = None
+        shutil.rmtree(self.test_env_dir)
+
+    def test_every_counter_starts_at_zero(self):
+        counters = Metrics().counters
+        self.assertEqual(sorted(name for name, description in Metrics.COUNTERS), sorted(counters.keys()))
+        self.assertEqual([0], list(set(counters.values())))
+
+    def test_nothing_is_counted_without_active_metrics(self):
+        Metrics.active = None
+        Metrics.increment('bytes_read', 10)
+        Metrics.output_written('app.js', 'output/app.js', 10)
+
+    def test_counts_are_added_to_the_active_metrics(self):
+        Metrics.active = Metrics()
+        Metrics.increment('bytes_read', 10)
+        Metrics.increment('bytes_read', 5)
+        Metrics.increment('minifier_processes')
+        self.assertEqual(15, Metrics.active.counters['bytes_read'])
+        self.assertEqual(1, Metrics.active.counters['minifier_processes'])
+
+    def test_differences_of_other_counters_are_added(self):
+        metrics = Metrics()
+        metrics.add_differences({'analysis_cache_hits': 3, 'analysis_cache_misses': 1},
+            {'analysis_cache_hits': 5, 'analysis_cache_misses': 1})
+        self.assertEqual(2, metrics.counters['analysis_cache_hits'])
+        self.assertEqual(0, metrics.counters['analysis_cache_misses'])
+
+    def test_output_sizes_are_recorded_per_bundle(self):
+        metrics = Metrics()
+        metrics.record_output('app.js', 'output/app.js', 100)
+        metrics.record_output('app.js', 'output/app-min.js', 40)
+        metrics.record_output('lib.js', 'output/lib.js', 10)
+        self.assertEqual(150, metrics.counters['bytes_written'])
+        self.assertEqual({'app.js': {'output/app.js': 100, 'output/app-min.js': 40}, 'lib.js': {'output/lib.js': 10}},
+            metrics.output_sizes)
+
+    def test_metrics_from_a_worker_are_merged(self):
+        worker_metrics = Metrics()
+        worker_metrics.add('bytes_read', 7)
+        worker_metrics.record_output('app.js', 'output/app.js', 100)
+        metrics = Metrics()
+        metrics.add('bytes_read', 3)
+        metrics.record_output('lib.js', 'output/lib.js', 10)
+        metrics.merge(worker_metrics.as_dict())
+        self.assertEqual(10, metrics.counters['bytes_read'])
+        self.assertEqual(110, metrics.counters['bytes_written'])
+        self.assertEqual({'app.js': {'output/app.js': 100}, 'lib.js': {'output/lib.js': 10}}, metrics.output_sizes)
+
+    def test_prometheus_text_format(self):
+        metrics = Metrics()
+        metrics.add('files_walked', 12)
+        metrics.record_output('dir "a"/app.js', 'output/app-min.js', 40)
+        lines = metrics.to_prometheus().splitlines()
+        self.assertTrue('# HELP blend_files_walked_total Processable files found by walking the search paths.' in lines)
+        self.assertTrue('# TYPE blend_files_walked_total counter' in lines)
+        self.assertTrue('blend_files_walked_total 12' in lines)
+        self.assertTrue('blend_bytes_read_total 0' in lines)
+        self.assertTrue('blend_bytes_written_total 40' in lines)
+        self.assertTrue('# TYPE blend_bundle_output_bytes gauge' in lines)
+        self.assertEqual('blend_bundle_output_bytes{bundle="dir \\"a\\"/app.js",output="output/app-min.js"} 40', lines[-1])
+
+    def test_write_json(self):
+        metrics = Metrics()
+        metrics.add('files_walked', 12)
+        metrics.record_output('app.js', 'output/app.js', 100)
+        metrics_file_path = os.path.join(self.test_env_dir, 'metrics.json')
+        metrics.write(metrics_file_path)
+        written = json.load(open(metrics_file_path))
+        self.assertEqual(12, written['counters']['files_walked'])
+        self.assertEqual({'app.js': {'output/app.js': 100}}, written['bundles'])
+
+    def test_write_prometheus(self):
+        metrics = Metrics()
+        metrics_file_path = os.path.join(self.test_env_dir, 'metrics.prom')
+        metrics.write(metrics_file_path, Metrics.PROMETHEUS)
+        self.assertEqual(metrics.to_prometheus(), open(metrics_file_path).read())
@@ -0,0 +1,163 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import DiskCache, Minification, Minifier, MinificationCache, Resource
+import shutil
+import os
+import helpers
+
+
+class CountingMinifier(Minifier):
+
+    def __init__(self, options=None):
+        Minifier.__init__(self, options)
+        self.minified_paths = []
+
+    def minify(self, resource):
+        self.minified_paths.append(resource.path_to_file)
+        return self._minify(resource.content)
+
+    def minify_content(self, content, file_type):
+        self.minified_paths.append(None)
+        return self._minify(content)
+
+    def minify_content_batch(self, contents, file_type):
+        self.minified_paths.append(len(contents))
+        return [self._minify(content) for content in contents]
+
+    def _minify(self, content):
+        minification = Minification()
+        if 'fail' in content:
+            minification.add_error('bad')
+        else:
+            minification.set_content(content.replace(' ', ''))
+            minification.mark_as_good()
+        return minification
+
+
+class TestMinificationCache(unittest.TestCase):
+    """Asserts that the MinificationCache class reuses the minified content of identical content."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.disk_cache = DiskCache(os.path.join(self.test_env_dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def create_resource(self, name, content):
+        path_to_test_file = os.path.join(self.test_env_dir, name)
+        helpers.create_file_with_content(path_to_test_file, content)
+        return Resource(path_to_test_file)
+
+    def test_minified_content_is_reused_from_disk_by_later_runs(self):
+        resources = [self.create_resource('a.js', 'var a = 1;'), self.create_resource('b.js', 'var b = 2;')]
+        MinificationCache(self.disk_cache).minify_batch(CountingMinifier(), resources)
+
+        minifier = CountingMinifier()
+        cache = MinificationCache(self.disk_cache)
+        minifications = cache.minify_batch(minifier, [self.create_resource('c.js', 'var b = 2;')] + resources)
+        self.assertEqual([], minifier.minified_paths)
+        self.assertEqual(['varb=2;', 'vara=1;', 'varb=2;'], [minification.content for minification in minifications])
+        self.assertTrue(all(minification.good for minification in minifications))
+        self.assertEqual((3, 0), (cache.hits, cache.misses))
+
+    def test_only_uncached_resources_are_passed_to_the_minifier_in_order(self):
+        cache = MinificationCache(self.disk_cache)
+        cache.minify_batch(CountingMinifier(), [self.create_resource('b.js', 'var b = 2;')])
+        resources = [self.create_resource(name, 'var %s = 1;' % name[0]) for name in ('a.js', 'c.js')]
+        resources.insert(1, self.create_resource('b.js', 'var b = 2;'))
+
+        minifier = CountingMinifier()
+        minifications = cache.minify_batch(minifier, resources)
+        self.assertEqual([resources[0].path_to_file, resources[2].path_to_file], minifier.minified_paths)
+        self.assertEqual(['vara=1;', 'varb=2;', 'varc=1;'], [minification.content for minification in minifications])
+        self.assertEqual((1, 3), (cache.hits, cache.misses))
+
+    def test_changed_content_or_options_are_minified_again(self):
+        cache = MinificationCache(self.disk_cache)
+        cache.minify_batch(CountingMinifier(), [self.create_resource('a.js', 'var a = 1;')])
+        minifier = CountingMinifier({'args': ['--nomunge']})
+        cache.minify_batch(minifier, [self.create_resource('a.js', 'var a = 1;')])
+        cache.minify_batch(minifier, [self.create_resource('a.js', 'var a = 2;')])
+        self.assertEqual(2, len(minifier.minified_paths))
+        self.assertEqual((0, 3), (cache.hits, cache.misses))
+
+    def test_failed_minifications_are_not_reused(self):
+        cache = MinificationCache(self.disk_cache)
+        minifier = CountingMinifier()
+        for i in range(2):
+            minification = cache.minify_batch(minifier, [self.create_resource('a.js', 'fail')])[0]
+            self.assertFalse(minification.good)
+        self.assertEqual(2, len(minifier.minified_paths))
+
+    def test_already_minified_resources_are_not_stored(self):
+        MinificationCache(self.disk_cache).minify_batch(CountingMinifier(), [self.create_resource('a.min.js', 'var a=1;')])
+        self.assertFalse(os.path.exists(self.disk_cache.directory))
+
+    def test_minified_content_in_memory_is_reused(self):
+        cache = MinificationCache(self.disk_cache)
+        first = cache.minify_content(CountingMinifier(), 'var a = 1;', 'javascript')
+        minifier = CountingMinifier()
+        second = cache.minify_content(minifier, 'var a = 1;', 'javascript')
+        self.assertEqual([], minifier.minified_paths)
+        self.assertEqual(('vara=1;', 'vara=1;'), (first.content, second.content))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_content_in_memory_and_in_files_share_minifications(self):
+        cache = MinificationCache(self.disk_cache)
+        cache.minify_batch(CountingMinifier(), [self.create_resource('a.js', 'var a = 1;')])
+        minifier = CountingMinifier()
+        minification = cache.minify_content(minifier, 'var a = 1;', 'javascript')
+        self.assertEqual([], minifier.minified_paths)
+        self.assertEqual('vara=1;', minification.content)
+
+    def test_pieces_are_minified_once_in_a_batch_and_kept_in_memory(self):
+        cache = MinificationCache()
+        minifier = CountingMinifier()
+        minifications = cache.minify_content_batch(minifier, ['var a = 1;', 'var b = 2;', 'var a = 1;'], 'javascript')
+        self.assertEqual(['vara=1;', 'varb=2;', 'vara=1;'], [minification.content for minification in minifications])
+        minifications = cache.minify_content_batch(minifier, ['var c = 3;', 'var b = 2;', 'fail'], 'javascript')
+        self.assertEqual(['varc=3;', 'varb=2;', None], [minification.content for minification in minifications])
+        self.assertFalse(minifications[2].good)
+        self.assertEqual([2, 2], minifier.minified_paths)
+        self.assertEqual((2, 4), (cache.hits, cache.misses))
+
+    def test_pieces_are_reused_from_disk(self):
+        MinificationCache(self.disk_cache).minify_content_batch(CountingMinifier(), ['var a = 1;'], 'javascript')
+        minifier = CountingMinifier()
+        minification = MinificationCache(self.disk_cache).minify_content(minifier, 'var a = 1;', 'javascript')
+        self.assertEqual([], minifier.minified_paths)
+        self.assertEqual('vara=1;', minification.content)
+
+    def test_without_a_disk_cache_every_resource_is_minified(self):
+        cache = MinificationCache()
+        minifier = CountingMinifier()
+        for i in range(2):
+            cache.minify_batch(minifier, [self.create_resource('a.js', 'var a = 1;')])
+        self.assertEqual(2, len(minifier.minified_paths))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
@@ -40,3 +40,33 @@ class TestMinifier(unittest.TestCase):
 
     def test_has_a_minify_method_that_requires_a_resource_argument(self):
         self.assertRaises(Exception, self.minifier.minify, "some text")
+
+    def test_minify_content_passes_a_resource_with_the_content_to_minify(self):
+        minified_resources = []
+
+        class RecordingMinifier(Minifier):
+            def minify(self, resource):
+                minified_resources.append((resource.file_type, resource.minified, resource.content))
+                return Minifier.minify(self, resource)
+
+        RecordingMinifier().minify_content('var a = 1;', 'javascript')
+        RecordingMinifier().minify_content('a { color: red; }', 'css')
+        self.assertEqual([('javascript', False, 'var a = 1;'), ('css', False, 'a { color: red; }')],
+            minified_resources)
+
+    def test_minify_content_requires_a_known_file_type(self):
+        self.assertRaises(Exception, self.minifier.minify_content, 'text', 'unknown')
+
+    def test_minify_content_batch_returns_a_minification_for_each_string(self):
+        self.assertEqual(2, len(self.minifier.minify_content_batch(['var a;', 'var b;'], 'javascript')))
+
+    def test_minify_batch_returns_a_minification_for_each_resource(self):
+        minifications = self.minifier.minify_batch([self.resource, Resource('path/to/another/file')])
+        self.assertEqual(2, len(minifications))
+
+    def test_minify_batch_requires_resource_arguments(self):
+        self.assertRaises(Exception, self.minifier.minify_batch, [self.resource, "some text"])
+
+    def test_fingerprint_depends_on_the_options(self):
+        self.assertEqual(Minifier().fingerprint, self.minifier.fingerprint)
+        self.assertNotEqual(Minifier({'args': ['--nomunge']}).fingerprint, self.minifier.fingerprint)
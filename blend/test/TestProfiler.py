@@ -0,0 +1,119 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from blend import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        Profiler.active = None
+        shutil.rmtree(self.test_env_dir)
+
+    def test_spans_are_not_recorded_when_profiling_is_off(self):
+        Profiler.active = None
+        with Profiler.span('discovery', Profiler.PHASE):
+            pass
+        profiler = Profiler()
+        self.assertEqual([], profiler.events)
+
+    def test_spans_are_recorded_in_the_active_profiler(self):
+        Profiler.active = Profiler()
+        with Profiler.span('discovery', Profiler.PHASE):
+            with Profiler.span('app.js', Profiler.BUNDLE, jobs=2):
+                pass
+        events = Profiler.active.events
+        self.assertEqual(['app.js', 'discovery'], [event['name'] for event in events])
+        self.assertEqual(['bundle', 'phase'], [event['cat'] for event in events])
+        self.assertEqual({'jobs': 2}, events[0]['args'])
+        self.assertFalse('args' in events[1])
+        for event in events:
+            self.assertEqual('X', event['ph'])
+            self.assertEqual(os.getpid(), event['pid'])
+        self.assertTrue(events[1]['ts'] <= events[0]['ts'])
+        self.assertTrue(events[0]['dur'] <= events[1]['dur'])
+
+    def test_a_span_is_recorded_when_its_block_raises(self):
+        Profiler.active = Profiler()
+        try:
+            with Profiler.span('jslint', Profiler.TOOL):
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(['jslint'], [event['name'] for event in Profiler.active.events])
+
+    def test_timestamps_are_measured_from_the_start_time(self):
+        profiler = Profiler(100.0)
+        profiler.add_span('build', Profiler.PHASE, 101.5, 102.0)
+        self.assertEqual(1500000, profiler.events[0]['ts'])
+        self.assertEqual(500000, profiler.events[0]['dur'])
+
+    def test_events_from_other_profilers_can_be_added(self):
+        profiler = Profiler(100.0)
+        worker_profiler = Profiler(profiler.start_time)
+        worker_profiler.add_span('app.js', Profiler.BUNDLE, 101.0, 102.0)
+        profiler.add_events(worker_profiler.events)
+        self.assertEqual(worker_profiler.events, profiler.events)
+
+    def test_slowest_spans(self):
+        profiler = Profiler(0.0)
+        profiler.add_span('a.js', Profiler.RESOURCE, 0.0, 1.0)
+        profiler.add_span('build', Profiler.PHASE, 0.0, 5.0)
+        profiler.add_span('yuicompressor a.js', Profiler.TOOL, 0.0, 3.0)
+        profiler.add_span('b.js', Profiler.RESOURCE, 0.0, 2.0)
+        self.assertEqual(['build', 'yuicompressor a.js'], [event['name'] for event in profiler.slowest(2)])
+        self.assertEqual(['yuicompressor a.js', 'b.js', 'a.js'],
+            [event['name'] for event in profiler.slowest(5, Profiler.SUMMARY_CATEGORIES)])
+
+    def test_summary(self):
+        profiler = Profiler(0.0)
+        profiler.add_span('discovery', Profiler.PHASE, 0.0, 0.25)
+        profiler.add_span('build', Profiler.PHASE, 0.25, 1.0)
+        profiler.add_span('a.js', Profiler.RESOURCE, 0.25, 0.5)
+        profiler.add_span('yuicompressor a.js', Profiler.TOOL, 0.5, 1.0)
+        self.assertEqual('\n'.join([
+            'Phases:',
+            '       250.0 ms  discovery',
+            '       750.0 ms  build',
+            'Slowest resources and tools:',
+            '       500.0 ms  tool      yuicompressor a.js',
+            '       250.0 ms  resource  a.js']), profiler.summary(2))
+
+    def test_write_a_chrome_trace(self):
+        profiler = Profiler(0.0)
+        profiler.add_span('build', Profiler.PHASE, 0.0, 1.0)
+        trace_file_path = os.path.join(self.test_env_dir, 'trace.json')
+        profiler.write(trace_file_path)
+        trace = json.load(open(trace_file_path))
+        self.assertEqual('ms', trace['displayTimeUnit'])
+        self.assertEqual(['build'], [event['name'] for event in trace['traceEvents']])
+        self.assertEqual(1000000, trace['traceEvents'][0]['dur'])
@@ -24,13 +24,21 @@
 
 import unittest
 import tempfile
+import hashlib
 
 from blend import Resource, Paths
+from blend.Requirement import CircularRequirementException
 import shutil
 import os
 import helpers
 
 
+def view_to_string(view):
+    if isinstance(view, memoryview):
+        return view.tobytes()
+    return str(view)
+
+
 class TestResource(unittest.TestCase):
     """Asserts that the properties and methods of the Resource class behave correctly."""
 
@@ -38,6 +46,9 @@ class TestResource(unittest.TestCase):
         self.test_env_dir = tempfile.mkdtemp()
 
     def tearDown(self):
+        Resource.mmap_threshold = None
+        Resource.requirement_scan = Resource.FULL_SCAN
+        Resource.HEADER_READ_SIZE = 4096
         shutil.rmtree(self.test_env_dir)
         helpers.clean_output()
 
@@ -150,6 +161,63 @@ class TestResource(unittest.TestCase):
         self.assertEquals(content, resource.content)
         helpers.clean_up_files(path_to_test_file)
 
+    def test_content_hash_property(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        helpers.create_file_with_content(path_to_test_file, 'var foo = {};')
+        resource = Resource(path_to_test_file)
+        self.assertEqual('8c57a0785dc60a065d65f6f8ea514646f439e9a0', resource.content_hash)
+        self.assertEqual(None, Resource('some file').content_hash)
+
+    def test_resource_can_be_created_from_metadata(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'jquery-1.7.2.min.js')
+        content = '//= require sizzle\nvar foo = {};'
+        helpers.create_file_with_content(path_to_test_file, content)
+        metadata = Resource(path_to_test_file).metadata
+        resource = Resource(path_to_test_file, metadata)
+        self.assertEqual('jquery', resource.base_name)
+        self.assertTrue(resource.minified)
+        self.assertEqual(len(content), resource.size)
+        self.assertEqual('sizzle', resource.requirements[0].name)
+        self.assertEqual((0, 19), resource.requirements[0].insert_location)
+        self.assertEqual(content, resource.content)
+
+    def test_content_and_requirements_are_read_when_first_accessed(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        resource = Resource(path_to_test_file)
+        self.assertEqual('test', resource.base_name)
+        self.assertEqual('javascript', resource.file_type)
+        content = '//= require jquery\nvar foo = {};'
+        helpers.create_file_with_content(path_to_test_file, content)
+        self.assertEqual('jquery', resource.requirements[0].name)
+        self.assertEqual(len(content), resource.size)
+        self.assertEqual(content, resource.content)
+
+    def test_memory_mapped_content(self):
+        Resource.mmap_threshold = 1
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        content = '//= require jquery\nvar foo = {};'
+        helpers.create_file_with_content(path_to_test_file, content)
+        resource = Resource(path_to_test_file)
+        self.assertEqual(content, resource.content)
+        self.assertEqual(content, view_to_string(resource.content_view()))
+        self.assertEqual('var', view_to_string(resource.content_view(19, 22)))
+        self.assertEqual('jquery', resource.requirements[0].name)
+        self.assertEqual(hashlib.sha1(content).hexdigest(), resource.content_hash)
+
+    def test_chunk_views_match_chunk_content(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        helpers.create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2\n// end')
+        helpers.create_file_with_content(paths_to_test_files[1], '// This is file 2\n')
+        for mmap_threshold in [None, 1]:
+            Resource.mmap_threshold = mmap_threshold
+            file1_resource = Resource(paths_to_test_files[0])
+            chunks = file1_resource.get_chunks_by_merging_requirements_from_paths(
+                Paths(self.test_env_dir, include_cwd=False), previously_merged=[])
+            self.assertEqual([chunk.content for chunk in chunks], [view_to_string(chunk.view) for chunk in chunks])
+            self.assertEqual('// This is file 1\n// This is file 2\n// end', ''.join([view_to_string(chunk.view) for chunk in chunks]))
+
     def test_requirements_property_for_resource_without_content_is_none(self):
         resource = Resource('some file')
         self.assertTrue(resource.content is None)
@@ -201,6 +269,64 @@ class TestResource(unittest.TestCase):
         self.assertEqual('something', resource.requirements[0].name)
         self.assertEqual((21, 47), resource.requirements[0].insert_location)
 
+    def test_header_scan_only_finds_requirements_before_the_first_other_token(self):
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        content = '/* License\n */\n//= require jquery\n\n// A comment\n  //= require openlayers\nvar foo = {};\n//= require later\n'
+        helpers.create_file_with_content(path_to_test_file, content)
+        resource = Resource(path_to_test_file)
+        self.assertEqual(['jquery', 'openlayers'], [requirement.name for requirement in resource.requirements])
+        self.assertEqual((15, 34), resource.requirements[0].insert_location)
+        self.assertEqual((48, 73), resource.requirements[1].insert_location)
+        self.assertEqual(content, resource.content)
+
+    def test_header_scan_finds_the_same_requirements_in_loaded_content(self):
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.css')
+        content = '@charset "utf-8";\n/*= require reset */\n@import url("base.css");\nh1 {}\n/*= require later */\n'
+        helpers.create_file_with_content(path_to_test_file, content)
+        resource = Resource(path_to_test_file)
+        self.assertEqual(content, resource.content)
+        self.assertEqual(['reset', 'base'], [requirement.name for requirement in resource.requirements])
+        self.assertEqual([(18, 39), (39, 62)], [requirement.insert_location for requirement in resource.requirements])
+
+    def test_header_scan_reads_the_file_incrementally(self):
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        header = '/* A long\n * license */\n// comment\n//= require jquery\n'
+        helpers.create_file_with_content(path_to_test_file, header + 'var foo = {};\n' * 1000)
+        for read_size in [1, 2, 3, 7, 4096]:
+            Resource.HEADER_READ_SIZE = read_size
+            resource = Resource(path_to_test_file)
+            self.assertEqual(header, resource._read_header())
+            self.assertEqual('jquery', resource.requirements[0].name)
+            self.assertEqual((len(header) - 19, len(header)), resource.requirements[0].insert_location)
+            self.assertEqual(0, resource.loaded_size)
+            self.assertEqual(None, resource.metadata['content_hash'])
+
+    def test_header_scan_of_a_file_that_is_all_header(self):
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        Resource.HEADER_READ_SIZE = 5
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        content = '//= require jquery\n//= require openlayers'
+        helpers.create_file_with_content(path_to_test_file, content)
+        self.assertEqual(content, Resource(path_to_test_file)._read_header())
+        self.assertEqual(['jquery', 'openlayers'],
+            [requirement.name for requirement in Resource(path_to_test_file).requirements])
+
+    def test_header_scan_skips_a_byte_order_mark(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'test.js')
+        content = '\xef\xbb\xbf//= require jquery\n//= require openlayers\nvar foo = {};\n'
+        helpers.create_file_with_content(path_to_test_file, content)
+        full_scan_requirements = [(requirement.name, requirement.insert_location)
+            for requirement in Resource(path_to_test_file).requirements]
+        self.assertEqual([('jquery', (3, 22)), ('openlayers', (22, 45))], full_scan_requirements)
+        Resource.requirement_scan = Resource.HEADER_SCAN
+        for read_size in [1, 2, 4096]:
+            Resource.HEADER_READ_SIZE = read_size
+            self.assertEqual(full_scan_requirements, [(requirement.name, requirement.insert_location)
+                for requirement in Resource(path_to_test_file).requirements])
+
     def test_merge_requirements_in_global_path(self):
         paths_to_test_files = [
             os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
@@ -357,6 +483,16 @@ class TestResource(unittest.TestCase):
         self.assertEqual('// This is file 4\n// This is file 2\n// This is file 3\n// This is file 1\n', actual_merged_content)
         helpers.clean_up_files(paths_to_test_files)
 
+    def test_merge_circular_requirements_raises(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.js')]
+        helpers.create_file_with_content(paths_to_test_files[0], '// This is file 1\n//= require file2')
+        helpers.create_file_with_content(paths_to_test_files[1], '// This is file 2\n//= require file1')
+        file1_resource = Resource(paths_to_test_files[0])
+        self.assertRaises(CircularRequirementException, file1_resource.merge_requirements_from_paths,
+            Paths(self.test_env_dir, include_cwd=False), previously_merged=[])
+
     def test_find_all_in_paths(self):
         paths_to_processable_test_files = [
             os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
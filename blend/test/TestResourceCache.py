@@ -0,0 +1,178 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import MetadataIndex, Resource, ResourceCache
+import shutil
+import os
+import time
+import helpers
+
+
+class TestResourceCache(unittest.TestCase):
+    """Asserts that the ResourceCache class reuses unchanged resources and limits the content held in memory."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.original_cache = Resource.cache
+        Resource.cache = ResourceCache()
+
+    def tearDown(self):
+        Resource.cache = self.original_cache
+        shutil.rmtree(self.test_env_dir)
+
+    def create_file_in_the_past(self, file_name, content, seconds_ago=100):
+        path_to_file = os.path.join(self.test_env_dir, file_name)
+        helpers.create_file_with_content(path_to_file, content)
+        modified_time = time.time() - seconds_ago
+        os.utime(path_to_file, (modified_time, modified_time))
+        return path_to_file
+
+    def test_unchanged_resources_are_returned_from_the_cache(self):
+        path_to_file = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        resource = Resource.load(path_to_file)
+        self.assertTrue(resource is Resource.load(path_to_file))
+        self.assertEqual(1, Resource.cache.hits)
+        self.assertEqual(1, Resource.cache.misses)
+        self.assertTrue(path_to_file in Resource.cache)
+        self.assertEqual(1, len(Resource.cache))
+
+    def test_changed_resources_are_loaded_again(self):
+        path_to_file = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        resource = Resource.load(path_to_file)
+        self.assertEqual('var foo = {};', resource.content)
+
+        self.create_file_in_the_past('file1.js', 'var foobar = {};', seconds_ago=50)
+        reloaded = Resource.load(path_to_file)
+        self.assertFalse(resource is reloaded)
+        self.assertEqual('var foobar = {};', reloaded.content)
+        self.assertEqual(2, Resource.cache.misses)
+        self.assertEqual(len('var foobar = {};'), Resource.cache.loaded_bytes)
+
+    def test_loading_a_resource_stats_the_file_once(self):
+        path_to_file = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        metadata_index = MetadataIndex(os.path.join(self.test_env_dir, 'metadata.json'))
+        stat_paths = []
+        original_stat = os.stat
+
+        def counting_stat(path):
+            stat_paths.append(path)
+            return original_stat(path)
+
+        os.stat = counting_stat
+        try:
+            resource = Resource.load(path_to_file, metadata_index)
+            self.assertEqual(13, resource.size)
+        finally:
+            os.stat = original_stat
+        self.assertEqual([path_to_file], stat_paths)
+
+    def test_invalidate_and_clear_remove_resources(self):
+        path_to_file1 = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        path_to_file2 = self.create_file_in_the_past('file2.js', 'var bar = {};')
+        resource = Resource.load(path_to_file1)
+        Resource.load(path_to_file2)
+
+        Resource.cache.invalidate(path_to_file1)
+        self.assertFalse(path_to_file1 in Resource.cache)
+        self.assertFalse(resource is Resource.load(path_to_file1))
+
+        Resource.cache.clear()
+        self.assertEqual(0, len(Resource.cache))
+        self.assertEqual(0, Resource.cache.loaded_bytes)
+
+    def test_least_recently_used_content_is_released_when_over_budget(self):
+        Resource.cache.max_bytes = 20
+        resource1 = Resource.load(self.create_file_in_the_past('file1.js', 'var foo = {};'))
+        resource2 = Resource.load(self.create_file_in_the_past('file2.js', 'var bar = {};'))
+        resource3 = Resource.load(self.create_file_in_the_past('file3.js', 'var baz = {};'))
+
+        self.assertEqual('var foo = {};', resource1.content)
+        self.assertEqual('var bar = {};', resource2.content)
+        self.assertEqual(1, Resource.cache.evictions)
+        self.assertEqual(13, Resource.cache.loaded_bytes)
+        self.assertEqual(0, resource1.loaded_size)
+
+        self.assertEqual('var baz = {};', resource3.content)
+        self.assertEqual(0, resource2.loaded_size)
+        self.assertEqual(13, resource3.loaded_size)
+
+        # Released content is read again when it is accessed
+        self.assertEqual('var foo = {};', resource1.content)
+        self.assertEqual(3, Resource.cache.evictions)
+        self.assertTrue(Resource.cache.loaded_bytes <= 20)
+
+    def test_accessing_content_makes_a_resource_the_most_recently_used(self):
+        Resource.cache.max_bytes = 30
+        resource1 = Resource.load(self.create_file_in_the_past('file1.js', 'var foo = {};'))
+        resource2 = Resource.load(self.create_file_in_the_past('file2.js', 'var bar = {};'))
+        resource3 = Resource.load(self.create_file_in_the_past('file3.js', 'var baz = {};'))
+        resource1.content
+        resource2.content
+        resource1.content
+        resource3.content
+        self.assertEqual(13, resource1.loaded_size)
+        self.assertEqual(0, resource2.loaded_size)
+        self.assertEqual(13, resource3.loaded_size)
+
+    def test_a_resource_larger_than_the_budget_keeps_its_content(self):
+        Resource.cache.max_bytes = 5
+        resource = Resource.load(self.create_file_in_the_past('file1.js', 'var foo = {};'))
+        self.assertEqual('var foo = {};', resource.content)
+        self.assertEqual(13, resource.loaded_size)
+        self.assertEqual(0, Resource.cache.evictions)
+
+    def test_reload_replaces_the_cached_resource(self):
+        path_to_file = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        resource = Resource.load(path_to_file)
+        reloaded = Resource.reload(path_to_file)
+        self.assertFalse(resource is reloaded)
+        self.assertTrue(reloaded is Resource.load(path_to_file))
+
+    def test_largest_loaded_lists_the_resources_holding_the_most_content(self):
+        path1 = self.create_file_in_the_past('file1.js', 'var foo = {};')
+        path2 = self.create_file_in_the_past('file2.js', 'var foobar = {};')
+        path3 = self.create_file_in_the_past('file3.js', 'var baz = {};')
+        Resource.load(path1).content
+        Resource.load(path2).content
+        Resource.load(path3)
+        self.assertEqual([(path2, 16), (path1, 13)], Resource.cache.largest_loaded())
+        self.assertEqual([(path2, 16)], Resource.cache.largest_loaded(1))
+
+    def test_resources_holding_no_content_do_not_affect_eviction(self):
+        Resource.cache.max_bytes = 30
+        resource1 = Resource.load(self.create_file_in_the_past('file1.js', 'var foo = {};'))
+        for i in range(20):
+            Resource.load(self.create_file_in_the_past('empty%d.js' % i, 'var empty = {};'))
+        resource2 = Resource.load(self.create_file_in_the_past('file2.js', 'var bar = {};'))
+        resource3 = Resource.load(self.create_file_in_the_past('file3.js', 'var baz = {};'))
+        resource1.content
+        resource2.content
+        resource3.content
+        self.assertEqual(1, Resource.cache.evictions)
+        self.assertEqual(0, resource1.loaded_size)
+        self.assertEqual([resource2.path_to_file, resource3.path_to_file],
+            sorted(path_to_file for path_to_file, loaded_bytes in Resource.cache.largest_loaded()))
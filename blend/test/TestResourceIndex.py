@@ -0,0 +1,131 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import Paths, ResourceIndex
+import shutil
+import os
+import helpers
+
+
+class TestResourceIndex(unittest.TestCase):
+    """Asserts that the ResourceIndex class finds and indexes resources correctly."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+        helpers.clean_output()
+
+    def test_resources_contains_all_processable_files(self):
+        paths_to_processable_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'file1.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'file2.css')]
+        helpers.create_files(paths_to_processable_test_files)
+        helpers.create_files(os.path.join(self.test_env_dir, 'dir1', 'movie.avi'))
+
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False))
+
+        self.assertEqual(2, len(index.resources))
+        self.assertEqual(sorted(paths_to_processable_test_files),
+            sorted([resource.path_to_file for resource in index.resources]))
+
+    def test_find_by_file_type_and_base_name(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'dir1', 'jquery-1.7.2.min.js'),
+            os.path.join(self.test_env_dir, 'dir2', 'jquery.css'),
+            os.path.join(self.test_env_dir, 'dir2', 'other.js')]
+        helpers.create_files(paths_to_test_files)
+
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False))
+
+        javascript_resources = index.find('javascript', 'jquery')
+        self.assertEqual(1, len(javascript_resources))
+        self.assertEqual(paths_to_test_files[0], javascript_resources[0].path_to_file)
+        css_resources = index.find('css', 'jquery')
+        self.assertEqual(1, len(css_resources))
+        self.assertEqual(paths_to_test_files[1], css_resources[0].path_to_file)
+
+    def test_find_returns_an_empty_list_when_nothing_matches(self):
+        helpers.create_files(os.path.join(self.test_env_dir, 'file1.js'))
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False))
+        self.assertEqual([], index.find('javascript', 'file2'))
+        self.assertEqual([], index.find('css', 'file1'))
+
+    def test_resources_in_the_output_path_are_not_indexed(self):
+        output_path = os.path.join(self.test_env_dir, 'output')
+        helpers.create_files(os.path.join(output_path, 'file1.js'))
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False, output_path=output_path))
+        self.assertEqual([], index.find('javascript', 'file1'))
+        self.assertEqual([], index.find_all_of_type('javascript'))
+        self.assertEqual([], index.resources)
+
+    def test_a_search_path_that_is_the_output_path_is_still_indexed(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'js', 'file1.js')
+        helpers.create_files(path_to_test_file)
+        for output_path in [self.test_env_dir, os.path.dirname(self.test_env_dir)]:
+            index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False, output_path=output_path))
+            self.assertEqual([path_to_test_file], [resource.path_to_file for resource in index.resources])
+
+    def test_ignored_resources_are_not_indexed(self):
+        paths_to_test_files = [
+            os.path.join(self.test_env_dir, 'src', 'file1.js'),
+            os.path.join(self.test_env_dir, 'node_modules', 'file2.js'),
+            os.path.join(self.test_env_dir, 'src', 'file3-copy.js')]
+        helpers.create_files(paths_to_test_files)
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False),
+            ignore_patterns=['node_modules', '*-copy.js'])
+        self.assertEqual([paths_to_test_files[0]], [resource.path_to_file for resource in index.resources])
+
+    def test_search_paths_are_walked_in_order(self):
+        first_path = os.path.join(self.test_env_dir, 'first')
+        second_path = os.path.join(self.test_env_dir, 'second')
+        paths_to_test_files = [
+            os.path.join(second_path, 'file1.js'),
+            os.path.join(first_path, 'file1.js')]
+        helpers.create_files(paths_to_test_files)
+
+        index = ResourceIndex(Paths(first_path, second_path, include_cwd=False))
+
+        resources = index.find('javascript', 'file1')
+        self.assertEqual(2, len(resources))
+        self.assertEqual(paths_to_test_files[1], resources[0].path_to_file)
+        self.assertEqual(paths_to_test_files[0], resources[1].path_to_file)
+
+    def test_refresh_replaces_changed_resources(self):
+        path_to_test_file = os.path.join(self.test_env_dir, 'dir1', 'file1.js')
+        helpers.create_file_with_content(path_to_test_file, 'var foo = {};')
+        index = ResourceIndex(Paths(self.test_env_dir, include_cwd=False))
+        original = index.find('javascript', 'file1')[0]
+
+        helpers.create_file_with_content(path_to_test_file, '//= require file2\nvar foo = {};')
+        index.refresh([path_to_test_file])
+        refreshed = index.find('javascript', 'file1')[0]
+        self.assertFalse(original is refreshed)
+        self.assertEqual([refreshed], index.resources)
+        self.assertEqual(1, len(refreshed.requirements))
+        self.assertTrue(refreshed is index.find_nearest('javascript', 'file1', self.test_env_dir))
@@ -0,0 +1,83 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import Paths, Resource, ResourceIndex, ResourceResolver
+import shutil
+import os
+import helpers
+
+
+class TestResourceResolver(unittest.TestCase):
+    """Asserts that the ResourceResolver class finds the nearest resource with a base name."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def create_resolver(self, *relative_paths):
+        helpers.create_files([os.path.join(self.test_env_dir, *path.split('/')) for path in relative_paths])
+        return ResourceResolver(ResourceIndex(Paths(self.test_env_dir, include_cwd=False)))
+
+    def find_nearest(self, resolver, base_name, relative_dir):
+        directory = os.path.join(self.test_env_dir, *relative_dir.split('/'))
+        resource = resolver.find_nearest('javascript', base_name, directory)
+        if resource is None:
+            return None
+        return os.path.relpath(resource.path_to_file, self.test_env_dir).replace(os.sep, '/')
+
+    def test_a_resource_in_the_same_directory_is_nearest(self):
+        resolver = self.create_resolver('a/b/jquery.js', 'a/jquery.js', 'a/b/c/jquery.js')
+        self.assertEqual('a/b/jquery.js', self.find_nearest(resolver, 'jquery', 'a/b'))
+
+    def test_downward_matches_are_preferred_to_upward_matches(self):
+        resolver = self.create_resolver('a/jquery.js', 'a/b/lib/vendor/jquery.js')
+        self.assertEqual('a/b/lib/vendor/jquery.js', self.find_nearest(resolver, 'jquery', 'a/b'))
+        self.assertEqual('a/jquery.js', self.find_nearest(resolver, 'jquery', 'a/c'))
+
+    def test_the_shallowest_downward_match_is_nearest(self):
+        resolver = self.create_resolver('a/lib/vendor/jquery.js', 'a/lib/jquery.js', 'jquery.js')
+        self.assertEqual('a/lib/jquery.js', self.find_nearest(resolver, 'jquery', 'a'))
+
+    def test_ties_go_to_the_first_resource_in_the_index(self):
+        resolver = self.create_resolver('a/x/jquery.js', 'a/y/jquery.js')
+        self.assertEqual('a/x/jquery.js', self.find_nearest(resolver, 'jquery', 'a/z'))
+
+    def test_missing_resources_resolve_to_none(self):
+        resolver = self.create_resolver('a/jquery.js')
+        self.assertEqual(None, self.find_nearest(resolver, 'underscore', 'a'))
+
+    def test_resolution_agrees_with_distance_to_file(self):
+        relative_paths = ['a/b/c/file.js', 'a/b/d/file.js', 'a/e/file.js', 'f/file.js', 'a/b/c/g/h/file.js']
+        resolver = self.create_resolver(*relative_paths)
+        candidates = resolver._index.find('javascript', 'file')
+        for relative_path in relative_paths + ['a/b/other.js', 'f/g/other.js', 'other.js']:
+            resource = Resource(os.path.join(self.test_env_dir, *relative_path.split('/')))
+            expected = min(candidates, key=lambda item: resource.distance_to_file(item.path_to_file))
+            directory = os.path.dirname(resource.path_to_file)
+            self.assertTrue(expected is resolver.find_nearest('javascript', 'file', directory), relative_path)
@@ -23,6 +23,7 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import unittest
+import json
 
 from blend import Result
 
@@ -64,3 +65,14 @@ class TestResult(unittest.TestCase):
         self.result.add_message("message")
         self.result.add_warning("warning")
         self.assertEqual("warning\nmessage", self.result.errors_warnings_and_messages_as_string)
+
+    def test_to_dict_and_from_dict_round_trip_through_json(self):
+        self.result.add_message("message")
+        self.result.add_error("error")
+        self.result.mark_as_good()
+        result = Result.from_dict(json.loads(json.dumps(self.result.to_dict())))
+        self.assertEqual(["message"], result.messages)
+        self.assertIsNone(result.warnings)
+        self.assertEqual(["error"], result.errors)
+        self.assertTrue(result.good)
+        self.assertTrue(isinstance(result.messages[0], str))
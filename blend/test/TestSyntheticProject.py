@@ -0,0 +1,98 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend.benchmark.SyntheticProject import SyntheticProject
+import shutil
+import os
+import re
+
+
+class TestSyntheticProject(unittest.TestCase):
+    """Asserts that the SyntheticProject class creates reproducible trees with the requested shape."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, dir_names, file_names in os.walk(root):
+            for file_name in file_names:
+                path_to_file = os.path.join(dir_path, file_name)
+                f = open(path_to_file, 'r')
+                try:
+                    files[os.path.relpath(path_to_file, root)] = f.read()
+                finally:
+                    f.close()
+        return files
+
+    def test_the_same_seed_creates_the_same_tree(self):
+        trees = []
+        for name, seed in [('first', 1), ('second', 1), ('third', 2)]:
+            SyntheticProject(file_count=60, diamond_density=0.5, seed=seed).create(os.path.join(self.test_env_dir, name))
+            trees.append(self.read_tree(os.path.join(self.test_env_dir, name)))
+        self.assertEqual(trees[0], trees[1])
+        self.assertNotEqual(trees[0], trees[2])
+
+    def test_the_tree_has_the_requested_files_and_requirements(self):
+        project = SyntheticProject(file_count=100, depth=3, fan_out=3, css_ratio=0.3, file_size=500,
+            files_per_directory=10)
+        bundle_paths = project.create(self.test_env_dir)
+        files = self.read_tree(self.test_env_dir)
+        self.assertEqual(100, len(files))
+        css_files = [path for path in files if path.endswith('.css')]
+        self.assertEqual(30, len(css_files))
+        self.assertEqual(70, len([path for path in files if path.endswith('.js')]))
+
+        names = set(os.path.splitext(os.path.basename(path))[0] for path in files)
+        for path, content in files.iteritems():
+            requirements = re.findall(r'^(?://|/\*)= require (\S+)', content, re.MULTILINE)
+            layer = int(os.path.basename(path).split('_')[1])
+            if layer < project.depth:
+                self.assertEqual(3, len(requirements))
+                self.assertEqual(3, len(set(requirements)))
+                self.assertTrue(os.path.join(self.test_env_dir, path) in bundle_paths)
+            else:
+                self.assertEqual([], requirements)
+            for requirement in requirements:
+                self.assertTrue(requirement in names)
+                self.assertEqual(layer + 1, int(requirement.split('_')[1]))
+            self.assertTrue(250 <= len(content) <= 750 + 100)
+        self.assertEqual(len(bundle_paths), len([path for path in files
+            if int(os.path.basename(path).split('_')[1]) < project.depth]))
+
+    def test_without_diamonds_each_library_is_required_once(self):
+        project = SyntheticProject(file_count=85, depth=3, fan_out=4, diamond_density=0, css_ratio=0)
+        self.assertEqual([1, 4, 16, 64], project.layer_sizes(85))
+        project.create(self.test_env_dir)
+        required = []
+        for content in self.read_tree(self.test_env_dir).itervalues():
+            required.extend(re.findall(r'^//= require (\S+)', content, re.MULTILINE))
+        self.assertEqual(84, len(required))
+        self.assertEqual(84, len(set(required)))
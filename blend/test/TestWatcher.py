@@ -0,0 +1,137 @@
+# By Justin Walgran
+# Copyright (c) 2012 Azavea, Inc.
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import tempfile
+
+from blend import Application, Watcher
+import shutil
+import os
+import helpers
+
+
+class TestWatcher(unittest.TestCase):
+    """Asserts that the Watcher class rebuilds only the bundles affected by a change."""
+
+    def setUp(self):
+        self.test_env_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.test_env_dir, 'output')
+        self.config_file_path = os.path.join(self.test_env_dir, 'config.json')
+        helpers.create_file_with_content(self.config_file_path, '{}')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_env_dir)
+
+    def path(self, relative_path):
+        return os.path.join(self.test_env_dir, 'src', *relative_path.split('/'))
+
+    def create_watcher(self):
+        app = Application(path_list=[os.path.join(self.test_env_dir, 'src')], include_cwd=False,
+            output_dir=self.output_dir, config_file_path=self.config_file_path, metadata_index_path=None)
+        return Watcher(app, use_inotify=False)
+
+    def read_output(self, file_name):
+        f = open(os.path.join(self.output_dir, file_name), 'r')
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def test_only_bundles_that_include_a_changed_file_are_rebuilt(self):
+        helpers.create_file_with_content(self.path('app1.js'), '//= require lib1\napp1\n')
+        helpers.create_file_with_content(self.path('app2.js'), '//= require lib2\napp2\n')
+        helpers.create_file_with_content(self.path('lib/lib1.js'), '//= require base\nlib1\n')
+        helpers.create_file_with_content(self.path('lib/lib2.js'), 'lib2\n')
+        helpers.create_file_with_content(self.path('lib/base.js'), 'base\n')
+        watcher = self.create_watcher()
+        self.assertEqual(0, watcher.build())
+        self.assertEqual('base\nlib1\napp1\n', self.read_output('app1.js'))
+
+        self.assertEqual([], watcher.check())
+
+        helpers.create_file_with_content(self.path('lib/base.js'), 'base changed\n')
+        rebuilt = watcher.check()
+        self.assertEqual([self.path('app1.js'), self.path('lib/lib1.js')],
+            sorted([resource.path_to_file for resource in rebuilt]))
+        self.assertEqual('base changed\nlib1\napp1\n', self.read_output('app1.js'))
+
+    def test_changed_requirements_are_resolved_again(self):
+        helpers.create_file_with_content(self.path('app1.js'), '//= require lib1\napp1\n')
+        helpers.create_file_with_content(self.path('lib/lib1.js'), 'lib1\n')
+        helpers.create_file_with_content(self.path('lib/lib2.js'), 'lib2\n')
+        watcher = self.create_watcher()
+        watcher.build()
+
+        helpers.create_file_with_content(self.path('app1.js'), '//= require lib2\napp1 changed\n')
+        self.assertEqual([self.path('app1.js')], [resource.path_to_file for resource in watcher.check()])
+        self.assertEqual('lib2\napp1 changed\n', self.read_output('app1.js'))
+
+    def test_added_files_that_change_the_resolution_of_a_requirement_cause_a_rebuild(self):
+        helpers.create_file_with_content(self.path('app/app1.js'), '//= require lib1\napp1\n')
+        helpers.create_file_with_content(self.path('lib/lib1.js'), 'lib1\n')
+        watcher = self.create_watcher()
+        watcher.build()
+
+        helpers.create_file_with_content(self.path('app/lib1.js'), 'nearer lib1\n')
+        rebuilt = watcher.check()
+        self.assertEqual([self.path('app/app1.js')], [resource.path_to_file for resource in rebuilt])
+        self.assertEqual('nearer lib1\napp1\n', self.read_output('app1.js'))
+
+    def test_a_missing_requirement_is_reported_and_built_after_it_is_fixed(self):
+        helpers.create_file_with_content(self.path('app1.js'), '//= require lib1\napp1\n')
+        helpers.create_file_with_content(self.path('lib/lib1.js'), 'lib1\n')
+        watcher = self.create_watcher()
+        watcher.build()
+
+        os.remove(self.path('lib/lib1.js'))
+        self.assertEqual([], watcher.check())
+        self.assertEqual(None, watcher.graph)
+
+        helpers.create_file_with_content(self.path('lib/lib1.js'), 'lib1 restored\n')
+        self.assertEqual([self.path('app1.js')], [resource.path_to_file for resource in watcher.check()])
+        self.assertEqual('lib1 restored\napp1\n', self.read_output('app1.js'))
+
+    def test_changes_in_ignored_directories_do_not_cause_a_rebuild(self):
+        helpers.create_file_with_content(self.config_file_path, '{"ignore": ["node_modules"]}')
+        helpers.create_file_with_content(self.path('app1.js'), '//= require lib1\napp1\n')
+        helpers.create_file_with_content(self.path('lib/lib1.js'), 'lib1\n')
+        helpers.create_file_with_content(self.path('node_modules/pkg/lib1.js'), 'ignored lib1\n')
+        helpers.create_file_with_content(self.path('.git/HEAD'), 'ref: refs/heads/master\n')
+        watcher = self.create_watcher()
+        watcher.build()
+
+        helpers.create_file_with_content(self.path('node_modules/pkg/lib1.js'), 'ignored lib1 changed\n')
+        helpers.create_file_with_content(self.path('node_modules/pkg/new/app2.js'), '//= require lib1\napp2\n')
+        helpers.create_file_with_content(self.path('.git/hooks/check.js'), 'check\n')
+        self.assertEqual([], watcher.check())
+        # The events pyinotify would report for the same changes are dropped too
+        self.assertEqual((set(), False), watcher._changes_from_events([
+            (self.path('node_modules/pkg/lib1.js'), False, True),
+            (self.path('node_modules/pkg/new'), True, False),
+            (self.path('node_modules/pkg/new/app2.js'), False, False),
+            (self.path('.git/hooks/check.js'), False, False)]))
+        self.assertEqual((set([self.path('lib/lib1.js')]), True), watcher._changes_from_events([
+            (self.path('lib/lib1.js'), False, True),
+            (self.path('lib/lib2.js'), False, False)]))
+        self.assertEqual('lib1\napp1\n', self.read_output('app1.js'))
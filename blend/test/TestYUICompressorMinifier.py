@@ -87,6 +87,57 @@ class TestYUICompressorMinifier(unittest.TestCase):
         self.assertTrue(minification.good)
         self.assertEqual('var answer=42;var question="what is 6 times 7";', minification.content)
 
+    def test_compressor_content(self):
+        yuic = YUICompressorMinifier()
+        minification = yuic.minify_content('var answer = 42;\nvar question = "what is " +\n "6 times 7";',
+            'javascript')
+        self.assertTrue(minification.good)
+        self.assertEqual('var answer=42;var question="what is 6 times 7";', minification.content)
+        minification = yuic.minify_content('a {\n    color: red;\n}\n', 'css')
+        self.assertTrue(minification.good)
+        self.assertEqual('a{color:red}', minification.content)
+
+    def test_compressor_content_batch(self):
+        minifications = YUICompressorMinifier().minify_content_batch(
+            ['var answer = 42;\n', 'var obj = { function: "failure" }', 'var b = 1;'], 'javascript')
+        self.assertEqual([True, False, True], [minification.good for minification in minifications])
+        self.assertEqual(['var answer=42;', None, 'var b=1;'], [minification.content for minification in minifications])
+
+    def test_content_of_an_unknown_type_cannot_be_minified(self):
+        minification = YUICompressorMinifier().minify_content('text', 'unknown')
+        self.assertFalse(minification.good)
+        self.assertEqual(["The YUI Compressor cannot minify content of type 'unknown'."], minification.errors)
+
+    def test_content_cannot_be_minified_when_lib_dir_is_not_found(self):
+        invalid_lib_path = '/some/invalid/path'
+        minification = YUICompressorMinifier({'lib_path': invalid_lib_path}).minify_content('var a;', 'javascript')
+        self.assertFalse(minification.good)
+        self.assertEqual(['A YUI Compressor .jar file could not be found in %s.' % invalid_lib_path],
+            minification.errors)
+
+    def test_compressor_batch(self):
+        resources = []
+        for i, content in enumerate(['var answer = 42;\n', 'var question = "what is " +\n "6 times 7";',
+                'var a=42;', '']):
+            name = 'test%d.min.js' % i if content == 'var a=42;' else 'test%d.js' % i
+            test_file_path = os.path.join(self.test_env_dir, name)
+            create_file_with_content(test_file_path, content)
+            resources.append(Resource(test_file_path))
+        minifications = YUICompressorMinifier().minify_batch(resources)
+        self.assertEqual([True] * 4, [minification.good for minification in minifications])
+        self.assertEqual(['var answer=42;', 'var question="what is 6 times 7";', 'var a=42;', ''],
+            [minification.content for minification in minifications])
+
+    def test_compressor_batch_failure_only_fails_the_resource_that_cannot_be_minified(self):
+        resources = []
+        for i, content in enumerate(['var answer = 42;', 'var obj = { function: "failure" }', 'var b = 1;']):
+            test_file_path = os.path.join(self.test_env_dir, 'test%d.js' % i)
+            create_file_with_content(test_file_path, content)
+            resources.append(Resource(test_file_path))
+        minifications = YUICompressorMinifier().minify_batch(resources)
+        self.assertEqual([True, False, True], [minification.good for minification in minifications])
+        self.assertEqual('var b=1;', minifications[2].content)
+
     def test_compressor_failure(self):
         test_resource = Resource(self.make_a_js_file(
             content='var obj = { function: "failure" }'))  # 'function' is not a legal property name
@@ -54,11 +54,14 @@ setup(
     version='0.1.4',
     author='Justin Walgran',
     author_email='jwalgran@azavea.com',
-    packages=['blend', 'blend.test'],
+    packages=['blend', 'blend.test', 'blend.benchmark'],
+    # Directories are listed with os.scandir, which the scandir package backports
+    install_requires=['scandir'] if sys.version_info < (3, 5) else [],
     scripts=['bin/blend', 'bin/blend.bat'],
     package_data={'blend': [
         'lib/js.jar',
         'lib/js_LICENSE.TXT',
+        'lib/blend-jslint-worker.js',
         'lib/jslint.js',
         'lib/yuicompressor-2.4.6.jar',
         'lib/yuicompressor_LICENSE.TXT'